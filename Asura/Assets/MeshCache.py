@@ -0,0 +1,98 @@
+from ..Logging import ClientLoggers
+from ..Utility import Path, Dict, AtomicWrite
+
+import hashlib
+import mmap
+import numpy as np
+import struct
+
+# Imported meshes, stored as packed arrays so that a model is only parsed the first time it is loaded.
+# Entries are keyed by the content of the source file and the importer that made them (see Key), so editing the
+# source or bumping the importer's version makes a new entry instead of reading a stale one.
+#
+# File (<key>.AzMesh), little endian:
+#     Header    : magic "AZM\0", format version (u16), array count (u32)
+#     Directory : per array, its name (16 bytes, null padded), dtype ("<f4", "<u4", ...), rows, columns and offset (u64)
+#     Arrays    : 16 byte aligned, C order
+# Get memory-maps the file and returns views of the mapping, nothing is copied until the arrays are used.
+class MeshCache:
+    Magic: bytes = b"AZM\0"
+    FormatVersion: int = 1
+
+    __Header: struct.Struct = struct.Struct("<4sHI")
+    __Entry: struct.Struct = struct.Struct("<16s4sQQQ")
+
+    __Directory: Path
+
+    def __init__(self, directory: Path) -> None:
+        self.__Directory = directory
+
+    @property
+    def Location(self) -> Path: return self.__Directory
+
+    # Hash of the source file and of the importer, `version` has to change whenever the importer's output does
+    @staticmethod
+    def Key(source: Path, importer: str, version: int) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("{}:{}\0".format(importer, version).encode("utf-8"))
+        with source.open("rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""): digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def PathFor(self, key: str) -> Path: return self.__Directory / "{}.AzMesh".format(key)
+
+    def Contains(self, key: str) -> bool: return self.PathFor(key).exists()
+
+    # The arrays stored under `key`, or None if there are none (or the file is not readable)
+    def Get(self, key: str) -> Dict[str, np.ndarray] | None:
+        path = self.PathFor(key)
+        if not path.exists(): return None
+
+        try:
+            with path.open("rb") as file:
+                # The arrays are views of the mapping, it is closed once they are all released
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            magic, version, count = MeshCache.__Header.unpack_from(buffer, 0)
+            if magic != MeshCache.Magic or version > MeshCache.FormatVersion: raise ValueError("not a mesh cache file")
+
+            arrays: Dict[str, np.ndarray] = {}
+            for i in range(count):
+                name, dtype, rows, columns, offset = MeshCache.__Entry.unpack_from(
+                    buffer, MeshCache.__Header.size + i * MeshCache.__Entry.size
+                )
+                array = np.frombuffer(buffer, dtype.rstrip(b"\0").decode("ascii"), rows * columns, offset)
+                arrays[name.rstrip(b"\0").decode("utf-8")] = array.reshape(rows, columns) if columns > 1 else array
+
+            return arrays
+
+        except (ValueError, struct.error) as e:
+            ClientLoggers.Warn("Ignoring unreadable mesh cache {}: {}", str(path), e)
+            return None
+
+    # Arrays are 1D or 2D, names at most 16 bytes long
+    def Put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        self.__Directory.mkdir(parents=True, exist_ok=True)
+
+        blocks = [ (name, np.ascontiguousarray(array, np.asarray(array).dtype.newbyteorder("<"))) for name, array in arrays.items() ]
+        offset = MeshCache.__Align(MeshCache.__Header.size + MeshCache.__Entry.size * len(blocks))
+        entries = []
+        for name, array in blocks:
+            columns = array.shape[1] if array.ndim == 2 else 1
+            entries.append(MeshCache.__Entry.pack(name.encode("utf-8"), array.dtype.str.encode("ascii"), len(array), columns, offset))
+            offset = MeshCache.__Align(offset + array.nbytes)
+
+        with AtomicWrite(self.PathFor(key), "wb") as file:
+            file.write(MeshCache.__Header.pack(MeshCache.Magic, MeshCache.FormatVersion, len(blocks)))
+            file.write(b"".join(entries))
+            for _, array in blocks:
+                file.write(b"\0" * (MeshCache.__Align(file.tell()) - file.tell()))
+                file.write(array.tobytes())
+
+    def Clear(self) -> None:
+        if not self.__Directory.exists(): return
+        for path in self.__Directory.glob("*.AzMesh"): path.unlink()
+
+    @staticmethod
+    def __Align(offset: int) -> int: return (offset + 15) & ~15
@@ -1,50 +1,411 @@
 from ..Logging import ClientLoggers
+from .MeshCache import MeshCache
 
-from typing import List
-from pyrr import Vector3
+from typing import List, Dict, Tuple, Type
 from abc import ABC, abstractmethod
 from pathlib import Path
 from pywavefront import Wavefront
 
+import numpy as np
+import re
+
+# The attributes of a vertex, in the order they are interleaved, and their number of float32 components
+VertexLayout = Tuple[Tuple[str, int], ...]
+
+# A mesh as the GPU takes it: an interleaved float32 vertex buffer (a row per vertex, laid out as `Layout`) and a
+# triangle index buffer, uint16 when there are few enough vertices and uint32 otherwise.
+# Arrays handed to the Model are kept as they are when they already have the right type, so a model read from a
+# MeshCache stays a view of the mapped file. VertexBuffer / IndexBuffer expose them for upload without a copy.
 class Model:
-    __Vertices: List[Vector3]
-    __Indices: List[int]
+    DefaultLayout: VertexLayout = (("Position", 3), ("Normal", 3), ("UV", 2))
+
+    __Layout: VertexLayout
+    __Vertices: np.ndarray
+    __Indices: np.ndarray
+
+    def __init__(
+        self, vertices: np.ndarray | None=None, indices: np.ndarray | None=None, layout: VertexLayout=DefaultLayout
+    ) -> None:
+        self.__Layout = tuple(layout)
+        width = sum(size for _, size in self.__Layout)
+
+        self.__Vertices = np.zeros((0, width), np.float32) if vertices is None else \
+                          np.ascontiguousarray(vertices, np.float32).reshape(-1, width)
+        self.__Indices = np.ascontiguousarray(
+            [] if indices is None else indices, Model.IndexType(len(self.__Vertices))
+        ).reshape(-1)
+
+    # Builds the interleaved buffer from an array per attribute, the ones missing are zeros
+    @staticmethod
+    def FromAttributes(
+        attributes: Dict[str, np.ndarray], indices: np.ndarray | None=None, layout: VertexLayout=DefaultLayout
+    ) -> "Model":
+        count = len(next(iter(attributes.values()))) if attributes else 0
+        vertices = np.zeros((count, sum(size for _, size in layout)), np.float32)
+
+        start = 0
+        for name, size in layout:
+            if name in attributes: vertices[:, start:start + size] = np.asarray(attributes[name]).reshape(count, size)
+            start += size
+
+        return Model(vertices, indices, layout)
+
+    # uint16 indices when they can address every vertex
+    @staticmethod
+    def IndexType(vertexCount: int) -> np.dtype:
+        return np.dtype(np.uint16) if vertexCount <= np.iinfo(np.uint16).max + 1 else np.dtype(np.uint32)
 
-    def __init__(self) -> None:
-        self.__Vertices = []
-        self.__Indices = []
+    @property
+    def Layout(self) -> VertexLayout: return self.__Layout
+    # Size of a vertex in bytes
+    @property
+    def Stride(self) -> int: return 4 * self.__Vertices.shape[1]
 
     @property
-    def Vertices(self) -> List[Vector3]: return self.__Vertices
+    def Vertices(self) -> np.ndarray: return self.__Vertices
+    @property
+    def Indices(self) -> np.ndarray: return self.__Indices
+    @property
+    def VertexCount(self) -> int: return len(self.__Vertices)
+    @property
+    def IndexCount(self) -> int: return len(self.__Indices)
+
+    # The buffers as flat bytes, views of the arrays (bytes(model.VertexBuffer) is the only copy)
     @property
-    def Indices(self) -> List[int]: return self.__Indices
+    def VertexBuffer(self) -> memoryview: return memoryview(self.__Vertices).cast("B")
+    @property
+    def IndexBuffer(self) -> memoryview: return memoryview(self.__Indices).cast("B")
+
+    @property
+    def Positions(self) -> np.ndarray: return self.Attribute("Position")
+
+    # A strided view of one attribute of every vertex
+    def Attribute(self, name: str) -> np.ndarray:
+        start = self.Offset(name) // 4
+        return self.__Vertices[:, start:start + dict(self.__Layout)[name]]
+
+    # Offset of the attribute in a vertex, in bytes
+    def Offset(self, name: str) -> int:
+        offset = 0
+        for attribute, size in self.__Layout:
+            if attribute == name: return offset
+            offset += 4 * size
 
-    def AddVertex(self, vertex: Vector3) -> None: self.__Vertices.append(vertex)
-    def AddIndices(self, index: int) -> None: self.__Indices.append(index)
+        raise KeyError("{} is not in the vertex layout".format(name))
 
+# A loader has a Name and a Version, which key its imports in a MeshCache (bump the Version whenever the output of
+# Import changes, so that cached imports are redone), and an Import that parses a file into a Model.
 class ModelLoader(ABC):
+    Name: str
+    Version: int
+
+    # With a `cache`, the imported model is stored there and later loads of the same file skip the parsing
+    @staticmethod
+    def LoadModel(path: Path, loader: "Type[ModelLoader]", cache: MeshCache | None=None) -> Model:
+        try: return ModelLoader.ImportCached(path, loader, cache) if cache is not None else loader.Import(path)
+        except Exception as e: ClientLoggers.Error("Failed to load model: {} ({})", path, e)
+
+        return Model()
+
     @staticmethod
-    def LoadModel(path: Path, loader) -> Model: return loader.Load(path)
+    def ImportCached(path: Path, loader: "Type[ModelLoader]", cache: MeshCache) -> Model:
+        key = MeshCache.Key(path, loader.Name, loader.Version)
+        arrays = cache.Get(key)
+        if arrays is not None: return Model(arrays["Vertices"], arrays["Indices"])
+
+        model = loader.Import(path)
+        cache.Put(key, { "Vertices": model.Vertices, "Indices": model.Indices })
+        return model
 
     @staticmethod
     @abstractmethod
-    def Load(path: Path) -> Model: ...
+    def Import(path: Path) -> Model: ...
+
+# Through pywavefront
+class OBJLoader(ModelLoader):
+    Name: str = "OBJ"
+    Version: int = 2
+
+    __Columns: Dict[str, tuple] = { "V": (0, 3), "N": (3, 3), "T": (6, 2) }
+
+    @staticmethod
+    def Load(path: Path, cache: MeshCache | None=None) -> Model: return ModelLoader.LoadModel(path, OBJLoader, cache)
+
+    # Parses the file into a Model with the default layout, UVs and normals missing from the file are zeros.
+    # Corners that share all their attributes share a vertex.
+    @staticmethod
+    def Import(path: Path) -> Model:
+        scene = Wavefront(str(path), collect_faces=True)
+
+        corners: List[np.ndarray] = []
+        for mesh in scene.mesh_list:
+            for material in mesh.materials:
+                # Triangles, one vertex per corner, its attributes interleaved as described by the vertex format
+                # (e.g. T2F_N3F_V3F)
+                layout = [ (part[0], int(part[1])) for part in material.vertex_format.split("_") ]
+                stride = sum(size for _, size in layout)
+                data = np.asarray(material.vertices, np.float32).reshape(-1, stride)
+
+                vertices = np.zeros((len(data), 8), np.float32)
+                start = 0
+                for attribute, size in layout:
+                    # Where the attribute goes in `vertices` and how many of its components are kept, colors are dropped
+                    if attribute in OBJLoader.__Columns:
+                        target, width = OBJLoader.__Columns[attribute]
+                        width = min(width, size)
+                        vertices[:, target:target + width] = data[:, start:start + width]
+                    start += size
+
+                corners.append(vertices)
+
+        allCorners = np.concatenate(corners) if corners else np.zeros((0, 8), np.float32)
+        unique, indices = np.unique(allCorners, axis=0, return_inverse=True)
+        return Model(unique, indices.reshape(-1))
+
+# Parses OBJ files with NumPy instead of line by line: the file is read in chunks of ChunkSize bytes, the lines of a
+# chunk are sorted into v / vt / vn / f by their first characters and the numbers of each statement parsed in one go.
+# Lines that do not fit that (extra components, trailing comments) go through regular expressions instead.
+# Polygons are triangulated as fans, other statements (groups, materials, lines, ...) are ignored.
+# Corners are de-duplicated by packing their (position, uv, normal) indices into one int64 key and hashing the keys,
+# so a vertex is made per distinct key, in the order the keys are first used.
+class StreamOBJLoader(ModelLoader):
+    Name: str = "OBJStream"
+    Version: int = 2
+
+    ChunkSize: int = 1 << 22
+
+    # The numbers of each statement, extra ones (w, vertex colors) are left out
+    __Statements: Dict[str, "re.Pattern[bytes]"] = {
+        "v"  : re.compile(rb"^v[ \t]+([^ \t\r\n]+[ \t]+[^ \t\r\n]+[ \t]+[^ \t\r\n]+)", re.MULTILINE),
+        "vt" : re.compile(rb"^vt[ \t]+([^ \t\r\n]+[ \t]+[^ \t\r\n]+)", re.MULTILINE),
+        "vn" : re.compile(rb"^vn[ \t]+([^ \t\r\n]+[ \t]+[^ \t\r\n]+[ \t]+[^ \t\r\n]+)", re.MULTILINE),
+        "f"  : re.compile(rb"^f[ \t]+([^\r\n#]*)", re.MULTILINE),
+    }
+    __Widths: Dict[str, int] = { "v": 3, "vt": 2, "vn": 3 }
 
-class OBJLoader:
     @staticmethod
-    def Load(path: Path) -> Model:
-        model = Model()
+    def Load(path: Path, cache: MeshCache | None=None) -> Model: return ModelLoader.LoadModel(path, StreamOBJLoader, cache)
+
+    @staticmethod
+    def Import(path: Path) -> Model:
+        attributes: Dict[str, List[np.ndarray]] = { "v": [], "vt": [], "vn": [] }
+        counts: Dict[str, int] = { "v": 0, "vt": 0, "vn": 0 }
+        corners: List[np.ndarray] = []
+        faceSizes: List[np.ndarray] = []
+
+        with path.open("rb") as file:
+            rest = b""
+            while True:
+                data = file.read(StreamOBJLoader.ChunkSize)
+                # Chunks end on a line break, the partial line at the end goes with the next one
+                chunk = rest + data
+                end = chunk.rfind(b"\n") + 1 if data else len(chunk)
+                chunk, rest = chunk[:end], chunk[end:]
 
-        try:
-            scene = Wavefront(path, collect_faces=True)
-            for name, mesh in scene.meshes.items():
-                for vertex in mesh.vertices: model.AddVertex(vertex)
-                for face in mesh.faces: model.AddIndices(face)
-        
-        except Exception as e: ClientLoggers.Error("Failed to load OBJ file: {}", path)
+                if chunk:
+                    if not chunk.endswith(b"\n"): chunk += b"\n"
+                    statements = StreamOBJLoader.__Split(chunk)
+
+                    # Faces first, relative indices count from the attributes read before this chunk
+                    faces = statements["f"]
+                    if faces:
+                        if b"#" in faces: faces = b"\n".join(StreamOBJLoader.__Statements["f"].findall(chunk)) + b"\n"
+                        chunkCorners, sizes = StreamOBJLoader.__ParseFaces(faces)
+                        if (chunkCorners < 0).any(): StreamOBJLoader.__ResolveRelative(chunk, chunkCorners, sizes, counts)
+                        corners.append(chunkCorners)
+                        faceSizes.append(sizes)
+
+                    for name, width in StreamOBJLoader.__Widths.items():
+                        text = statements[name]
+                        if not text: continue
+
+                        lineCount = text.count(b"\n")
+                        values = StreamOBJLoader.__Numbers(text, np.float32) if b"#" not in text else None
+                        if values is None or len(values) != width * lineCount:
+                            values = StreamOBJLoader.__Numbers(b" ".join(StreamOBJLoader.__Statements[name].findall(chunk)), np.float32)
+                            if values is None or len(values) != width * lineCount:
+                                raise ValueError("Malformed {} statement in {}".format(name, path))
+
+                        attributes[name].append(values.reshape(-1, width))
+                        counts[name] += lineCount
+
+                if not data: break
+
+        positions, uvs, normals = (
+            np.concatenate(attributes[name]) if attributes[name] else np.zeros((0, width), np.float32)
+            for name, width in StreamOBJLoader.__Widths.items()
+        )
+        allCorners = np.concatenate(corners) if corners else np.zeros((0, 3), np.int64)
+        sizes = np.concatenate(faceSizes) if faceSizes else np.zeros(0, np.int64)
+
+        # 1-based, 0 for a missing uv or normal
+        for column, count in enumerate([ len(positions), len(uvs), len(normals) ]):
+            values = allCorners[:, column]
+            if len(values) and (values.min() < (1 if column == 0 else 0) or values.max() > count):
+                raise ValueError("Index out of range in {}".format(path))
+
+        # Key of each corner, a vertex is made for each distinct one. Keys too large for an int64 are sorted instead.
+        uvCount, normalCount = len(uvs) + 1, len(normals) + 1
+        if len(positions) * uvCount * normalCount < np.iinfo(np.int64).max:
+            keys = ((allCorners[:, 0] - 1) * uvCount + allCorners[:, 1]) * normalCount + allCorners[:, 2]
+            first, inverse = StreamOBJLoader.__Deduplicate(keys)
+        else: _, first, inverse = np.unique(allCorners, axis=0, return_index=True, return_inverse=True)
+        unique = allCorners[first]
+
+        # The missing uvs and normals (index -1) pick the zero row added at the end
+        model = Model.FromAttributes({
+            "Position" : positions[unique[:, 0] - 1],
+            "Normal"   : np.concatenate((normals, np.zeros((1, 3), np.float32)))[unique[:, 2] - 1],
+            "UV"       : np.concatenate((uvs, np.zeros((1, 2), np.float32)))[unique[:, 1] - 1],
+        }, inverse.reshape(-1)[StreamOBJLoader.__Triangulate(sizes)].reshape(-1))
 
         return model
-    
-def LoadModel(path: Path) -> Model:
-    if path.suffix == '.obj': return ModelLoader.LoadModel(path, OBJLoader)
+
+    # The whitespace separated numbers in `text`, or None if one of them is not a number
+    @staticmethod
+    def __Numbers(text: bytes, dtype: type) -> np.ndarray | None:
+        try: return np.array(text.split(), dtype)
+        except ValueError: return None
+
+    # The integers in `text`, separated by blanks or slashes, or None if there is anything else in it. Parsed a digit
+    # at a time for all of them at once, converting the tokens of text.split() one by one is several times slower.
+    @staticmethod
+    def __Integers(text: bytes) -> np.ndarray | None:
+        characters = np.frombuffer(text, np.uint8)
+        separators = (characters == ord(" ")) | (characters == ord("\t")) | (characters == ord("\r")) | \
+                     (characters == ord("\n")) | (characters == ord("/"))
+        minus = characters == ord("-")
+        if not (separators | minus | ((characters - np.uint8(ord("0"))) < 10)).all(): return None
+
+        padded = np.concatenate(([ True ], separators, [ True ]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        starts, ends = edges[0::2], edges[1::2]
+
+        # A minus only before the digits
+        negative = minus[starts]
+        if np.count_nonzero(negative) != np.count_nonzero(minus): return None
+        starts = starts + negative
+
+        lengths = ends - starts
+        if not len(lengths): return np.zeros(0, np.int64)
+        if lengths.min() < 1 or lengths.max() > 18: return None
+
+        values = np.zeros(len(starts), np.int64)
+        for i in range(int(lengths.max())):
+            longer = np.flatnonzero(lengths > i)
+            values[longer] = values[longer] * 10 + (characters[starts[longer] + i] - ord("0"))
+
+        values[negative] *= -1
+        return values
+
+    # Index of the first occurrence of each distinct key (in order) and of the distinct key of each key, for keys >= 0.
+    # An open addressing (linear probing) hash table, filled for all the keys at once: every round the keys still
+    # pending write themselves into their slot if it is free, the ones that do not find themselves there move on to
+    # the next slot. In O(n) instead of the O(n log n) of sorting.
+    @staticmethod
+    def __Deduplicate(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        count = len(keys)
+        bits = max((2 * count - 1).bit_length(), 1)
+        mask = (1 << bits) - 1
+
+        # Fibonacci hashing, the top bits of the key times 2^64 / golden ratio
+        slots = ((keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(64 - bits)).astype(np.int64)
+        table = np.full(mask + 1, -1, np.int64)
+
+        pending = np.arange(count)
+        while len(pending):
+            pendingSlots, pendingKeys = slots[pending], keys[pending]
+            free = table[pendingSlots] == -1
+            table[pendingSlots[free]] = pendingKeys[free]
+
+            pending = pending[table[pendingSlots] != pendingKeys]
+            slots[pending] = (slots[pending] + 1) & mask
+
+        corners = np.arange(count)
+        firsts = np.full(mask + 1, count, np.int64)
+        np.minimum.at(firsts, slots, corners)
+        first = np.flatnonzero(firsts[slots] == corners)
+
+        ids = np.empty(mask + 1, np.int64)
+        ids[slots[first]] = np.arange(len(first))
+        return first, ids[slots]
+
+    # The lines of each statement in a chunk (ending with a line break), their keyword blanked out and each still
+    # ending with its line break
+    @staticmethod
+    def __Split(chunk: bytes) -> Dict[str, bytes]:
+        characters = np.frombuffer(chunk, np.uint8).copy()
+        starts = np.flatnonzero(np.concatenate(([ True ], characters[:-1] == ord("\n"))))
+
+        padded = np.concatenate((characters, np.full(2, ord("\n"), np.uint8)))
+        first, second, third = padded[starts], padded[starts + 1], padded[starts + 2]
+        def Blank(values: np.ndarray) -> np.ndarray: return (values == ord(" ")) | (values == ord("\t"))
+
+        kinds = np.zeros(len(starts), np.uint8)
+        kinds[(first == ord("v")) & Blank(second)] = 1
+        kinds[(first == ord("v")) & (second == ord("t")) & Blank(third)] = 2
+        kinds[(first == ord("v")) & (second == ord("n")) & Blank(third)] = 3
+        kinds[(first == ord("f")) & Blank(second)] = 4
+
+        characters[starts[kinds != 0]] = ord(" ")
+        characters[starts[(kinds == 2) | (kinds == 3)] + 1] = ord(" ")
+
+        perCharacter = np.repeat(kinds, np.diff(np.append(starts, len(characters))))
+        return { name: characters[perCharacter == kind].tobytes() for kind, name in enumerate([ "v", "vt", "vn", "f" ], 1) }
+
+    # The corners of the faces (lines ending with a line break) as (position, uv, normal) indices (N x 3, 0 for
+    # missing ones), and the number of corners of each face
+    @staticmethod
+    def __ParseFaces(faces: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        text = faces.replace(b"//", b"/0/")
+
+        # Corners per face, from where their tokens start
+        characters = np.frombuffer(text, np.uint8)
+        newlines = characters == ord("\n")
+        blank = (characters == ord(" ")) | (characters == ord("\t")) | (characters == ord("\r")) | newlines
+        starts = ~blank & np.concatenate(([ True ], blank[:-1]))
+        sizes = np.bincount(np.cumsum(newlines, dtype=np.int32)[starts], minlength=int(newlines.sum()))
+        count = int(sizes.sum())
+
+        # Usually every corner has the same form (v, v/vt, v//vn or v/vt/vn), then they are all parsed at once
+        slashes = np.bincount((np.cumsum(starts, dtype=np.int32) - 1)[characters == ord("/")], minlength=count)
+        fields = int(slashes[0]) + 1 if count else 1
+        if (slashes == fields - 1).all():
+            values = StreamOBJLoader.__Integers(text)
+            if values is not None and len(values) == count * fields:
+                corners = np.zeros((count, 3), np.int64)
+                corners[:, :fields] = values.reshape(count, fields)
+                return corners, sizes
+
+        corners = np.zeros((count, 3), np.int64)
+        for i, token in enumerate(text.split()):
+            for j, value in enumerate(token.split(b"/")[:3]):
+                if value: corners[i, j] = int(value)
+
+        return corners, sizes
+
+    # Negative indices count back from the last v / vt / vn before their face
+    @staticmethod
+    def __ResolveRelative(chunk: bytes, corners: np.ndarray, sizes: np.ndarray, counts: Dict[str, int]) -> None:
+        faceStarts = np.array([ match.start() for match in StreamOBJLoader.__Statements["f"].finditer(chunk) ])
+        for column, name in enumerate([ "v", "vt", "vn" ]):
+            starts = np.array([ match.start() for match in StreamOBJLoader.__Statements[name].finditer(chunk) ], np.int64)
+            before = np.repeat(counts[name] + np.searchsorted(starts, faceStarts), sizes)
+
+            values = corners[:, column]
+            relative = values < 0
+            values[relative] += before[relative] + 1
+
+    # Fans of corner indices, (T x 3)
+    @staticmethod
+    def __Triangulate(sizes: np.ndarray) -> np.ndarray:
+        triangles = np.maximum(sizes - 2, 0)
+        firstCorner = np.repeat(np.cumsum(sizes) - sizes, triangles)
+        firstTriangle = np.repeat(np.cumsum(triangles) - triangles, triangles)
+        step = np.arange(len(firstCorner)) - firstTriangle + 1
+
+        return np.stack((firstCorner, firstCorner + step, firstCorner + step + 1), axis=1)
+
+def LoadModel(path: Path, cache: MeshCache | None=None) -> Model:
+    if path.suffix.lower() == '.obj': return ModelLoader.LoadModel(path, StreamOBJLoader, cache)
     return Model()
@@ -1,2 +1,3 @@
+from .MeshCache import MeshCache
 from .Model import *
 from .AssetManager import *
@@ -21,6 +21,10 @@ class GUILibrary:
     ) -> Tuple[bool, pyrr.Vector3]:
         imgui.push_id(lable)
 
+        # The caller applies the returned values, `values` itself is left untouched
+        values = values.copy()
+        wasReset = False
+
         imgui.columns(2)
         imgui.set_column_width(0, columnWidth)
         imgui.text(lable)
@@ -36,7 +40,9 @@ class GUILibrary:
         imgui.push_style_color( imgui.COLOR_BUTTON         , *(0.80, 0.10, 0.15, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_HOVERED , *(0.90, 0.20, 0.20, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_ACTIVE  , *(0.80, 0.10, 0.15, 1.00) ) # type: ignore
-        if imgui.button("X", lineHeight+3, lineHeight): values.x = resetValues.x
+        if imgui.button("X", lineHeight+3, lineHeight):
+            values.x = resetValues.x
+            wasReset = True
         imgui.pop_style_color(3)
 
         imgui.same_line()
@@ -47,7 +53,9 @@ class GUILibrary:
         imgui.push_style_color( imgui.COLOR_BUTTON         , *(0.20, 0.70, 0.20, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_HOVERED , *(0.20, 0.80, 0.30, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_ACTIVE  , *(0.20, 0.20, 0.20, 1.00) ) # type: ignore
-        if imgui.button("Y", lineHeight+3, lineHeight): values.y = resetValues.y
+        if imgui.button("Y", lineHeight+3, lineHeight):
+            values.y = resetValues.y
+            wasReset = True
         imgui.pop_style_color(3)
 
         imgui.same_line()
@@ -58,7 +66,9 @@ class GUILibrary:
         imgui.push_style_color( imgui.COLOR_BUTTON         , *(0.10, 0.25, 0.80, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_HOVERED , *(0.20, 0.35, 0.90, 1.00) ) # type: ignore
         imgui.push_style_color( imgui.COLOR_BUTTON_ACTIVE  , *(0.10, 0.25, 0.80, 1.00) ) # type: ignore
-        if imgui.button("Z", lineHeight+3, lineHeight): values.z = resetValues.z
+        if imgui.button("Z", lineHeight+3, lineHeight):
+            values.z = resetValues.z
+            wasReset = True
         imgui.pop_style_color(3)
 
         imgui.same_line()
@@ -69,4 +79,4 @@ class GUILibrary:
         imgui.columns(1)
         imgui.pop_id()
 
-        return (xHasChanged or yHasChanged or zHasChanged), pyrr.Vector3([ newX, newY, newZ ])
+        return (wasReset or xHasChanged or yHasChanged or zHasChanged), pyrr.Vector3([ newX, newY, newZ ])
@@ -1,7 +1,7 @@
-from ..Utility import perf_counter_ns, TimeConverter, TextIO, DataClass
+from ..Utility import perf_counter_ns, TimeConverter, TextIO, DataClass, Dict
 
 from multiprocessing import current_process
-from threading import current_thread
+from threading import current_thread, Lock
 from json import dump as JSONDump
 
 @DataClass
@@ -20,10 +20,16 @@ class Instrumentor:
     __CurrentSession: str
     __OutputStream: TextIO
     __ProfileCount: int
+    # Timers can be stopped from worker threads (e.g. by the SystemScheduler)
+    __Lock: Lock
 
     def __init__(self) -> None:
         self.__CurrentSession = ""
         self.__ProfileCount = 0
+        self.__Lock = Lock()
+
+    @property
+    def IsSessionActive(self) -> bool: return self.__CurrentSession != ""
 
     def BeginSession(self, name: str) -> None:
         self.__CurrentSession = name
@@ -44,23 +50,52 @@ class Instrumentor:
         self.__OutputStream.flush()
     
     def WriteProfile(self, result: ProfileResult) -> None:
-        if (self.__ProfileCount > 0): self.__OutputStream.write(", ")
-        self.__ProfileCount += 1
+        with self.__Lock:
+            if not self.IsSessionActive: return
+            if (self.__ProfileCount > 0): self.__OutputStream.write(", ")
+            self.__ProfileCount += 1
+
+            JSONDump(
+                {
+                    "name" : result.Name,
+                    "cat"  : "Function",
+                    "ph"   : "X",
+                    "pid"  : result.PID,
+                    "tid"  : result.TID,
+                    "dur"  : result.End - result.Start,
+                    "ts"   : result.Start
+                },
+                self.__OutputStream
+            )
 
-        JSONDump(
-            {
-                "name" : result.Name,
-                "cat"  : "Function",
-                "ph"   : "X",
-                "pid"  : result.PID,
-                "tid"  : result.TID,
-                "dur"  : result.End - result.Start,
-                "ts"   : result.Start
-            },
-            self.__OutputStream
-        )
+    # A counter track in the trace viewer, with one line per entry of `values`
+    def WriteCounter(self, name: str, values: Dict[str, float]) -> None:
+        with self.__Lock:
+            if not self.IsSessionActive: return
+            if (self.__ProfileCount > 0): self.__OutputStream.write(", ")
+            self.__ProfileCount += 1
+
+            JSONDump(
+                {
+                    "name" : name,
+                    "cat"  : "Counter",
+                    "ph"   : "C",
+                    "pid"  : current_process().pid,
+                    "ts"   : TimeConverter.Convert(
+                        perf_counter_ns(),
+                        TimeConverter.Unit.NenoSecond,
+                        TimeConverter.Unit.MicroSecond
+                    ),
+                    "args" : values
+                },
+                self.__OutputStream
+            )
 
     def WriteEvent(self, event) -> None:
+        with self.__Lock: self.__WriteEvent(event)
+
+    def __WriteEvent(self, event) -> None:
+        if not self.IsSessionActive: return
         if (self.__ProfileCount > 0): self.__OutputStream.write(", ")
         self.__ProfileCount += 1
         
@@ -13,6 +13,7 @@ if not AZ_INSTRUMENTATION:
         def BeginSession(self, name: str) -> None: pass
         def EndSession(self) -> None: pass
         def WriteEvent(self, event) -> None: pass
+        def WriteCounter(self, name: str, values: dict) -> None: pass
 
     class InstrumentationTimer:
         def __init__(self, name: str, instrumentor: Instrumentor) -> None: pass
@@ -1,18 +1,34 @@
 from ..Logging import CoreLogger, ClientLoggers
-from ..Utility import Path, List, UUID
+from ..Utility import Path, List, UUID, AtomicWrite
 from ..Core import *
 from ..Scene import *
+from ..Assets import MeshCache, Model, LoadModel
+from .SceneHandle import SceneHandle
 
+from collections import OrderedDict
 import yaml
 
 class Project:
     __Name: str
     __WorkingDirectory: Path
 
-    __SceneRegistry: Dict[UUID, Scene]
+    __SceneRegistry: Dict[UUID, SceneHandle]
     __SceneOrder: List[UUID]
 
-    def __init__(self, workingDir: Path, name: str="",  makeIfNotExist: bool=True) -> None:
+    # Loaded scenes, least recently used first, at most __MaxLoadedScenes of them (None for no limit)
+    __LoadedScenes: OrderedDict[UUID, None]
+    __MaxLoadedScenes: int | None
+
+    # Contents of the .AzProj file when it was last written or read, it is only rewritten if they differ
+    __SavedProjectData: Dict | None
+
+    # Imported models, see LoadModel
+    __MeshCache: MeshCache
+
+    # Scenes are loaded on first use, `maxLoadedScenes` bounds how many are kept in memory (see GetScene)
+    def __init__(
+        self, workingDir: Path, name: str="",  makeIfNotExist: bool=True, maxLoadedScenes: int | None=None
+    ) -> None:
         doNotLoad: bool = False
 
         if not workingDir.exists():
@@ -30,6 +46,10 @@ class Project:
         self.__WorkingDirectory = workingDir
         self.__SceneOrder = []
         self.__SceneRegistry = {}
+        self.__LoadedScenes = OrderedDict()
+        self.__MaxLoadedScenes = maxLoadedScenes
+        self.__SavedProjectData = None
+        self.__MeshCache = MeshCache(self.CacheLocation / "Meshes")
 
         ClientLoggers.Info("Opened project at {}", workingDir.resolve())
 
@@ -46,6 +66,12 @@ class Project:
     def ScriptsLocation(self) -> Path: return (self.AssetsLocation / "Scripts")
     @property
     def BuildLocation(self) -> Path: return (self.__WorkingDirectory / "Builds")
+    # Generated from the assets, it can be deleted at any time
+    @property
+    def CacheLocation(self) -> Path: return (self.__WorkingDirectory / "Cache")
+
+    @property
+    def MeshCache(self) -> MeshCache: return self.__MeshCache
 
     def GetSceneLocation(self, scene: Scene) -> Path: return (self.ScenesLocation / "{}.AZ".format(scene.Name))
 
@@ -85,12 +111,18 @@ class Project:
             for uuid in data["Project"]["SceneOrder"]:
                 self.__SceneOrder.append(UUID(uuid))
 
+            # Only the handles are made here, the scenes are read by GetScene
             self.__SceneRegistry.clear()
+            self.__LoadedScenes.clear()
             for uuid, name in data["Project"]["SceneRegistry"].items():
                 path = self.ScenesLocation / "{}.AZ".format(name)
-                self.__SceneRegistry[UUID(uuid)] = SceneSerializer.Deserialize(path)
+                size = path.stat().st_size if path.exists() else 0
+                self.__SceneRegistry[UUID(uuid)] = SceneHandle(UUID(uuid), name, path, size)
 
-        if _SaveProject: self.Save()
+            self.__SavedProjectData = data
+
+        # Everything is rewritten in the current version
+        if _SaveProject: self.Save(force=True)
 
         # Confirm required directories
         self.AssetsLocation.mkdir(exist_ok=True)
@@ -98,25 +130,116 @@ class Project:
         self.ScriptsLocation.mkdir(exist_ok=True)
         self.BuildLocation.mkdir(exist_ok=True)
 
-    def Save(self) -> None:
+    # Only writes what changed since the last save: the project file if the scene list changed, and the dirty scenes
+    # (see Scene.IsDirty). `force` writes everything. Every file is replaced atomically.
+    def Save(self, force: bool=False) -> None:
         ClientLoggers.Trace("Saving project")
-        with self.ProjectFile.open('w') as projectFile:
-            data = {
-                "Project": {
-                    "Name": self.__Name,
-                    "SceneOrder": [ str(uuid) for uuid in self.__SceneOrder ],
-                    "SceneRegistry": { str(k): v.Name for k, v in self.__SceneRegistry.items() }
-                },
-                "AsuraVersion": ASURA_VERSION_STR
-            }
-            yaml.dump(data, projectFile)
-
-        for _, scene in self.__SceneRegistry.items():
-            SceneSerializer.Serialize(scene, self.GetSceneLocation(scene).absolute())
+        data = {
+            "Project": {
+                "Name": self.__Name,
+                "SceneOrder": [ str(uuid) for uuid in self.__SceneOrder ],
+                "SceneRegistry": { str(k): v.Name for k, v in self.__SceneRegistry.items() }
+            },
+            "AsuraVersion": ASURA_VERSION_STR
+        }
+
+        if force or data != self.__SavedProjectData or not self.ProjectFile.exists():
+            with AtomicWrite(self.ProjectFile) as projectFile: yaml.dump(data, projectFile)
+            self.__SavedProjectData = data
+
+        # Scenes that were never loaded have not changed, unless everything has to be rewritten
+        for handle in self.__SceneRegistry.values():
+            if not handle.IsLoaded and not force: continue
+
+            scene = handle.Loaded if handle.Loaded is not None else self.__Load(handle)
+            path = self.GetSceneLocation(scene).absolute()
+            if force or scene.IsDirty or not path.exists():
+                SceneSerializer.Serialize(scene, path)
+                scene.MarkSaved()
+
+                # The scene file now holds everything that was autosaved
+                if handle.Journal is not None: handle.Journal.Clear()
+                else: SceneJournal.PathFor(path).unlink(missing_ok=True)
+
+            handle.Location, handle.Size = path, path.stat().st_size
+
+        self.__Unload()
+
+    # Appends what changed in the loaded scenes since the last autosave (or save) to their journals,
+    # see SceneJournal. Much cheaper than Save, and the changes are recovered when the scene is next loaded.
+    def Autosave(self) -> None:
+        for uuid in self.__LoadedScenes:
+            handle = self.__SceneRegistry[uuid]
+            if handle.Loaded is None or not handle.Loaded.IsDirty: continue
+
+            if handle.Journal is None: handle.Journal = SceneJournal(handle.Loaded, self.GetSceneLocation(handle.Loaded))
+            handle.Journal.Flush()
+
+    # Loads through the project's MeshCache, so a model is only parsed the first time (until its file changes).
+    # Relative paths are in the assets directory.
+    def LoadModel(self, path: Path) -> Model:
+        return LoadModel(path if path.is_absolute() else self.AssetsLocation / path, self.__MeshCache)
 
     def RegisterScene(self, scene: Scene) -> None:
-        self.__SceneRegistry[scene.SceneUUID] = scene
+        handle = SceneHandle(scene.SceneUUID, scene.Name, self.GetSceneLocation(scene), 0, scene)
+        self.__SceneRegistry[scene.SceneUUID] = handle
         self.__SceneOrder.append(scene.SceneUUID)
 
+        self.__LoadedScenes[scene.SceneUUID] = None
+        self.__Unload()
+
+    @property
+    def SceneCount(self) -> int: return len(self.__SceneOrder)
+    @property
+    def SceneHandles(self) -> List[SceneHandle]: return [ self.__SceneRegistry[uuid] for uuid in self.__SceneOrder ]
+
+    # Reads the scene from its file the first time. When more than `maxLoadedScenes` are loaded,
+    # the least recently used ones are dropped (but never one with unsaved changes, see Scene.IsDirty, or a pinned one).
+    # A dropped scene is read again by the next GetScene, so a scene that is kept (e.g. the one being edited) must be
+    # pinned, or the changes made to it afterwards would not be seen by Save.
     def GetScene(self, index: int) -> Scene:
-        return self.__SceneRegistry[self.__SceneOrder[index]]
+        scene = self.__Load(self.__SceneRegistry[self.__SceneOrder[index]])
+        self.__Unload()
+        return scene
+
+    def PinScene(self, scene: Scene) -> None: self.__SceneRegistry[scene.SceneUUID].Pinned = True
+
+    def UnpinScene(self, scene: Scene) -> None:
+        self.__SceneRegistry[scene.SceneUUID].Pinned = False
+        self.__Unload()
+
+    # Loads every scene, for the tools that need all of them (validation, cooking, export). The scene files that are
+    # not loaded yet are parsed in parallel, see SceneSerializer.DeserializeMany. The scenes are returned in order,
+    # the project itself still keeps at most `maxLoadedScenes` of them.
+    def LoadAllScenes(self, maxWorkers: int | None=None) -> List[Scene]:
+        handles = self.SceneHandles
+        pending = [ handle for handle in handles if not handle.IsLoaded ]
+
+        scenes = SceneSerializer.DeserializeMany([ handle.Location for handle in pending ], maxWorkers)
+        for handle, scene in zip(pending, scenes): handle.Loaded = SceneJournal.Recover(scene, handle.Location)
+
+        scenes = [ self.__Load(handle) for handle in handles ]
+        self.__Unload()
+        return scenes
+
+    def __Load(self, handle: SceneHandle) -> Scene:
+        # Changes autosaved before a crash are replayed
+        if handle.Loaded is None: handle.Loaded = SceneJournal.Open(handle.Location)
+
+        self.__LoadedScenes[handle.SceneUUID] = None
+        self.__LoadedScenes.move_to_end(handle.SceneUUID)
+        return handle.Loaded
+
+    def __Unload(self) -> None:
+        limit = self.__MaxLoadedScenes
+        if limit is None: return
+
+        # The most recently used scene is always kept
+        for uuid in list(self.__LoadedScenes)[:-1]:
+            if len(self.__LoadedScenes) <= limit: break
+
+            handle = self.__SceneRegistry[uuid]
+            if handle.Pinned or (handle.Loaded is not None and handle.Loaded.IsDirty): continue
+
+            handle.Loaded, handle.Journal = None, None
+            del self.__LoadedScenes[uuid]
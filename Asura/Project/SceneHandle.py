@@ -0,0 +1,21 @@
+from ..Utility import Path, UUID, DataClass
+from ..Scene import Scene, SceneJournal
+
+# A scene registered in a Project. It is only read from its file the first time it is needed (see Project.GetScene),
+# until then it costs its name and path.
+@DataClass
+class SceneHandle:
+    SceneUUID: UUID
+    Name: str
+    Location: Path
+    # Size of the file when the project was opened, 0 for scenes not saved yet
+    Size: int = 0
+
+    Loaded: Scene | None = None
+    # Created by the first Project.Autosave while the scene is loaded
+    Journal: SceneJournal | None = None
+    # Pinned scenes stay loaded, see Project.PinScene
+    Pinned: bool = False
+
+    @property
+    def IsLoaded(self) -> bool: return self.Loaded is not None
@@ -1 +1,2 @@
 from .Project import *
+from .SceneHandle import *
@@ -4,13 +4,21 @@ from ..Scene import *
 
 from .Camera import *
 
+from ..Instrumentation import InstrumentorObj, Timer
+
 from dataclasses import dataclass
+import numpy as np
 
 @dataclass(frozen=True)
 class RenderData:
     Scene: Scene
     Camera: Camera
 
+@dataclass(frozen=True)
+class CullStats:
+    Tested: int = 0
+    Visible: int = 0
+
 class Renderer:
     __Width: int
     __Height: int
@@ -20,6 +28,10 @@ class Renderer:
     __RenderCommandList: RenderCommandList
     __RenderData: RenderData
 
+    # Entity handles and world matrices of the meshes that passed culling, for the current frame
+    __DrawList: Tuple[np.ndarray, np.ndarray]
+    __CullStats: CullStats
+
     def __init__(self, width: int, height: int) -> None:
         self.__Width = width
         self.__Height = height
@@ -41,12 +53,19 @@ class Renderer:
 
         self.__Framebuffer = Framebuffer.Create(framebufferSpecs)
 
+        self.__DrawList = (np.zeros(0, np.int64), np.zeros((0, 4, 4), np.float32))
+        self.__CullStats = CullStats()
+
         RenderCommands.INIT()
 
     @property
     def Framebuffer(self) -> SupportsFramebuffer: return self.__Framebuffer
     @property
     def Dimensions(self) -> Tuple[int, int]: return self.__Width, self.__Height
+    @property
+    def DrawList(self) -> Tuple[np.ndarray, np.ndarray]: return self.__DrawList
+    @property
+    def Stats(self) -> CullStats: return self.__CullStats
 
     def Resize(self, width: int, height: int) -> None:
         self.__RenderCommandList.AddCommand(RenderCommands.Resize, width, height)
@@ -66,7 +85,32 @@ class Renderer:
         self.__RenderCommandList.AddCommand(RenderCommands.Clear, 0.3, 0.65, 0.75)
         self.__Framebuffer.ClearAttachment(1, Math.PythonInt32ToBytes(0)) # 0 is not a valid esper ID.
 
-        # for entity in self.__RenderData.Scene.GetEntitysWithComponent():
+        self.__Cull()
+
+    # Tests the world box of every mesh against the camera frustum in a single NumPy call.
+    # The boxes are computed from the same world matrices that are drawn: the spatial index is brought up to date
+    # first (for edits made since the last OnUpdate), and with a fixed timestep its boxes, which are the ones of the
+    # last step, are recomputed from the interpolated matrices.
+    def __Cull(self) -> None:
+        cullTimer = Timer("Renderer::Cull")
+        scene, camera = self.__RenderData.Scene, self.__RenderData.Camera
+
+        index = scene.SpatialIndex
+        index.Update()
+
+        # With a fixed timestep, drawn between the last two steps
+        interpolated = scene.FixedTimestep is not None
+        matrices = scene.GetWorldMatrices(index.Entities, interpolated=interpolated)
+        mins, maxs = BVH.WorldBounds(*index.LocalBounds, matrices) if interpolated else index.PrimitiveBounds
+        visible = BVH.TestFrustum(BVH.FrustumPlanes(camera.ViewProjectionMatrix), mins, maxs)
+
+        self.__DrawList = (index.Entities[visible], matrices[visible])
+        self.__CullStats = CullStats(len(visible), len(self.__DrawList[0]))
+
+        InstrumentorObj.WriteCounter(
+            "Renderer::Culling", { "Tested": self.__CullStats.Tested, "Visible": self.__CullStats.Visible }
+        )
+        cullTimer.Stop()
 
     def EndScene(self) -> None:
         self.__RenderCommandList.Execute()
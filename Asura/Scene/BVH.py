@@ -0,0 +1,365 @@
+from ..Utility import List, Tuple, Any
+from .Components import TransformComponent, MeshComponent
+from .QueryView import QueryView
+
+import numpy as np
+
+# Bounding volume hierarchy over the entities having a MeshComponent, in world space.
+# The world bounds come from the local box of the MeshComponent (Min/Max) and the entity's world matrix.
+#
+# The tree is stored as flat arrays, children of a node are always `left` and `left + 1`, and come after it.
+# Leaves hold a contiguous range of `Order` (indices of the primitives), so a refit is just a few reductions.
+# Update keeps it in sync once per frame: it is rebuilt (binned SAH) when meshes are added or removed,
+# and only refitted when transforms change, rows are replaced or the boxes are written to through
+# Scene.GetMutableComponent, unless the refit has degraded the tree too much.
+# Queries walk the tree one level at a time, with every node of the level tested in a single NumPy call.
+class BVH:
+    LeafSize: int = 4
+    BinCount: int = 16
+    # A refit tree is rebuilt once the surface area of its root grew this much since the last build
+    RebuildThreshold: float = 2.0
+
+    __Scene: Any
+    __View: QueryView
+    __ViewVersion: int
+    # Scene.WriteVersion of MeshComponent
+    __BoundsVersion: int
+    __WorldVersion: int
+
+    # Primitives
+    __Entities: np.ndarray
+    __LocalMin: np.ndarray
+    __LocalMax: np.ndarray
+    __Min: np.ndarray
+    __Max: np.ndarray
+    __Order: np.ndarray
+
+    # Nodes
+    __NodeMin: np.ndarray
+    __NodeMax: np.ndarray
+    __Left: np.ndarray
+    __Start: np.ndarray
+    __Count: np.ndarray
+    # Internal nodes grouped by depth, the deepest first, for refitting
+    __RefitLevels: List[np.ndarray]
+    __BuiltArea: float
+
+    def __init__(self, scene) -> None:
+        self.__Scene = scene
+        self.__View = scene.Query(TransformComponent, MeshComponent)
+        self.__Entities = np.zeros(0, np.int64)
+        self.Rebuild()
+
+    @property
+    def Entities(self) -> np.ndarray: return self.__Entities
+    # World boxes of the primitives, in the order of Entities
+    @property
+    def PrimitiveBounds(self) -> Tuple[np.ndarray, np.ndarray]: return self.__Min, self.__Max
+    # Local boxes (MeshComponent Min/Max) of the primitives, in the order of Entities
+    @property
+    def LocalBounds(self) -> Tuple[np.ndarray, np.ndarray]: return self.__LocalMin, self.__LocalMax
+    @property
+    def NodeCount(self) -> int: return len(self.__Left)
+    @property
+    def Bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.NodeCount: return np.zeros(3, np.float32), np.zeros(3, np.float32)
+        return self.__NodeMin[0], self.__NodeMax[0]
+
+    # Called by the Scene after its transforms are updated
+    def Update(self) -> None:
+        if self.__View.Version != self.__ViewVersion or self.__Scene.WriteVersion(MeshComponent) != self.__BoundsVersion:
+            if self.__ReadRows(): self.Refit()
+            else: self.__Rebuild()
+        elif self.__Scene.TransformStore is None or self.__Scene.TransformStore.WorldVersion != self.__WorldVersion:
+            self.Refit()
+
+    #--------------------- Start Block: Building ---------------------
+    def Rebuild(self) -> None:
+        self.__ReadRows()
+        self.__Rebuild()
+
+    def __Rebuild(self) -> None:
+        self.__ComputeBounds()
+        self.__Build()
+
+    # Reads the entities and local boxes from the view. Returns True if the entities are the same as before
+    # (in any order), their boxes are then updated in place so that the tree only needs a refit.
+    def __ReadRows(self) -> bool:
+        rows = self.__View.ReadOnlyRows
+        count = len(rows)
+
+        entities = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        localMin = np.array([ row[2].Min for row in rows ], dtype=np.float32).reshape(count, 3)
+        localMax = np.array([ row[2].Max for row in rows ], dtype=np.float32).reshape(count, 3)
+        self.__ViewVersion = self.__View.Version
+        self.__BoundsVersion = self.__Scene.WriteVersion(MeshComponent)
+
+        # Handles are unique, so finding every new one among as many old ones means it is the same set
+        if count and count == len(self.__Entities):
+            order = np.argsort(self.__Entities)
+            positions = order[np.minimum(np.searchsorted(self.__Entities, entities, sorter=order), count - 1)]
+            if np.array_equal(self.__Entities[positions], entities):
+                self.__LocalMin[positions], self.__LocalMax[positions] = localMin, localMax
+                return True
+
+        self.__Entities, self.__LocalMin, self.__LocalMax = entities, localMin, localMax
+        return False
+
+    # Recomputes the bounds of all primitives and nodes, keeping the structure of the tree
+    def Refit(self) -> None:
+        self.__ComputeBounds()
+        if not self.NodeCount: return
+
+        self.__RefitNodes()
+        if self.__SurfaceArea(self.__NodeMin[0], self.__NodeMax[0]) > self.__BuiltArea * self.RebuildThreshold:
+            self.__Build()
+
+    def __ComputeBounds(self) -> None:
+        store = self.__Scene.TransformStore
+        self.__WorldVersion = store.WorldVersion if store is not None else 0
+
+        matrices = self.__Scene.GetWorldMatrices(self.__Entities)
+        self.__Min, self.__Max = BVH.WorldBounds(self.__LocalMin, self.__LocalMax, matrices)
+
+    # World boxes of (N,3) local boxes under (N,4,4) world matrices.
+    # Transformed box: the center is transformed, the half extents by the absolute rotation/scale part
+    @staticmethod
+    def WorldBounds(localMin: np.ndarray, localMax: np.ndarray, matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        center = (localMin + localMax) * 0.5
+        extent = (localMax - localMin) * 0.5
+        worldCenter = np.einsum("ni,nij->nj", center, matrices[:, :3, :3]) + matrices[:, 3, :3]
+        worldExtent = np.einsum("ni,nij->nj", extent, np.abs(matrices[:, :3, :3]))
+
+        return (worldCenter - worldExtent).astype(np.float32), (worldCenter + worldExtent).astype(np.float32)
+
+    # Builds the tree one level at a time, all the nodes of a level are split together (binned SAH)
+    def __Build(self) -> None:
+        count = len(self.__Entities)
+        capacity = max(2 * count - 1, 1)
+
+        self.__Order = np.arange(count, dtype=np.int64)
+        self.__NodeMin = np.zeros((capacity, 3), np.float32)
+        self.__NodeMax = np.zeros((capacity, 3), np.float32)
+        self.__Left = np.full(capacity, -1, np.int64)
+        self.__Start = np.zeros(capacity, np.int64)
+        self.__Count = np.zeros(capacity, np.int64)
+        depths = np.zeros(capacity, np.int64)
+
+        nodeCount = 1 if count else 0
+        self.__Count[0] = count
+        centroids = (self.__Min + self.__Max) * 0.5
+
+        active = np.zeros(nodeCount, np.int64)
+        while len(active):
+            starts, counts = self.__Start[active], self.__Count[active]
+            positions = self.__Ranges(starts, counts)
+            offsets = np.cumsum(counts) - counts
+            primitives = self.__Order[positions]
+
+            self.__NodeMin[active] = np.minimum.reduceat(self.__Min[primitives], offsets, axis=0)
+            self.__NodeMax[active] = np.maximum.reduceat(self.__Max[primitives], offsets, axis=0)
+
+            # Nodes small enough stay leaves
+            splitting = counts > self.LeafSize
+            if not splitting.any(): break
+
+            active, starts, counts = active[splitting], starts[splitting], counts[splitting]
+            positions = self.__Ranges(starts, counts)
+            offsets = np.cumsum(counts) - counts
+            primitives = self.__Order[positions]
+            segments = np.repeat(np.arange(len(active)), counts)
+
+            goesRight = self.__SplitNodes(primitives, centroids[primitives], segments, offsets, counts)
+
+            # Stable sort within every node: the left primitives first
+            order = np.argsort(segments * 2 + goesRight, kind="stable")
+            self.__Order[positions] = primitives[order]
+            leftCounts = counts - np.add.reduceat(goesRight.astype(np.int64), offsets)
+
+            children = nodeCount + 2 * np.arange(len(active))
+            nodeCount += 2 * len(active)
+
+            self.__Left[active] = children
+            self.__Start[children], self.__Count[children] = starts, leftCounts
+            self.__Start[children + 1], self.__Count[children + 1] = starts + leftCounts, counts - leftCounts
+            depths[children] = depths[children + 1] = depths[active] + 1
+            self.__Count[active] = 0
+
+            active = np.sort(np.concatenate((children, children + 1)))
+
+        self.__NodeMin, self.__NodeMax = self.__NodeMin[:nodeCount], self.__NodeMax[:nodeCount]
+        self.__Left, self.__Start, self.__Count = self.__Left[:nodeCount], self.__Start[:nodeCount], self.__Count[:nodeCount]
+        depths = depths[:nodeCount]
+
+        internal = np.flatnonzero(self.__Left >= 0)
+        levels = [ internal[depths[internal] == depth] for depth in range(depths.max(initial=0), -1, -1) ]
+        self.__RefitLevels = [ level for level in levels if len(level) ]
+
+        self.__BuiltArea = self.__SurfaceArea(self.__NodeMin[0], self.__NodeMax[0]) if count else 0.0
+
+    # Binned SAH for every node at once, `segments` is the node (0..k) of each primitive, that are grouped by node.
+    # Returns whether each primitive goes to the right child.
+    def __SplitNodes(
+        self, primitives: np.ndarray, centroids: np.ndarray, segments: np.ndarray, offsets: np.ndarray, counts: np.ndarray
+    ) -> np.ndarray:
+        nodeCount, binCount = len(offsets), self.BinCount
+        low = np.minimum.reduceat(centroids, offsets, axis=0)
+        extent = np.maximum.reduceat(centroids, offsets, axis=0) - low
+        with np.errstate(divide="ignore"): scale = np.where(extent > 1e-6, binCount / extent, 0.0)
+
+        bins = np.minimum(((centroids - low[segments]) * scale[segments]).astype(np.int64), binCount - 1)
+        mins, maxs = self.__Min[primitives], self.__Max[primitives]
+
+        costs = np.empty((3, nodeCount, binCount - 1))
+        for axis in range(3):
+            keys = segments * binCount + bins[:, axis]
+            binCounts = np.bincount(keys, minlength=nodeCount * binCount)
+
+            # Bounds of every (node, bin), through one sort and reduceat
+            order = np.argsort(keys, kind="stable")
+            used = np.flatnonzero(binCounts)
+            binOffsets = np.cumsum(binCounts[used]) - binCounts[used]
+            binMin = np.full((nodeCount * binCount, 3), np.inf, np.float32)
+            binMax = np.full((nodeCount * binCount, 3), -np.inf, np.float32)
+            binMin[used] = np.minimum.reduceat(mins[order], binOffsets, axis=0)
+            binMax[used] = np.maximum.reduceat(maxs[order], binOffsets, axis=0)
+            binMin, binMax = binMin.reshape(nodeCount, binCount, 3), binMax.reshape(nodeCount, binCount, 3)
+            binCounts = binCounts.reshape(nodeCount, binCount)
+
+            # Split after bin i: bins [0, i] on the left and [i + 1, binCount) on the right
+            leftMin, leftMax = np.minimum.accumulate(binMin, axis=1), np.maximum.accumulate(binMax, axis=1)
+            rightMin = np.minimum.accumulate(binMin[:, ::-1], axis=1)[:, ::-1]
+            rightMax = np.maximum.accumulate(binMax[:, ::-1], axis=1)[:, ::-1]
+            leftCounts = np.cumsum(binCounts, axis=1)[:, :-1]
+            rightCounts = counts[:, None] - leftCounts
+
+            with np.errstate(invalid="ignore"):
+                cost = self.__SurfaceAreas(leftMin[:, :-1], leftMax[:, :-1]) * leftCounts + \
+                       self.__SurfaceAreas(rightMin[:, 1:], rightMax[:, 1:]) * rightCounts
+            cost[(leftCounts == 0) | (rightCounts == 0)] = np.inf
+            costs[axis] = cost
+
+        best = costs.transpose(1, 0, 2).reshape(nodeCount, -1).argmin(axis=1)
+        bestAxis, bestBin = best // (binCount - 1), best % (binCount - 1)
+        goesRight = bins[np.arange(len(primitives)), bestAxis[segments]] > bestBin[segments]
+
+        # All the centroids of a node are at the same place, it is just cut in half
+        stuck = ~np.isfinite(costs.min(axis=(0, 2)))
+        if stuck.any():
+            ranks = np.arange(len(primitives)) - offsets[segments]
+            goesRight = np.where(stuck[segments], ranks >= counts[segments] // 2, goesRight)
+
+        return goesRight
+
+    def __RefitNodes(self) -> None:
+        leaves = np.flatnonzero(self.__Left < 0)
+        # The leaves cover Order in node order, so the primitives of every leaf are reduced in one call
+        leafOrder = leaves[np.argsort(self.__Start[leaves])]
+        ordered = self.__Order
+        self.__NodeMin[leafOrder] = np.minimum.reduceat(self.__Min[ordered], self.__Start[leafOrder], axis=0)
+        self.__NodeMax[leafOrder] = np.maximum.reduceat(self.__Max[ordered], self.__Start[leafOrder], axis=0)
+
+        for level in self.__RefitLevels:
+            children = self.__Left[level]
+            self.__NodeMin[level] = np.minimum(self.__NodeMin[children], self.__NodeMin[children + 1])
+            self.__NodeMax[level] = np.maximum(self.__NodeMax[children], self.__NodeMax[children + 1])
+
+    @staticmethod
+    def __SurfaceArea(low: np.ndarray, high: np.ndarray) -> float:
+        size = high - low
+        return float(size[0] * size[1] + size[1] * size[2] + size[2] * size[0])
+
+    @staticmethod
+    def __SurfaceAreas(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        size = high - low
+        x, y, z = size[..., 0], size[..., 1], size[..., 2]
+        return x * y + y * z + z * x
+    #--------------------------- End Block ---------------------------
+
+    #--------------------- Start Block: Queries ---------------------
+    # All queries return the entity handles of the primitives whose world box passes the test
+    def QueryAABB(self, low, high) -> np.ndarray:
+        low, high = np.asarray(low, np.float32), np.asarray(high, np.float32)
+        return self.__Traverse(lambda mins, maxs: np.all((mins <= high) & (maxs >= low), axis=1))
+
+    def QuerySphere(self, center, radius: float) -> np.ndarray:
+        center = np.asarray(center, np.float32)
+        def Test(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+            closest = np.clip(center, mins, maxs)
+            return np.einsum("ij,ij->i", closest - center, closest - center) <= radius * radius
+
+        return self.__Traverse(Test)
+
+    # `planes` is (N,4), a point p is inside a plane when dot(plane[:3], p) + plane[3] >= 0.
+    # A box is kept unless it is completely outside of one of the planes (so a few boxes near corners are kept too).
+    def QueryFrustum(self, planes) -> np.ndarray:
+        planes = np.asarray(planes, np.float32)
+        return self.__Traverse(lambda mins, maxs: BVH.TestFrustum(planes, mins, maxs))
+
+    # Same test as QueryFrustum for a flat list of (N,3) boxes, in one go. Returns the mask of the visible ones.
+    @staticmethod
+    def TestFrustum(planes: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+        normals, distances = planes[:, :3], planes[:, 3]
+        # The corner of every box that is the furthest along each plane normal
+        corners = np.where(normals[None] >= 0, maxs[:, None], mins[:, None])
+        return np.all(np.einsum("npj,pj->np", corners, normals) + distances >= 0, axis=1)
+
+    # Returns the entities hit by the ray and the distances to their boxes, sorted from the closest.
+    # `direction` does not need to be normalized, the distances are then in multiples of it.
+    def Raycast(self, origin, direction, maxDistance: float=np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        origin = np.asarray(origin, np.float32)
+        with np.errstate(divide="ignore"): inverse = 1.0 / np.asarray(direction, np.float32)
+
+        def Distances(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+            with np.errstate(invalid="ignore"):
+                first, second = (mins - origin) * inverse, (maxs - origin) * inverse
+                near, far = np.minimum(first, second), np.maximum(first, second)
+
+            # 0 * inf gives NaN for axes the ray is parallel to while starting on the slab, these never limit the hit
+            near = np.where(np.isnan(near), -np.inf, near)
+            far = np.where(np.isnan(far), np.inf, far)
+            enter, exit = np.maximum(near.max(axis=1), 0.0), far.min(axis=1)
+            return np.where((enter <= exit) & (enter <= maxDistance), enter, np.inf)
+
+        hits = self.__Traverse(lambda mins, maxs: np.isfinite(Distances(mins, maxs)), primitives=True)
+        distances = Distances(self.__Min[hits], self.__Max[hits])
+        order = np.argsort(distances, kind="stable")
+        return self.__Entities[hits[order]], distances[order]
+
+    # Walks the tree breadth first, `Test(mins, maxs) -> mask` is run on all the nodes of a level at once,
+    # and then on the primitives of the leaves that passed. Returns entities (or primitive indices).
+    def __Traverse(self, Test, primitives: bool=False) -> np.ndarray:
+        if not self.NodeCount: return np.zeros(0, np.int64)
+
+        nodes = np.zeros(1, dtype=np.int64)
+        found: List[np.ndarray] = []
+        while len(nodes):
+            nodes = nodes[Test(self.__NodeMin[nodes], self.__NodeMax[nodes])]
+            left = self.__Left[nodes]
+
+            leaves = nodes[left < 0]
+            if len(leaves):
+                candidates = self.__Order[self.__Ranges(self.__Start[leaves], self.__Count[leaves])]
+                found.append(candidates[Test(self.__Min[candidates], self.__Max[candidates])])
+
+            left = left[left >= 0]
+            nodes = np.concatenate((left, left + 1))
+
+        result = np.concatenate(found) if found else np.zeros(0, np.int64)
+        return result if primitives else self.__Entities[result]
+
+    # Concatenation of the ranges [start, start + count)
+    @staticmethod
+    def __Ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(counts.sum())
+
+    # Frustum planes (left, right, bottom, top, near, far) of a view projection matrix, in the format of QueryFrustum.
+    # The matrix is in pyrr's row vector convention (clip = point @ viewProjection), with OpenGL's [-w, w] depth.
+    @staticmethod
+    def FrustumPlanes(viewProjection) -> np.ndarray:
+        matrix = np.asarray(viewProjection, np.float32)
+        x, y, z, w = matrix[:, 0], matrix[:, 1], matrix[:, 2], matrix[:, 3]
+        planes = np.array([ w + x, w - x, w + y, w - y, w + z, w - z ], dtype=np.float32)
+        return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    #--------------------------- End Block ---------------------------
@@ -0,0 +1,208 @@
+from ..Utility import DataClass, List, Dict, Tuple, Any, Callable
+
+import keyword
+import linecache
+import numpy as np
+import pyrr
+
+# A serialized field of a component: its name in the scene files, its type (see ComponentField.Types) and where it
+# lives on the component. `Attribute` is a dotted path from the component (the name by default), `Get`/`Set` are
+# for the fields that are not plain attributes.
+@DataClass(frozen=True)
+class ComponentField:
+    Name: str
+    Type: str
+
+    Attribute: str | None = None
+    Get: Callable[[Any], Any] | None = None
+    Set: Callable[[Any, Any], None] | None = None
+
+    # Type -> dtype and shape of the column (str columns are lists), and the conversion for YAML
+    Types = {
+        "bool" : ( np.dtype("?")   , ()   , "bool"         ),
+        "i32"  : ( np.dtype("<i4") , ()   , "int"          ),
+        "f32"  : ( np.dtype("<f4") , ()   , "float"        ),
+        "vec3" : ( np.dtype("<f4") , (3,) , "_Vector3"     ),
+        "str"  : ( None            , ()   , "str"          ),
+    }
+
+# The fields of a component type, declared once (see ComponentSchemas.Register). The encoders and decoders are
+# generated from them, in the YAML (a dict per component) and the column (an array per field) forms:
+#     Encode(components) -> { field: column }             Decode(columns, count) -> components
+#     ToYAML(component) -> { field: value }               FromYAML(data) -> component
+#     ColumnsFromYAML(dicts) -> { field: column }
+class ComponentSchema:
+    __Name: str
+    __Type: type
+    __Fields: Tuple[ComponentField, ...]
+    __Factory: Callable[[], Any]
+
+    Encode: Callable[[List[Any]], Dict[str, Any]]
+    Decode: Callable[[Dict[str, Any], int], List[Any]]
+    ToYAML: Callable[[Any], Dict[str, Any]]
+    FromYAML: Callable[[Dict[str, Any]], Any]
+    ColumnsFromYAML: Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+
+    def __init__(self, name: str, componentType: type, fields: List[ComponentField], factory: Callable[[], Any]) -> None:
+        self.__Name = name
+        self.__Type = componentType
+        self.__Fields = tuple(fields)
+        self.__Factory = factory
+        self.__Compile()
+
+    @property
+    def Name(self) -> str: return self.__Name
+    @property
+    def Type(self) -> type: return self.__Type
+    @property
+    def Fields(self) -> Tuple[ComponentField, ...]: return self.__Fields
+
+    def __Compile(self) -> None:
+        scope: Dict[str, Any] = { "_np": np, "_Vector3": pyrr.Vector3, "_Factory": self.__Factory }
+        gets: List[str] = []
+        sets: List[Callable[[str, str], str]] = []
+
+        for i, field in enumerate(self.__Fields):
+            dtype, _, _ = ComponentField.Types[field.Type]
+            scope["_dtype{}".format(i)] = dtype
+
+            if field.Get is not None:
+                scope["_get{}".format(i)] = field.Get
+                gets.append("_get{}(c)".format(i))
+            else: gets.append("c.{}".format(field.Attribute or field.Name))
+
+            if field.Set is not None:
+                scope["_set{}".format(i)] = field.Set
+                sets.append(lambda target, value, i=i: "_set{}({}, {})".format(i, target, value))
+            else:
+                attribute = field.Attribute or field.Name
+                sets.append(lambda target, value, attribute=attribute: "{}.{} = {}".format(target, attribute, value))
+
+        def Convert(i: int, value: str) -> str: return "{}({})".format(ComponentField.Types[self.__Fields[i].Type][2], value)
+
+        def Column(i: int, values: str) -> str:
+            field = self.__Fields[i]
+            if field.Type == "str": return "[ str(v) for v in {} ]".format(values)
+            _, shape, _ = ComponentField.Types[field.Type]
+            return "_np.array({}, _dtype{}).reshape(-1, *{})".format(values, i, shape) if shape else \
+                   "_np.array({}, _dtype{})".format(values, i)
+
+        names = [ field.Name for field in self.__Fields ]
+        lines: List[str] = []
+
+        lines.append("def Encode(components):")
+        lines.append("    return {")
+        for i, name in enumerate(names): lines.append("        {!r}: {},".format(name, Column(i, "[ {} for c in components ]".format(gets[i]))))
+        lines.append("    }")
+
+        lines.append("def Decode(columns, count):")
+        for i, name in enumerate(names):
+            # str columns are lists already
+            column = "list(columns[{!r}])" if self.__Fields[i].Type == "str" else "columns[{!r}].tolist()"
+            lines.append("    f{0} = {2} if {1!r} in columns else None".format(i, name, column.format(name)))
+        lines.append("    components = []")
+        lines.append("    for i in range(count):")
+        lines.append("        c = _Factory()")
+        for i in range(len(names)):
+            lines.append("        if f{0} is not None: {1}".format(i, sets[i]("c", Convert(i, "f{}[i]".format(i)))))
+        lines.append("        components.append(c)")
+        lines.append("    return components")
+
+        lines.append("def ToYAML(c):")
+        lines.append("    return { " + ", ".join("{!r}: {}".format(name, Convert(i, gets[i])) for i, name in enumerate(names)) + " }")
+
+        lines.append("def FromYAML(data):")
+        lines.append("    c = _Factory()")
+        for i, name in enumerate(names):
+            lines.append("    if {0!r} in data: {1}".format(name, sets[i]("c", Convert(i, "data[{!r}]".format(name)))))
+        lines.append("    return c")
+
+        # Fields missing from a dict get the value of a new component
+        lines.append("def ColumnsFromYAML(dicts, defaults):")
+        lines.append("    return {")
+        for i, name in enumerate(names):
+            lines.append("        {0!r}: {1},".format(name, Column(i, "[ d.get({0!r}, defaults[{0!r}]) for d in dicts ]".format(name))))
+        lines.append("    }")
+
+        # Registered with linecache, so that tracebacks show the generated lines
+        source = "\n".join(lines) + "\n"
+        filename = "<ComponentSchema {}>".format(self.__Name)
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        exec(compile(source, filename, "exec"), scope)
+        defaults = scope["ToYAML"](self.__Factory())
+
+        self.Encode = scope["Encode"]
+        self.Decode = scope["Decode"]
+        self.ToYAML = scope["ToYAML"]
+        self.FromYAML = scope["FromYAML"]
+        self.ColumnsFromYAML = lambda dicts: scope["ColumnsFromYAML"](dicts, defaults)
+
+# Component types that scenes can save and load, by type and by their name in the scene files
+class ComponentSchemas:
+    __ByType: Dict[type, ComponentSchema] = {}
+    __ByName: Dict[str, ComponentSchema] = {}
+
+    # Schema names end up in the AZB block names ("S:<name>", 16 bytes)
+    MaxNameLength: int = 14
+
+    # `factory` makes a component to decode into, the type is called without arguments by default.
+    # Raises ValueError for a name longer than MaxNameLength (in UTF-8), and for fields whose name or attribute path
+    # are not identifiers (the codecs are generated from them) or whose type is not one of ComponentField.Types.
+    @staticmethod
+    def Register(
+        componentType: type, name: str, fields: List[ComponentField], factory: Callable[[], Any] | None=None
+    ) -> ComponentSchema:
+        if len(name.encode("utf-8")) > ComponentSchemas.MaxNameLength:
+            raise ValueError("Component schema name {} is longer than {} bytes".format(name, ComponentSchemas.MaxNameLength))
+
+        def IsIdentifier(path: str) -> bool:
+            return all(part.isidentifier() and not keyword.iskeyword(part) for part in path.split("."))
+
+        names = set()
+        for field in fields:
+            if not IsIdentifier(field.Name) or "." in field.Name:
+                raise ValueError("Field name {!r} of {} is not an identifier".format(field.Name, name))
+            if field.Name in names: raise ValueError("Field {} of {} is declared twice".format(field.Name, name))
+            if field.Type not in ComponentField.Types:
+                raise ValueError("Field {} of {} has an unknown type {!r}".format(field.Name, name, field.Type))
+            if (field.Get is None or field.Set is None) and not IsIdentifier(field.Attribute or field.Name):
+                raise ValueError("Attribute {!r} of {} is not a dotted path".format(field.Attribute, name))
+            names.add(field.Name)
+
+        schema = ComponentSchema(name, componentType, fields, factory or componentType)
+        ComponentSchemas.__ByType[componentType] = schema
+        ComponentSchemas.__ByName[name] = schema
+        return schema
+
+    @staticmethod
+    def Get(componentType: type) -> ComponentSchema | None: return ComponentSchemas.__ByType.get(componentType)
+    @staticmethod
+    def GetByName(name: str) -> ComponentSchema | None: return ComponentSchemas.__ByName.get(name)
+    @staticmethod
+    def All() -> List[ComponentSchema]: return list(ComponentSchemas.__ByType.values())
+
+# Components of a single type in column form: the entities they belong to (as indices into SceneColumns), and a column
+# per field. Columns are NumPy arrays, (N,) or (N,3) for vectors, and lists for strings.
+@DataClass
+class ComponentColumns:
+    Indices: np.ndarray
+    Fields: Dict[str, Any]
+
+    # The ComponentField type of a column
+    def FieldType(self, name: str) -> str:
+        column = self.Fields[name]
+        if isinstance(column, list): return "str"
+        if column.ndim == 2: return "vec3"
+        if column.dtype == np.bool_: return "bool"
+        return "i32" if np.issubdtype(column.dtype, np.integer) else "f32"
+
+    # The columns as one dict per component, for YAML
+    def ToYAML(self) -> List[Dict[str, Any]]:
+        values: List[List[Any]] = []
+        for column in self.Fields.values():
+            if isinstance(column, list): values.append(column)
+            elif column.ndim == 2: values.append([ pyrr.Vector3(row) for row in column ])
+            else: values.append(column.tolist())
+
+        names = list(self.Fields)
+        return [ dict(zip(names, row)) for row in zip(*values) ] if values else [ {} for _ in self.Indices ]
@@ -1,8 +1,11 @@
 from ..Utility import UUID, Dict
 from ..Logging import ClientLoggers
 from .SceneCamera import SceneCamera, ProjectionTypes
+from .TransformStore import TransformStore
+from .ComponentSchema import ComponentField, ComponentSchemas
 
 from typing import TypeVar
+import numpy as np
 import pyrr
 
 # They are applied to all Entities
@@ -31,27 +34,130 @@ class TagComponent:
     
     def Serialize(self) -> Dict: return {"Tag": self.Tag}
 class TransformComponent:
-    Translation : pyrr.Vector3
-    Rotation    : pyrr.Vector3
-    Scale       : pyrr.Vector3
+    # The values live in a TransformStore, this component is just a view (store + index) into it.
+    # A component not attached to any Scene keeps its values in a small array until it is attached (see _Attach).
+    __Store: TransformStore | None
+    __Index: int
+    # Translation, rotation and scale rows, only while there is no store
+    __Values: np.ndarray | None
+    __Version: int
 
-    def __init__(self) -> None: self.Reset()
+    def __init__(
+        self, translation: float | np.ndarray=0.0, rotation: float | np.ndarray=0.0, scale: float | np.ndarray=1.0
+    ) -> None:
+        self.__Store, self.__Index = None, -1
+        self.__Values = np.empty((3, 3), np.float32)
+        self.__Values[0], self.__Values[1], self.__Values[2] = translation, rotation, scale
+        self.__Version = 0
 
+    # A component for a slot that is about to be filled by TransformStore.Add/AddMany, skips the values array
+    @classmethod
+    def _ForSlot(cls, store: TransformStore, index: int) -> "TransformComponent":
+        component = cls.__new__(cls)
+        component.__Values, component.__Version = None, 0
+        component._Bind(store, index)
+        return component
+
+    # None until the component is added to an entity of a Scene with a TransformStore
+    @property
+    def Store(self) -> TransformStore | None: return self.__Store
+    @property
+    def Index(self) -> int: return self.__Index
+
+    # The vectors are copies, assign them back to change the transform (`t.Translation += delta` works)
+    @property
+    def Translation(self) -> pyrr.Vector3: return self.__Get(0)
+    @Translation.setter
+    def Translation(self, translation: pyrr.Vector3) -> None: self.__Set(translation=translation)
+
+    @property
+    def Rotation(self) -> pyrr.Vector3: return self.__Get(1)
+    @Rotation.setter
+    def Rotation(self, rotation: pyrr.Vector3) -> None: self.__Set(rotation=rotation)
+
+    @property
+    def Scale(self) -> pyrr.Vector3: return self.__Get(2)
+    @Scale.setter
+    def Scale(self, scale: pyrr.Vector3) -> None: self.__Set(scale=scale)
+
+    # Without a store there is no cached matrix, so nothing is ever dirty
+    @property
+    def IsDirty(self) -> bool: return self.__Store is not None and bool(self.__Store.Dirty[self.__Index])
+    @property
+    def Version(self) -> int:
+        return self.__Version if self.__Store is None else int(self.__Store.Versions[self.__Index])
+
+    # The matrix is a read-only view, use the setters so that the cached matrix is invalidated
     @property
     def Transform(self) -> pyrr.Matrix44:
-        rotX = pyrr.matrix44.create_from_x_rotation(self.Rotation.x)
-        rotY = pyrr.matrix44.create_from_y_rotation(self.Rotation.y)
-        rotZ = pyrr.matrix44.create_from_z_rotation(self.Rotation.z)
+        if self.__Store is None: return self.__Compose()
+
+        matrix = self.__Store._Matrix(self.__Index).view(pyrr.Matrix44)
+        matrix.flags.writeable = False
+        return matrix
+
+    # Includes the transforms of all the parents, only when the component is attached to a Scene's TransformStore.
+    # Otherwise use Scene.GetWorldTransform.
+    @property
+    def WorldTransform(self) -> pyrr.Matrix44:
+        if self.__Store is None: return self.__Compose()
+
+        matrix = self.__Store._WorldMatrix(self.__Index).view(pyrr.Matrix44)
+        matrix.flags.writeable = False
+        return matrix
+
+    def __Get(self, row: int) -> pyrr.Vector3:
+        if self.__Store is None: values = self.__Values[row] # type: ignore
+        else: values = (self.__Store._Translation, self.__Store._Rotation, self.__Store._Scale)[row](self.__Index)
+        return values.copy().view(pyrr.Vector3)
 
-        rotation = rotX @ rotY @ rotZ
+    def __Set(
+        self, translation: float | np.ndarray | None=None, rotation: float | np.ndarray | None=None,
+        scale: float | np.ndarray | None=None
+    ) -> None:
+        if self.__Store is not None:
+            self.__Store._Set(self.__Index, translation, rotation, scale)
+            return
 
-        location = pyrr.matrix44.create_from_translation(self.Translation)
-        scale = pyrr.matrix44.create_from_scale(self.Scale)
+        for row, value in enumerate((translation, rotation, scale)):
+            if value is not None: self.__Values[row] = value # type: ignore
+        self.__Version += 1
 
-        return scale @ rotation @ location # type: ignore
+    def __Compose(self) -> pyrr.Matrix44:
+        values = self.__Values
+        matrix = TransformStore.ComposeMatrices(values[0:1], values[1:2], values[2:3])[0] # type: ignore
+        return matrix.view(pyrr.Matrix44)
 
     def __pyrr_Matrix44__(self) -> pyrr.Matrix44: return self.Transform
 
+    # Only to be used by TransformStore, when it moves this component to another slot.
+    def _Bind(self, store: TransformStore, index: int) -> None:
+        self.__Store = store
+        self.__Index = index
+
+    # Moves the values into `store`, it is called by the Scene when the component is added to an entity.
+    def _Attach(self, store: TransformStore, entity: int) -> None:
+        if store is self.__Store: return
+
+        oldStore, oldIndex = self.__Store, self.__Index
+        if oldStore is None: values = self.__Values
+        else: values = oldStore._Translation(oldIndex), oldStore._Rotation(oldIndex), oldStore._Scale(oldIndex)
+
+        index = store.Add(self, entity, *values) # type: ignore
+        if oldStore is not None: oldStore.Remove(oldIndex)
+        self._Bind(store, index)
+        self.__Values = None
+
+    # Takes the values out of the store, so that the slot in the Scene can be reused.
+    def _Detach(self) -> None:
+        store, index = self.__Store, self.__Index
+        if store is None: return
+
+        self.__Values = np.array([ store._Translation(index), store._Rotation(index), store._Scale(index) ], np.float32)
+        self.__Version = int(store.Versions[index])
+        store.Remove(index)
+        self.__Store, self.__Index = None, -1
+
     def SetTranslation(self, pos: pyrr.Vector3) -> None: self.Translation = pos
     def Translate(self, delta: pyrr.Vector3) -> None: self.Translation = self.Translation + delta
     def SetRotation(self, rotation: pyrr.Vector3) -> None: self.Rotation = rotation
@@ -59,19 +165,9 @@ class TransformComponent:
     def Rotate(self, delta: pyrr.Vector3) -> None: self.Rotation = self.Rotation + delta
     def SetScale(self, scale: pyrr.Vector3) -> None: self.Scale = scale
 
-    def Reset(self) -> None:
-        self.Translation = pyrr.Vector3([ 0.0, 0.0, 0.0 ])
-        self.Rotation    = pyrr.Vector3([ 0.0, 0.0, 0.0 ])
-        self.Scale       = pyrr.Vector3([ 1.0, 1.0, 1.0 ])
-
-    def Copy(self):
-        component = TransformComponent()
+    def Reset(self) -> None: self.__Set(0.0, 0.0, 1.0)
 
-        component.Translation = self.Translation .copy()
-        component.Rotation    = self.Rotation    .copy()
-        component.Scale       = self.Scale       .copy()
-
-        return component
+    def Copy(self): return TransformComponent(self.Translation, self.Rotation, self.Scale)
     
     def Serialize(self) -> Dict[str, Dict[str, pyrr.Vector3]]:
         return {"Transform": {
@@ -81,9 +177,23 @@ class TransformComponent:
         }}
     
     def Deserialize(self, data: Dict[str, pyrr.Vector3]) -> None:
-        self.Translation = data["Translation"]
-        self.Rotation    = data["Rotation"]
-        self.Scale       = data["Scale"]
+        self.__Set(data["Translation"], data["Rotation"], data["Scale"])
+
+# The links are entity handles (0 is not a valid esper ID, so it means none).
+# They are maintained by the Scene, use Scene.SetParent instead of modifying them.
+class RelationshipComponent:
+    Parent: int
+    FirstChild: int
+    NextSibling: int
+
+    def __init__(self) -> None:
+        self.Parent = 0
+        self.FirstChild = 0
+        self.NextSibling = 0
+
+    def Copy(self):
+        ClientLoggers.Critical("Trying to copy RelationshipComponent! Use Scene.DuplicateEntity instead")
+        return None
 
 # They are only applied to secective Entities
 class CameraComponent:
@@ -114,15 +224,38 @@ class CameraComponent:
     def Deserialize(self, data: Dict[str, Dict[str, int]]) -> None:
         cameraDict = data["Camera"]
         self.Camera.SetProjectionType(ProjectionTypes(cameraDict["ProjectionType"]))
-        self.Primary = bool(data["Primary"])
-        self.FixedAspectRatio = bool(data["FixedAspectRatio"])
+        self.Primary = bool(cameraDict["Primary"])
+        self.FixedAspectRatio = bool(cameraDict["FixedAspectRatio"])
 class MeshComponent:
+    # Local space bounding box of the mesh, used by the scene's BVH (write to it through GetMutableComponent)
+    Min: pyrr.Vector3
+    Max: pyrr.Vector3
+
+    def __init__(self, min: pyrr.Vector3 | None=None, max: pyrr.Vector3 | None=None) -> None:
+        self.Min = pyrr.Vector3([ -0.5, -0.5, -0.5 ]) if min is None else pyrr.Vector3(min)
+        self.Max = pyrr.Vector3([  0.5,  0.5,  0.5 ]) if max is None else pyrr.Vector3(max)
+
     def Copy(self):
-        component = MeshComponent()
+        component = MeshComponent(self.Min.copy(), self.Max.copy())
         return component
 
+# IDComponent, TagComponent, TransformComponent and RelationshipComponent have columns of their own in the scene files
+ComponentSchemas.Register(CameraComponent, "Camera", [
+    ComponentField("ProjectionType", "i32",
+        Get=lambda component: component.Camera.ProjectionType.value,
+        Set=lambda component, value: component.Camera.SetProjectionType(ProjectionTypes(value))
+    ),
+    ComponentField("Primary", "bool"),
+    ComponentField("FixedAspectRatio", "bool"),
+], lambda: CameraComponent(SceneCamera()))
+
+ComponentSchemas.Register(MeshComponent, "Mesh", [
+    ComponentField("Min", "vec3"),
+    ComponentField("Max", "vec3"),
+])
+
 # CTV = ComponentTypeVar
 CTV = TypeVar("CTV",
-        IDComponent, TagComponent, TransformComponent,
+        IDComponent, TagComponent, TransformComponent, RelationshipComponent,
         CameraComponent, MeshComponent
     )    
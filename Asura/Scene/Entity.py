@@ -5,7 +5,7 @@ from typing import Type    as _Type
 
 from ..Logging import ClientLoggers
 from .SupportsScene import SupportsScene
-from .Components import IDComponent, TagComponent, TransformComponent
+from .Components import IDComponent, TagComponent, TransformComponent, RelationshipComponent
 
 _C = _TypeVar("_C")
 
@@ -23,13 +23,18 @@ class Entity:
     # This is just for deffered deletion/duplication
     def __hash__(self) -> int: return self.__EntityHandle
 
+    # Only for EntityView
+    def _Rebind(self, entityHandle: int) -> None: self.__EntityHandle = entityHandle
+
     @property
     def Scene(self) -> SupportsScene: return self.__Scene
     @property
     def EntityHandle(self) -> int: return self.__EntityHandle
 
+    # While the scene has a snapshot, the components handed out are copies (see Scene.Snapshot)
     @property
     def AllComponents(self) -> Tuple[SupportsComponents, ...]:
+        self.__Scene._CopyOnWrite(self.__EntityHandle)
         return self.__Scene.EntityRegistry.components_for_entity(self.__EntityHandle)
     
     def __int__(self) -> int: return self.__EntityHandle
@@ -51,8 +56,13 @@ class Entity:
         return False
 
     def GetComponent(self, componentType: _Type[_C]) -> _C:
+        self.__Scene._CopyOnWrite(self.__EntityHandle)
         return self.__Scene.EntityRegistry.component_for_entity(self.__EntityHandle, componentType)
 
+    # Use this instead of GetComponent when writing to the component, so that the scene is marked dirty
+    def GetMutableComponent(self, componentType: _Type[_C]) -> _C:
+        return self.__Scene.GetMutableComponent(self, componentType)
+
     def AddComponent(self, componentType: _Type[_C], *args, **kwargs) -> _C:
         if self.WarnIfHasComponent(componentType): return self.GetComponent(componentType)
         
@@ -75,10 +85,19 @@ class Entity:
             )
             return
         
-        if componentType in [IDComponent, TagComponent, TransformComponent]:
+        if componentType in [IDComponent, TagComponent, TransformComponent, RelationshipComponent]:
             ClientLoggers.Warn("Trying to remove an Essential Component from an Entity.")
             return
 
         component = self.GetComponent(componentType)
         self.__Scene.EntityRegistry.remove_component(self.__EntityHandle, componentType)
         self.__Scene.OnComponentRemoved(self, component)
+
+# A flyweight Entity, it is rebound to the next handle instead of allocating a new Entity per iteration step.
+# As the handle changes, it must not be kept (in sets, dicts or as a selection), use ToEntity() for that.
+class EntityView(Entity):
+    def Rebind(self, entityHandle: int) -> "EntityView":
+        self._Rebind(entityHandle)
+        return self
+
+    def ToEntity(self) -> Entity: return Entity(self.EntityHandle, self.Scene)
@@ -0,0 +1,70 @@
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# A persistent result of Scene.Query, kept up to date by the Scene's component hooks.
+# Every row is a tuple (entityHandle, component1, component2, ...), built once when the entity starts matching,
+# so iterating over the view does not allocate anything:
+#     for handle, transform, mesh in scene.Query(TransformComponent, MeshComponent): ...
+# Like any registry iteration, structural changes while iterating must be deferred.
+# While the Scene has a snapshot, the components of the rows are copies that can be written to, see Scene.Snapshot.
+class QueryView:
+    __Types: Tuple[type, ...]
+
+    __Rows: List[Tuple[Any, ...]]
+    __Indices: Dict[int, int]
+    # Bumped on every change, so users of the view can tell when to rebuild what they derived from it
+    __Version: int
+    # Set by the Scene while it has a snapshot, run before the rows are handed out until it removes itself
+    __AccessHook: Callable[["QueryView"], None] | None
+
+    def __init__(self, types: Tuple[type, ...]) -> None:
+        self.__Types = types
+        self.__Rows = []
+        self.__Indices = {}
+        self.__Version = 0
+        self.__AccessHook = None
+
+    @property
+    def Types(self) -> Tuple[type, ...]: return self.__Types
+    @property
+    def Rows(self) -> List[Tuple[Any, ...]]:
+        self.__Access()
+        return self.__Rows
+    # The rows as they are, for reading only: these are not copied while the Scene has a snapshot
+    @property
+    def ReadOnlyRows(self) -> List[Tuple[Any, ...]]: return self.__Rows
+    @property
+    def Version(self) -> int: return self.__Version
+
+    def __len__(self) -> int: return len(self.__Rows)
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]: return iter(self.Rows)
+    def __contains__(self, entity: int) -> bool: return entity in self.__Indices
+
+    def _SetAccessHook(self, hook: Callable[["QueryView"], None] | None) -> None: self.__AccessHook = hook
+
+    def __Access(self) -> None:
+        hook = self.__AccessHook
+        if hook is not None: hook(self)
+
+    def _Add(self, entity: int, components: Tuple[Any, ...]) -> None:
+        row = (entity, *components)
+        self.__Version += 1
+
+        index = self.__Indices.get(entity)
+        if index is not None:
+            self.__Rows[index] = row
+            return
+
+        self.__Indices[entity] = len(self.__Rows)
+        self.__Rows.append(row)
+
+    # Swap-removes the row of the entity
+    def _Remove(self, entity: int) -> None:
+        index = self.__Indices.pop(entity, None)
+        if index is None: return
+        self.__Version += 1
+
+        last = self.__Rows.pop()
+        if index == len(self.__Rows): return
+
+        self.__Rows[index] = last
+        self.__Indices[last[0]] = index
@@ -0,0 +1,260 @@
+# Entity registry backends that a Scene can be built on.
+# Both follow the esper.World interface (hence the snake_case), so Entity does not care which one is used.
+from typing import Any, Collection, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, Type, TypeVar
+
+import esper
+
+_C = TypeVar("_C")
+
+# esper.World with the few extras that the Scene needs
+class EsperRegistry(esper.World):
+    # In creation order
+    def entities(self) -> Collection[int]: return self._entities.keys()
+
+    # Brings back a deleted entity with its old handle, for Scene.Restore
+    def restore_entity(self, entity: int, *components: Any) -> None:
+        self._entities[entity] = {}
+        for component in components: self.add_component(entity, component)
+
+    def get_columns(self, *component_types: Type[Any]) -> Iterator[Tuple[List[int], Tuple[List[Any], ...]]]:
+        entities, components = [], []
+        for entity, entityComponents in self.get_components(*component_types):
+            entities.append(entity)
+            components.append(entityComponents)
+
+        if entities: yield entities, tuple(list(column) for column in zip(*components))
+
+class _Archetype:
+    Signature: FrozenSet[type]
+    Types: Tuple[type, ...]
+
+    Entities: List[int]
+    Columns: Dict[type, List[Any]]
+
+    # Cached transitions to the archetype with one more / one less component type
+    AddEdges: Dict[type, "_Archetype"]
+    RemoveEdges: Dict[type, "_Archetype"]
+
+    def __init__(self, types: Tuple[type, ...]) -> None:
+        self.Signature = frozenset(types)
+        self.Types = types
+
+        self.Entities = []
+        self.Columns = { componentType: [] for componentType in types }
+
+        self.AddEdges = {}
+        self.RemoveEdges = {}
+
+    def __len__(self) -> int: return len(self.Entities)
+
+    def Append(self, entity: int, components: Dict[type, Any]) -> int:
+        self.Entities.append(entity)
+        for componentType, column in self.Columns.items(): column.append(components[componentType])
+        return len(self.Entities) - 1
+
+    # Swap-removes the row, returns the entity that was moved into it (or 0)
+    def Remove(self, row: int) -> int:
+        last = len(self.Entities) - 1
+        moved = 0
+
+        if row != last:
+            moved = self.Entities[last]
+            self.Entities[row] = moved
+            for column in self.Columns.values(): column[row] = column[last]
+
+        self.Entities.pop()
+        for column in self.Columns.values(): column.pop()
+        return moved
+
+    def Row(self, row: int) -> Dict[type, Any]:
+        return { componentType: column[row] for componentType, column in self.Columns.items() }
+
+# Groups the entities by their set of component types (archetype), every archetype keeps one column per type.
+# Queries then walk a handful of archetypes and their columns, instead of intersecting per-type entity sets.
+class ArchetypeRegistry:
+    _next_entity_id: int
+
+    __Archetypes: Dict[FrozenSet[type], _Archetype]
+    __EmptyArchetype: _Archetype
+
+    # entity -> [archetype, row], a list so that it can be updated in place
+    __Records: Dict[int, List[Any]]
+    __DeadEntities: Set[int]
+
+    __QueryCache: Dict[FrozenSet[type], List[_Archetype]]
+    # Same as esper, the lists returned by get_component(s) are kept until the next structural change
+    __ResultCache: Dict[Tuple[type, ...], List[Any]]
+
+    def __init__(self) -> None:
+        self._next_entity_id = 0
+
+        self.__EmptyArchetype = _Archetype(())
+        self.__Archetypes = { self.__EmptyArchetype.Signature: self.__EmptyArchetype }
+
+        self.__Records = {}
+        self.__DeadEntities = set()
+
+        self.__QueryCache = {}
+        self.__ResultCache = {}
+
+    @property
+    def Archetypes(self) -> List[_Archetype]: return list(self.__Archetypes.values())
+
+    def clear_cache(self) -> None: self.__ResultCache.clear()
+
+    def clear_database(self) -> None: self.__init__()
+
+    def entities(self) -> Collection[int]: return self.__Records.keys()
+
+    def create_entity(self, *components: Any) -> int:
+        self._next_entity_id += 1
+        entity = self._next_entity_id
+
+        archetype = self.__GetArchetype(tuple(dict.fromkeys(type(component) for component in components)))
+        row = archetype.Append(entity, { type(component): component for component in components })
+        self.__Records[entity] = [archetype, row]
+
+        self.__ResultCache.clear()
+        return entity
+
+    # Brings back a deleted entity with its old handle, for Scene.Restore
+    def restore_entity(self, entity: int, *components: Any) -> None:
+        archetype = self.__GetArchetype(tuple(dict.fromkeys(type(component) for component in components)))
+        row = archetype.Append(entity, { type(component): component for component in components })
+        self.__Records[entity] = [archetype, row]
+        self.__ResultCache.clear()
+
+    def delete_entity(self, entity: int, immediate: bool=False) -> None:
+        if not immediate:
+            self.__DeadEntities.add(entity)
+            return
+
+        archetype, row = self.__Records.pop(entity)
+        self.__RemoveRow(archetype, row)
+        self.__DeadEntities.discard(entity)
+        self.__ResultCache.clear()
+
+    def clear_dead_entities(self) -> None:
+        for entity in list(self.__DeadEntities): self.delete_entity(entity, immediate=True)
+
+    def entity_exists(self, entity: int) -> bool:
+        return entity in self.__Records and entity not in self.__DeadEntities
+
+    def component_for_entity(self, entity: int, component_type: Type[_C]) -> _C:
+        archetype, row = self.__Records[entity]
+        return archetype.Columns[component_type][row]
+
+    def components_for_entity(self, entity: int) -> Tuple[Any, ...]:
+        archetype, row = self.__Records[entity]
+        return tuple(archetype.Columns[componentType][row] for componentType in archetype.Types)
+
+    def has_component(self, entity: int, component_type: Type[Any]) -> bool:
+        return component_type in self.__Records[entity][0].Columns
+
+    def has_components(self, entity: int, *component_types: Type[Any]) -> bool:
+        columns = self.__Records[entity][0].Columns
+        return all(componentType in columns for componentType in component_types)
+
+    def try_component(self, entity: int, component_type: Type[_C]) -> Optional[_C]:
+        archetype, row = self.__Records[entity]
+        column = archetype.Columns.get(component_type)
+        return None if column is None else column[row]
+
+    def add_component(self, entity: int, component_instance: Any, type_alias: Optional[Type[Any]]=None) -> None:
+        componentType = type_alias or type(component_instance)
+        record = self.__Records[entity]
+        archetype, row = record
+
+        # Same signature, the component is just replaced
+        if componentType in archetype.Columns:
+            archetype.Columns[componentType][row] = component_instance
+            self.__ResultCache.clear()
+            return
+
+        target = archetype.AddEdges.get(componentType)
+        if target is None:
+            target = self.__GetArchetype(archetype.Types + (componentType,))
+            archetype.AddEdges[componentType] = target
+            target.RemoveEdges[componentType] = archetype
+
+        components = archetype.Row(row)
+        components[componentType] = component_instance
+        self.__Move(entity, record, target, components)
+
+    def remove_component(self, entity: int, component_type: Type[_C]) -> _C:
+        record = self.__Records[entity]
+        archetype, row = record
+
+        # Raises KeyError like esper, if the entity does not have the component
+        component = archetype.Columns[component_type][row]
+
+        target = archetype.RemoveEdges.get(component_type)
+        if target is None:
+            target = self.__GetArchetype(tuple(t for t in archetype.Types if t is not component_type))
+            archetype.RemoveEdges[component_type] = target
+            target.AddEdges[component_type] = archetype
+
+        self.__Move(entity, record, target, archetype.Row(row))
+        return component
+
+    # Iterates over the matching archetypes, yielding the entity list and the requested columns of each.
+    # This is the fast path, the columns are the registry's own lists and must not be modified.
+    def get_columns(self, *component_types: Type[Any]) -> Iterator[Tuple[List[int], Tuple[List[Any], ...]]]:
+        for archetype in self.__Query(component_types):
+            if not archetype.Entities: continue
+            yield archetype.Entities, tuple(archetype.Columns[componentType] for componentType in component_types)
+
+    def get_component(self, component_type: Type[_C]) -> List[Tuple[int, _C]]:
+        result = self.__ResultCache.get((component_type,))
+        if result is not None: return result
+
+        result = []
+        for entities, (column,) in self.get_columns(component_type): result.extend(zip(entities, column))
+        return self.__ResultCache.setdefault((component_type,), result)
+
+    # The key is prefixed with None, so it does not collide with the get_component one
+    def get_components(self, *component_types: Type[Any]) -> List[Tuple[int, List[Any]]]:
+        key = (None, *component_types)
+        result = self.__ResultCache.get(key) # type: ignore
+        if result is not None: return result
+
+        result = []
+        for entities, columns in self.get_columns(*component_types):
+            result.extend((entity, list(components)) for entity, components in zip(entities, zip(*columns)))
+        return self.__ResultCache.setdefault(key, result) # type: ignore
+
+    def __Query(self, component_types: Tuple[Type[Any], ...]) -> List[_Archetype]:
+        signature = frozenset(component_types)
+        archetypes = self.__QueryCache.get(signature)
+
+        if archetypes is None:
+            archetypes = [ a for a in self.__Archetypes.values() if signature <= a.Signature ]
+            self.__QueryCache[signature] = archetypes
+
+        return archetypes
+
+    def __GetArchetype(self, types: Tuple[type, ...]) -> _Archetype:
+        signature = frozenset(types)
+        archetype = self.__Archetypes.get(signature)
+        if archetype is not None: return archetype
+
+        archetype = _Archetype(types)
+        self.__Archetypes[signature] = archetype
+
+        # Cached queries stay valid, the new archetype is only appended to the ones it matches
+        for querySignature, archetypes in self.__QueryCache.items():
+            if querySignature <= signature: archetypes.append(archetype)
+
+        return archetype
+
+    def __Move(self, entity: int, record: List[Any], target: _Archetype, components: Dict[type, Any]) -> None:
+        archetype, row = record
+        self.__RemoveRow(archetype, row)
+
+        record[0] = target
+        record[1] = target.Append(entity, components)
+        self.__ResultCache.clear()
+
+    def __RemoveRow(self, archetype: _Archetype, row: int) -> None:
+        moved = archetype.Remove(row)
+        if moved: self.__Records[moved][1] = row
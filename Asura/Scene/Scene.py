@@ -1,36 +1,208 @@
-from ..Utility import UUID, UUID3Generator, UUID4Generator, MutableSet, List
-from .Entity import Entity
+from ..Utility import UUID, UUID3Generator, UUID4Generator, UUID4BulkGenerator, List, Tuple, Callable, Dict, Any
+from .Entity import Entity, EntityView
 from .Components import *
+from .TransformStore import TransformStore
+from .Registry import EsperRegistry
+from .QueryView import QueryView
+from .SceneCommandBuffer import SceneCommandBuffer
+from .SystemScheduler import System, SystemScheduler
+from .SceneSnapshot import SceneSnapshot
+from .BVH import BVH
+from .SupportsScene import SupportsEntityRegistry
+from ..Logging import ClientLoggers
 
-import esper
-from typing import Type
+from threading import RLock
+import numpy as np
+import pyrr
+from typing import Type, Iterator, Iterable, Sequence
 
 class Scene:
     __Name: str
     __UUID: UUID
 
-    __EntityRegistry: esper.World
+    __EntityRegistry: SupportsEntityRegistry
+    __TransformStore: TransformStore | None
 
-    __ToDelete: MutableSet[Entity]
-    __ToDuplicate: MutableSet[Entity]
+    __Queries: Dict[Tuple[type, ...], QueryView]
+    __QueriesByType: Dict[type, List[QueryView]]
 
-    def __init__(self, name: str) -> None:
+    # IDComponent UUID -> entity handle
+    __EntityByUUID: Dict[UUID, int]
+
+    __Commands: SceneCommandBuffer
+    __Scheduler: SystemScheduler
+
+    __Snapshot: SceneSnapshot | None
+    # Taken by the change tracking and the copy-on-write of the snapshot, which the systems go through concurrently
+    __Lock: RLock
+    __SpatialIndex: BVH
+
+    # Fixed timestep of OnUpdateRuntime in seconds (None for variable), see SetFixedTimestep
+    __FixedTimestep: float | None
+    __MaxCatchUpSteps: int
+    __Accumulator: float
+    __InterpolationAlpha: float
+    # Entity handles and world matrices from before the last fixed step, for ComputeInterpolatedWorldMatrices
+    __PreviousState: Tuple[np.ndarray, np.ndarray] | None
+    # LayoutKey of the TransformStore and the argsort of its entities, for GetWorldMatrices
+    __WorldMatrixOrder: Tuple[Tuple[int, int], np.ndarray] | None
+
+    # Bumped on every change to the scene, compared against its value at the last save (None if never saved)
+    __ChangeCount: int
+    __SavedChangeCount: int | None
+    # What changed since the last MarkSaved/_TakeChanges, for SceneJournal: the changed entities (as ordered sets),
+    # the UUIDs of the destroyed ones and the transform versions by entity (TransformStore Entities, Versions)
+    __ChangedEntities: Dict[int, None]
+    __DestroyedEntities: Dict[UUID, None]
+    __TransformVersions: Tuple[np.ndarray, np.ndarray] | None
+    # Number of _TakeChanges calls, a snapshot can only put the dirty tracking back if there was none since
+    __ChangesTaken: int
+    # See WriteVersion
+    __WriteVersions: Dict[type, int]
+
+    # registryType is the storage backend for the components: EsperRegistry or ArchetypeRegistry
+    def __init__(
+        self, name: str, useTransformStore: bool=True,
+        registryType: Callable[[], SupportsEntityRegistry]=EsperRegistry
+    ) -> None:
         self.__Name = name
         self.__UUID = UUID3Generator(name)
 
-        self.__EntityRegistry = esper.World()
+        self.__EntityRegistry = registryType()
+        self.__TransformStore = TransformStore() if useTransformStore else None
+
+        self.__Queries = {}
+        self.__QueriesByType = {}
+
+        self.__EntityByUUID = {}
+
+        self.__Commands = SceneCommandBuffer()
+        self.__Scheduler = SystemScheduler()
+
+        self.__Snapshot = None
+        self.__Lock = RLock()
 
-        self.__ToDelete = set()
-        self.__ToDuplicate = set()
+        self.__FixedTimestep = None
+        self.__MaxCatchUpSteps = 5
+        self.__Accumulator = 0.0
+        self.__InterpolationAlpha = 1.0
+        self.__PreviousState = None
+        self.__WorldMatrixOrder = None
+
+        self.__ChangeCount = 0
+        self.__SavedChangeCount = None
+        self.__ChangedEntities = {}
+        self.__DestroyedEntities = {}
+        self.__TransformVersions = None
+        self.__ChangesTaken = 0
+        self.__WriteVersions = {}
+
+        # Last, it queries the scene
+        self.__SpatialIndex = BVH(self)
 
     @property
     def Name(self) -> str: return self.__Name
     @property
     def SceneUUID(self) -> UUID: return self.__UUID
     @property
-    def EntityRegistry(self) -> esper.World: return self.__EntityRegistry
+    def EntityRegistry(self) -> SupportsEntityRegistry: return self.__EntityRegistry
+    @property
+    def TransformStore(self) -> TransformStore | None: return self.__TransformStore
+    # Structural changes recorded here are applied in the next OnUpdate
+    @property
+    def Commands(self) -> SceneCommandBuffer: return self.__Commands
+    # Kept up to date by OnUpdate
+    @property
+    def SpatialIndex(self) -> BVH: return self.__SpatialIndex
+
+    def SetUUID(self, uuid: UUID) -> None:
+        self.__UUID = uuid
+        self.MarkDirty()
+
+    #--------------------- Start Block: Dirty Tracking ---------------------
+    # Entities being created/destroyed/reparented, components being added/removed or written through
+    # GetMutableComponent, and transform writes all make the scene dirty. Without a TransformStore the transforms
+    # can not be tracked, MarkDirty has to be called after changing them.
+    @property
+    def ChangeCount(self) -> int:
+        store = self.__TransformStore
+        return self.__ChangeCount + (store.ChangeCount if store is not None else 0)
 
-    def SetUUID(self, uuid: UUID) -> None: self.__UUID = uuid
+    # True if the scene changed since MarkSaved
+    @property
+    def IsDirty(self) -> bool: return self.ChangeCount != self.__SavedChangeCount
+
+    def MarkDirty(self) -> None: self.__ChangeCount += 1
+    # Called once the scene has been written to (or read from) disk
+    def MarkSaved(self) -> None:
+        self.__SavedChangeCount = self.ChangeCount
+        self._TakeChanges()
+
+    # Returns the handles of the entities changed since the last call (or MarkSaved) that still exist,
+    # and the UUIDs of the entities that were destroyed since then.
+    def _TakeChanges(self) -> Tuple[List[int], List[UUID]]:
+        changed = self.__ChangedEntities
+        store = self.__TransformStore
+        if store is not None:
+            entities, versions = store.Entities.copy(), store.Versions.copy()
+            if self.__TransformVersions is not None and len(self.__TransformVersions[0]):
+                previousEntities, previousVersions = self.__TransformVersions
+                order = np.argsort(previousEntities)
+                slots = order[np.searchsorted(previousEntities, entities, sorter=order).clip(0, len(order) - 1)]
+
+                # The entities created since then are already in `changed`
+                modified = (previousEntities[slots] == entities) & (previousVersions[slots] != versions)
+                changed.update(dict.fromkeys(entities[modified].tolist()))
+
+            self.__TransformVersions = (entities, versions)
+
+        registry = self.__EntityRegistry
+        handles = [ handle for handle in changed if registry.entity_exists(handle) ]
+        destroyed = list(self.__DestroyedEntities)
+
+        self.__ChangedEntities = {}
+        self.__DestroyedEntities = {}
+        self.__ChangesTaken += 1
+        return handles, destroyed
+
+    def __Changed(self, handle: int) -> None:
+        with self.__Lock:
+            self.__ChangeCount += 1
+            self.__ChangedEntities[handle] = None
+    #--------------------------- End Block ---------------------------
+
+    #--------------------- Start Block: Systems ---------------------
+    # `function(scene, dt)` is run on every OnUpdateRuntime, concurrently with the systems it does not conflict with
+    # (see SystemScheduler), `reads`/`writes` are the component types that it accesses.
+    def AddSystem(
+        self, name: str, function: Callable[["Scene", float], None], reads: tuple=(), writes: tuple=()
+    ) -> System:
+        return self.__Scheduler.AddSystem(name, function, reads, writes)
+
+    def RemoveSystem(self, name: str) -> None: self.__Scheduler.RemoveSystem(name)
+
+    @property
+    def Systems(self) -> List[System]: return self.__Scheduler.Systems
+    @property
+    def Scheduler(self) -> SystemScheduler: return self.__Scheduler
+
+    # With a rate, OnUpdateRuntime accumulates the frame time and runs the simulation in steps of 1/rate seconds,
+    # at most `maxCatchUpSteps` per frame (the rest of the time is dropped, so a slow frame can not snowball).
+    # The renderer then uses ComputeInterpolatedWorldMatrices to draw between the last two steps.
+    # None goes back to one variable step per frame.
+    def SetFixedTimestep(self, rate: float | None, maxCatchUpSteps: int=5) -> None:
+        self.__FixedTimestep = None if rate is None else 1.0 / rate
+        self.__MaxCatchUpSteps = max(1, maxCatchUpSteps)
+        self.__Accumulator = 0.0
+        self.__InterpolationAlpha = 1.0
+        self.__PreviousState = None
+
+    @property
+    def FixedTimestep(self) -> float | None: return self.__FixedTimestep
+    # How far the rendered frame is between the previous and the current simulation step, in [0, 1)
+    @property
+    def InterpolationAlpha(self) -> float: return self.__InterpolationAlpha
+    #--------------------------- End Block ---------------------------
 
     def CreateEntity(self, name: str) -> Entity:
         return self.CreateEntityWithUUID(name, UUID4Generator())
@@ -39,46 +211,510 @@ class Scene:
         entity = Entity(self.EntityRegistry.create_entity(), self)
         entity.AddComponent(IDComponent, uuid)
         entity.AddComponent(TagComponent, name)
-        entity.AddComponent(TransformComponent)
+
+        # Straight into a slot of the store, as in CreateEntities
+        store = self.__TransformStore
+        if store is None: entity.AddComponent(TransformComponent)
+        else:
+            transform = TransformComponent._ForSlot(store, store.Count)
+            store.Add(transform, entity.EntityHandle, 0.0, 0.0, 1.0)
+            entity.AddComponentInstance(transform)
+
+        self.__EntityByUUID[uuid] = entity.EntityHandle
+        self.__Changed(entity.EntityHandle)
         return entity
     
+    # Creates `count` entities with the default components in one pass and returns their handles.
+    # `names`/`uuids` are either one per entity or left out, the transform values are (count,3) arrays or a single
+    # vector for all of them. The components are given to the registry directly, skipping the per-component hooks.
+    def CreateEntities(
+        self, count: int, names: str | Sequence[str]="Entity", uuids: Sequence[UUID] | None=None,
+        translations: float | np.ndarray=0.0, rotations: float | np.ndarray=0.0, scales: float | np.ndarray=1.0
+    ) -> np.ndarray:
+        if isinstance(names, str): names = [ names ] * count
+        if uuids is None: uuids = UUID4BulkGenerator(count)
+
+        if len(names) != count or len(uuids) != count:
+            ClientLoggers.Error("CreateEntities expects {} names and UUIDs".format(count))
+            return np.empty(0, dtype=np.int64)
+
+        store = self.__TransformStore
+        if store is not None:
+            start = store.Count
+            transforms = [ TransformComponent._ForSlot(store, start + i) for i in range(count) ]
+        else:
+            values = np.broadcast_to(translations, (count, 3)), np.broadcast_to(rotations, (count, 3)), \
+                     np.broadcast_to(scales, (count, 3))
+            transforms = [ TransformComponent(t, r, s) for t, r, s in zip(*values) ]
+
+        createEntity = self.__EntityRegistry.create_entity
+        handles = np.fromiter(
+            (createEntity(IDComponent(uuid), TagComponent(name), transform)
+                for uuid, name, transform in zip(uuids, names, transforms)),
+            dtype=np.int64, count=count
+        )
+
+        if store is not None: store.AddMany(transforms, handles, translations, rotations, scales)
+
+        self.__EntityByUUID.update(zip(uuids, handles.tolist()))
+        self.__ChangedEntities.update(dict.fromkeys(handles.tolist()))
+        self.__ChangeCount += 1
+
+        # Only the views over the default components can match the new entities
+        defaults = { IDComponent, TagComponent, TransformComponent }
+        for view in self.__Queries.values():
+            if not defaults.issuperset(view.Types): continue
+            for handle in handles.tolist():
+                view._Add(handle, tuple(self.__EntityRegistry.component_for_entity(handle, t) for t in view.Types))
+
+        return handles
+
+    # The children are duplicated as well, and the duplicate is added to the same parent as the original
     def DuplicateEntity(self, entity: Entity) -> Entity:
+        newEntity = self.__DuplicateHierarchy(entity)
+
+        parent = self.GetParent(entity)
+        if parent is not None: self.SetParent(newEntity, parent)
+
+        return newEntity
+
+    def __DuplicateHierarchy(self, entity: Entity) -> Entity:
+        uuid = UUID4Generator()
         newEntity = Entity(self.EntityRegistry.create_entity(), self)
-        newEntity.AddComponent(IDComponent, UUID4Generator())
+        newEntity.AddComponent(IDComponent, uuid)
+        self.__EntityByUUID[uuid] = newEntity.EntityHandle
 
         for component in entity.AllComponents:
-            if isinstance(component, IDComponent): continue
+            if isinstance(component, (IDComponent, RelationshipComponent)): continue
             newEntity.AddComponentInstance(component.Copy()) # type: ignore
 
+        for child in self.GetChildren(entity): self.SetParent(self.__DuplicateHierarchy(child), newEntity)
         return newEntity
     
+    def GetEntityByUUID(self, uuid: UUID) -> Entity | None:
+        handle = self.__EntityByUUID.get(uuid)
+        return None if handle is None else Entity(handle, self)
+
+    # None is returned in place of every UUID that is not in the scene
+    def GetEntitiesByUUIDs(self, uuids: Iterable[UUID]) -> List[Entity | None]:
+        index = self.__EntityByUUID
+        return [ None if handle is None else Entity(handle, self) for handle in map(index.get, uuids) ]
+
     def GetEntitysWithComponent(self, component: Type[CTV]) -> List[Entity]:
         return [Entity(entity, self) for (entity, _) in self.__EntityRegistry.get_component(component)]
     
-    def DefferedDuplicateEntity(self, entity: Entity) -> None: self.__ToDuplicate.add(entity)    
-    def DestroyEntity(self, entity: Entity) -> None: self.__ToDelete.add(entity)
+    # Returns a persistent view of all entities having every one of `componentTypes`.
+    # It is built once and then maintained by OnComponentAdded/OnComponentRemoved, so querying every frame is free.
+    def Query(self, *componentTypes: type) -> QueryView:
+        view = self.__Queries.get(componentTypes)
+        if view is not None: return view
+
+        view = QueryView(componentTypes)
+        for entity, components in self.__EntityRegistry.get_components(*componentTypes):
+            view._Add(entity, tuple(components))
+        if self.__Snapshot is not None: view._SetAccessHook(self.__CopyRowsOnWrite)
+
+        self.__Queries[componentTypes] = view
+        for componentType in set(componentTypes): self.__QueriesByType.setdefault(componentType, []).append(view)
+        return view
+
+    def DefferedDuplicateEntity(self, entity: Entity) -> None: self.__Commands.DuplicateEntity(entity)
+    def DestroyEntity(self, entity: Entity) -> None: self.__Commands.DestroyEntity(entity)
     
+    #--------------------- Start Block: Snapshot ---------------------
+    # Saves the current state of the scene, to go back to it with Restore (e.g. when the editor stops playing).
+    # Nothing is copied here except the transform arrays, the rest is copy-on-write: the first time an entity's
+    # components are handed out (Entity.GetComponent, GetMutableComponent, QueryView rows, IterEntitiesWithComponent)
+    # they are saved and replaced by copies, so that whatever is then written to them is not seen by the snapshot.
+    # Only components read straight from the EntityRegistry are not covered.
+    # Restore also puts back the dirty tracking, so a scene is only dirty afterwards if it was dirty before (or was
+    # saved in between, then everything accessed since the snapshot is marked as changed).
+    def Snapshot(self) -> None:
+        store = self.__TransformStore
+        self.__Snapshot = SceneSnapshot(
+            self.__EntityRegistry._next_entity_id, store.SaveState() if store is not None else None,
+            (self.__ChangeCount, dict(self.__ChangedEntities), dict(self.__DestroyedEntities), self.__ChangesTaken)
+        )
+
+        for view in self.__Queries.values(): view._SetAccessHook(self.__CopyRowsOnWrite)
+
+    @property
+    def HasSnapshot(self) -> bool: return self.__Snapshot is not None
+
+    # The handles of all the entities that existed at the snapshot are kept
+    def Restore(self) -> None:
+        snapshot = self.__Snapshot
+        if snapshot is None:
+            ClientLoggers.Error("Scene {} has no snapshot to restore", self.__Name)
+            return
+
+        self.__Snapshot = None
+        self.__Commands.Clear()
+        registry = self.__EntityRegistry
+        for view in self.__Queries.values(): view._SetAccessHook(None)
+
+        # Handles only grow and the registries keep the creation order, so the new entities are the last ones
+        created = []
+        for handle in reversed(registry.entities()):
+            if snapshot.Tracks(handle): break
+            created.append(handle)
+
+        for handle in created:
+            for view in self.__Queries.values(): view._Remove(handle)
+            uuid = registry.component_for_entity(handle, IDComponent).ID
+            self.__EntityByUUID.pop(uuid, None)
+            self.__DestroyedEntities[uuid] = None
+            registry.delete_entity(handle, immediate=True)
+
+        for handle, components in snapshot.Entities.items():
+            if not registry.entity_exists(handle): registry.restore_entity(handle, *components.values())
+            else:
+                for component in registry.components_for_entity(handle):
+                    if type(component) not in components: registry.remove_component(handle, type(component))
+
+                for componentType, component in components.items():
+                    if not registry.has_component(handle, componentType) or \
+                       registry.component_for_entity(handle, componentType) is not component:
+                        registry.add_component(handle, component)
+
+            self.__EntityByUUID[components[IDComponent].ID] = handle
+            self.__DestroyedEntities.pop(components[IDComponent].ID, None)
+            self.__ChangedEntities[handle] = None
+            for view in self.__Queries.values():
+                if registry.has_components(handle, *view.Types):
+                    view._Add(handle, tuple(registry.component_for_entity(handle, t) for t in view.Types))
+                else: view._Remove(handle)
+
+        store = self.__TransformStore
+        if snapshot.TransformState is not None and store is not None: store.RestoreState(snapshot.TransformState)
+
+        self.__Accumulator = 0.0
+        self.__InterpolationAlpha = 1.0
+        self.__PreviousState = None
+
+        changeCount, changedEntities, destroyedEntities, changesTaken = snapshot.ChangeState
+        if changesTaken == self.__ChangesTaken:
+            # Back to the state of the snapshot, which nothing has seen since
+            self.__ChangeCount, self.__ChangedEntities, self.__DestroyedEntities = changeCount, changedEntities, destroyedEntities
+        else:
+            self.__ChangeCount += 1
+            if store is not None: store.MarkAllDirty()
+
+    # Same as Entity.GetComponent, also makes the scene dirty. While a snapshot is active, the components of the
+    # entity are saved and replaced with copies (see Snapshot).
+    def GetMutableComponent(self, entity: Entity, componentType: Type[CTV]) -> CTV:
+        return self.__Writable(entity.EntityHandle, componentType)
+
+    # Bumped for a component type every time one is handed out by GetMutableComponent,
+    # so that what is derived from the components (e.g. the BVH from the MeshComponents) can be updated
+    def WriteVersion(self, componentType: type) -> int: return self.__WriteVersions.get(componentType, 0)
+
+    def __Writable(self, handle: int, componentType: Type[CTV]) -> CTV:
+        if componentType is not TransformComponent: self.__Changed(handle)
+        self.__WriteVersions[componentType] = self.__WriteVersions.get(componentType, 0) + 1
+        self._CopyOnWrite(handle)
+        return self.__EntityRegistry.component_for_entity(handle, componentType)
+
+    # Only for Entity and the Scene itself, before handing out the components of an entity. `added` is a component
+    # being added (which is not saved, it is new), `removed` one that was just removed (which is saved).
+    def _CopyOnWrite(self, handle: int, added: Any=None, removed: Any=None) -> None:
+        snapshot = self.__Snapshot
+        if snapshot is None or not snapshot.Tracks(handle) or snapshot.IsSaved(handle): return
+
+        with self.__Lock:
+            if snapshot.IsSaved(handle): return
+
+            registry = self.__EntityRegistry
+            components = [ component for component in registry.components_for_entity(handle) if component is not added ]
+            for component in components:
+                # IDs are never written to, and the transforms are saved by the TransformStore
+                if isinstance(component, (IDComponent, TransformComponent)): continue
+                registry.add_component(handle, Scene.__Copy(component))
+
+            for view in self.__Queries.values():
+                if handle in view: view._Add(handle, tuple(registry.component_for_entity(handle, t) for t in view.Types))
+
+            # Only once the copies are in place, the other threads do not wait for saved entities
+            snapshot.Save(handle, components if removed is None else (*components, removed))
+
+    def __CopyRowsOnWrite(self, view: QueryView) -> None:
+        with self.__Lock:
+            for handle in [ row[0] for row in view.ReadOnlyRows ]: self._CopyOnWrite(handle)
+            view._SetAccessHook(None)
+
+    @staticmethod
+    def __Copy(component: Any) -> Any:
+        if not isinstance(component, RelationshipComponent): return component.Copy()
+
+        copy = RelationshipComponent()
+        copy.Parent, copy.FirstChild, copy.NextSibling = component.Parent, component.FirstChild, component.NextSibling
+        return copy
+    #--------------------------- End Block ---------------------------
+
+    #--------------------- Start Block: Hierarchy ---------------------
+    def GetParent(self, entity: Entity) -> Entity | None:
+        if not entity.HasComponent(RelationshipComponent): return None
+
+        parent = entity.GetComponent(RelationshipComponent).Parent
+        return Entity(parent, self) if parent else None
+
+    def GetChildren(self, entity: Entity) -> List[Entity]:
+        children: List[Entity] = []
+        if not entity.HasComponent(RelationshipComponent): return children
+
+        child = entity.GetComponent(RelationshipComponent).FirstChild
+        while child:
+            children.append(Entity(child, self))
+            child = self.__Relationship(child).NextSibling
+
+        return children
+
+    def IsDescendantOf(self, entity: Entity, ancestor: Entity) -> bool:
+        parent = self.GetParent(entity)
+        while parent is not None:
+            if parent == ancestor: return True
+            parent = self.GetParent(parent)
+
+        return False
+
+    # Passing None as the parent makes the entity a root
+    def SetParent(self, entity: Entity, parent: Entity | None) -> None:
+        if parent is not None and (parent == entity or self.IsDescendantOf(parent, entity)):
+            ClientLoggers.Error("Entity {} can not be parented to itself or one of its children", int(entity))
+            return
+
+        handle = entity.EntityHandle
+        relationship = self.__GetOrAddRelationship(entity)
+        if relationship.Parent: self.__Unlink(handle, relationship)
+        self.__Changed(handle)
+
+        if parent is not None:
+            parentRelationship = self.__GetOrAddRelationship(parent)
+
+            # Added as the last child, so the order of the children is preserved
+            if not parentRelationship.FirstChild: parentRelationship.FirstChild = handle
+            else:
+                sibling = parentRelationship.FirstChild
+                while self.__Relationship(sibling).NextSibling: sibling = self.__Relationship(sibling).NextSibling
+                self.__Writable(sibling, RelationshipComponent).NextSibling = handle
+
+            relationship.Parent = parent.EntityHandle
+
+        if self.__TransformStore is not None:
+            parentIndex = parent.GetComponent(TransformComponent).Index if parent is not None else -1
+            self.__TransformStore.SetParent(entity.GetComponent(TransformComponent).Index, parentIndex)
+
+    def __Relationship(self, handle: int) -> RelationshipComponent:
+        return self.__EntityRegistry.component_for_entity(handle, RelationshipComponent)
+
+    # Both return the component to write to, see GetMutableComponent
+    def __GetOrAddRelationship(self, entity: Entity) -> RelationshipComponent:
+        if entity.HasComponent(RelationshipComponent): return self.__Writable(entity.EntityHandle, RelationshipComponent)
+        return entity.AddComponent(RelationshipComponent)
+
+    def __Unlink(self, handle: int, relationship: RelationshipComponent) -> None:
+        parentRelationship = self.__Writable(relationship.Parent, RelationshipComponent)
+
+        if parentRelationship.FirstChild == handle: parentRelationship.FirstChild = relationship.NextSibling
+        else:
+            sibling = parentRelationship.FirstChild
+            while self.__Relationship(sibling).NextSibling != handle: sibling = self.__Relationship(sibling).NextSibling
+            self.__Writable(sibling, RelationshipComponent).NextSibling = relationship.NextSibling
+
+        relationship.Parent = 0
+        relationship.NextSibling = 0
+
+    def GetWorldTransform(self, entity: Entity) -> pyrr.Matrix44:
+        transform = entity.GetComponent(TransformComponent)
+        if self.__TransformStore is not None: return transform.WorldTransform
+
+        matrix = transform.Transform
+        parent = self.GetParent(entity)
+        while parent is not None:
+            matrix = matrix @ parent.GetComponent(TransformComponent).Transform
+            parent = self.GetParent(parent)
+
+        return matrix
+    #--------------------------- End Block ---------------------------
+
+    # Recomputes the cached matrices of the transforms that changed since the last call,
+    # and propagates them to their children. Static entities cost nothing here, this is run once per frame from OnUpdate.
+    def UpdateTransforms(self) -> None:
+        if self.__TransformStore is not None: self.__TransformStore.UpdateWorldMatrices()
+
+    # Returns the entity handles and their (N,4,4) float32 world matrices, in the same order.
+    # With a TransformStore these are views into the store, valid until an entity is created or destroyed.
+    def ComputeWorldMatrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        store = self.__TransformStore
+        if store is not None:
+            store.UpdateWorldMatrices()
+            return store.Entities, store.WorldMatrices
+
+        transforms = self.__EntityRegistry.get_component(TransformComponent)
+        entities = np.fromiter((entity for entity, _ in transforms), dtype=np.int64, count=len(transforms))
+        matrices = np.array(
+            [ self.GetWorldTransform(Entity(entity, self)) for entity, _ in transforms ], dtype=np.float32
+        )
+        return entities, matrices.reshape(-1, 4, 4)
+
+    # World matrices of the given entity handles, in the same order. All of them must have a TransformComponent.
+    # `interpolated` blends them as ComputeInterpolatedWorldMatrices does, for rendering with a fixed timestep.
+    def GetWorldMatrices(self, handles: np.ndarray, interpolated: bool=False) -> np.ndarray:
+        entities, matrices = self.ComputeInterpolatedWorldMatrices() if interpolated else self.ComputeWorldMatrices()
+        if not len(handles): return np.zeros((0, 4, 4), dtype=np.float32)
+
+        order = self.__EntityOrder(entities)
+        return matrices[order[np.searchsorted(entities, handles, sorter=order)]]
+
+    # argsort of the entities of ComputeWorldMatrices, which only changes when the store's slots move
+    def __EntityOrder(self, entities: np.ndarray) -> np.ndarray:
+        store = self.__TransformStore
+        if store is None: return np.argsort(entities)
+
+        if self.__WorldMatrixOrder is None or self.__WorldMatrixOrder[0] != store.LayoutKey:
+            self.__WorldMatrixOrder = (store.LayoutKey, np.argsort(entities))
+        return self.__WorldMatrixOrder[1]
+
+    # Same as ComputeWorldMatrices, but blended between the previous and the current fixed step by InterpolationAlpha.
+    # The matrices are blended linearly, which is close enough for the small rotations of a single step.
+    # Entities created during the last step are not interpolated.
+    def ComputeInterpolatedWorldMatrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        entities, matrices = self.ComputeWorldMatrices()
+        if self.__PreviousState is None or self.__InterpolationAlpha >= 1.0: return entities, matrices
+
+        previousEntities, previousMatrices = self.__PreviousState
+        alpha = np.float32(self.__InterpolationAlpha)
+
+        if np.array_equal(previousEntities, entities):
+            return entities, previousMatrices + (matrices - previousMatrices) * alpha
+
+        # Entities were created or destroyed, so the slots moved around
+        order = np.argsort(previousEntities)
+        positions = np.searchsorted(previousEntities, entities, sorter=order).clip(0, max(len(order) - 1, 0))
+        found = previousEntities[order[positions]] == entities if len(order) else np.zeros(len(entities), np.bool_)
+
+        result = matrices.copy()
+        previous = previousMatrices[order[positions[found]]]
+        result[found] = previous + (matrices[found] - previous) * alpha
+        return entities, result
+
     @property
     def Entities(self) -> List[Entity]:
-        return [Entity(entity, self) for entity in self.EntityRegistry._entities.keys()]
+        return [Entity(entity, self) for entity in self.EntityRegistry.entities()]
+
+    @property
+    def EntityCount(self) -> int: return len(self.__EntityRegistry.entities())
+
+    # Allocation free versions of Entities / GetEntitysWithComponent, the same EntityView is yielded every time,
+    # rebound to the next entity. Entities must not be created or destroyed while iterating, defer that instead.
+    def IterEntities(self) -> Iterator[EntityView]:
+        view = EntityView(0, self)
+        for entity in self.__EntityRegistry.entities(): yield view.Rebind(entity)
+
+    def IterEntitiesWithComponent(self, componentType: Type[CTV]) -> Iterator[Tuple[EntityView, CTV]]:
+        view = EntityView(0, self)
+        if self.__Snapshot is not None:
+            for entity, _ in list(self.__EntityRegistry.get_component(componentType)): self._CopyOnWrite(entity)
+
+        for entity, component in self.__EntityRegistry.get_component(componentType):
+            yield view.Rebind(entity), component
+
+    def IterChildren(self, entity: Entity) -> Iterator[EntityView]:
+        view = EntityView(0, self)
+        if not entity.HasComponent(RelationshipComponent): return
+
+        child = entity.GetComponent(RelationshipComponent).FirstChild
+        while child:
+            # Read the next sibling first, so the loop is not affected by what is done with the view
+            nextChild = self.__Relationship(child).NextSibling
+            yield view.Rebind(child)
+            child = nextChild
+
+    def HasChildren(self, entity: Entity) -> bool:
+        return entity.HasComponent(RelationshipComponent) and bool(entity.GetComponent(RelationshipComponent).FirstChild)
 
-    def OnStart(self) -> None: pass
+    def OnStart(self) -> None:
+        self.__Accumulator = 0.0
+        self.__InterpolationAlpha = 1.0
+        self.__PreviousState = None
 
     def OnUpdate(self) -> None:
-        for entity in self.__ToDelete:  
-            self.__EntityRegistry.delete_entity(entity.EntityHandle, immediate=True)
-        self.__ToDelete.clear()
+        self.__Commands.Playback(self)
+        self.UpdateTransforms()
+        self.__SpatialIndex.Update()
 
-        for entity in self.__ToDuplicate: self.DuplicateEntity(entity)
-        self.__ToDuplicate.clear()
+    # Only for SceneCommandBuffer, structural changes must go through it
+    def _DestroyEntities(self, handles: Iterable[int]) -> None:
+        for handle in handles: self.__DestroyEntityImmediate(Entity(handle, self))
 
-    def OnStop(self) -> None: pass
+    # The children are destroyed along with the entity
+    def __DestroyEntityImmediate(self, entity: Entity) -> None:
+        handle = entity.EntityHandle
+        if not self.__EntityRegistry.entity_exists(handle): return
+
+        for child in self.GetChildren(entity): self.__DestroyEntityImmediate(child)
+
+        if entity.HasComponent(RelationshipComponent):
+            relationship = self.__Writable(handle, RelationshipComponent)
+            if relationship.Parent: self.__Unlink(handle, relationship)
+
+        if self.__Snapshot is not None: self.__Snapshot.Save(handle, self.__EntityRegistry.components_for_entity(handle))
+
+        # esper does not call OnComponentRemoved, so the transform slot and the queries are released here
+        if entity.HasComponent(TransformComponent): entity.GetComponent(TransformComponent)._Detach()
+        for view in self.__Queries.values(): view._Remove(handle)
+        uuid = entity.GetComponent(IDComponent).ID
+        self.__EntityByUUID.pop(uuid, None)
+        self.__EntityRegistry.delete_entity(handle, immediate=True)
+
+        self.__ChangeCount += 1
+        self.__ChangedEntities.pop(handle, None)
+        self.__DestroyedEntities[uuid] = None
+
+    def OnStop(self) -> None: self.__Scheduler.Shutdown()
 
     def OnUpdateEditor(self, dt: float) -> None:
         self.OnUpdate()
 
     def OnUpdateRuntime(self, dt: float) -> None:
-        self.OnUpdate()
+        step = self.__FixedTimestep
+        if step is None:
+            self.__Scheduler.Run(self, dt)
+            self.OnUpdate()
+            return
+
+        self.__Accumulator += dt
+        steps = 0
+        while self.__Accumulator >= step and steps < self.__MaxCatchUpSteps:
+            entities, matrices = self.ComputeWorldMatrices()
+            self.__PreviousState = (entities.copy(), matrices.copy())
+
+            self.__Scheduler.Run(self, step)
+            self.OnUpdate()
+
+            self.__Accumulator -= step
+            steps += 1
+
+        if self.__Accumulator >= step: self.__Accumulator %= step
+        self.__InterpolationAlpha = self.__Accumulator / step
+
+    def OnComponentAdded(self, entity: Entity, component: CTV) -> None:
+        self.__Changed(entity.EntityHandle)
+        self._CopyOnWrite(entity.EntityHandle, added=component)
+
+        if self.__TransformStore is not None and isinstance(component, TransformComponent):
+            component._Attach(self.__TransformStore, entity.EntityHandle)
+
+        handle = entity.EntityHandle
+        registry = self.__EntityRegistry
+        for view in self.__QueriesByType.get(type(component), ()):
+            if not registry.has_components(handle, *view.Types): continue
+            view._Add(handle, tuple(registry.component_for_entity(handle, t) for t in view.Types))
+
+    def OnComponentRemoved(self, entity: Entity, component: CTV) -> None:
+        self.__Changed(entity.EntityHandle)
+        self._CopyOnWrite(entity.EntityHandle, removed=component)
+
+        if isinstance(component, TransformComponent): component._Detach()
 
-    def OnComponentAdded   (self, entity: Entity, component: CTV) -> None: ...
-    def OnComponentRemoved (self, entity: Entity, component: CTV) -> None: ...
+        for view in self.__QueriesByType.get(type(component), ()): view._Remove(entity.EntityHandle)
@@ -8,15 +8,16 @@ class ProjectionTypes(Enum):
 
 class SceneCamera:
     __ProjectionType: Enum
-    __Camera: Camera
+    __Camera: Camera | None
 
     def __init__(self, projectionType: Enum=ProjectionTypes.ORTHOGRAPHIC) -> None:
+        self.__Camera = None
         self.SetProjectionType(projectionType)
 
     @property
     def ProjectionType(self) -> Enum: return self.__ProjectionType
     @property
-    def CameraObject(self) -> Camera: return self.__Camera
+    def CameraObject(self) -> Camera: return self.__Camera # type: ignore
 
     def _Recalculate(self) -> None:
         if not self.__Camera:
@@ -25,7 +26,7 @@ class SceneCamera:
             elif self.__ProjectionType == ProjectionTypes.PERSPECTIVE:
                 self.__Camera = PerspectiveCamera(60, 1)
 
-        self.__Camera._RecalculateViewMatrix()
+        self.__Camera._RecalculateViewMatrix() # type: ignore
 
     def SetProjectionType(self, projectionType: Enum) -> None:
         self.__ProjectionType = projectionType
@@ -33,7 +34,7 @@ class SceneCamera:
         aspectRatio = 0
         if self.__Camera:
             aspectRatio = self.__Camera.AspectRatio
-            del self.__Camera
+            self.__Camera = None
 
         self._Recalculate()
-        if aspectRatio: self.__Camera.AspectRatio = aspectRatio
+        if aspectRatio: self.__Camera.AspectRatio = float(aspectRatio) # type: ignore
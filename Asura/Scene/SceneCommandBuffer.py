@@ -0,0 +1,112 @@
+from ..Utility import UUID, UUID4Generator, List, Tuple, Dict, Any
+from ..Logging import ClientLoggers
+from .Entity import Entity
+
+from threading import Lock
+from typing import Type, TypeVar
+
+_C = TypeVar("_C")
+
+# Records structural changes (create, destroy, duplicate, add/remove component) to apply them later at a sync point,
+# so that systems can request them while iterating over the registry, or from worker threads (recording is locked).
+# The commands are applied grouped by kind, in this order: creates, component adds and removes (together, in the order
+# they were recorded, so removing a component and adding a new one replaces it), duplicates, destroys.
+#
+# Entities that are yet to be created have no handle, so CreateEntity returns their UUID instead,
+# and every other command accepts either an Entity or a UUID:
+#     uuid = commands.CreateEntity("Bullet")
+#     commands.AddComponent(uuid, MeshComponent, ...)
+class SceneCommandBuffer:
+    __Lock: Lock
+
+    __Creates: List[Tuple[str, UUID]]
+    # (entity, component to add, None) or (entity, None, type to remove)
+    __ComponentChanges: List[Tuple[int | UUID, Any, type | None]]
+    __Duplicates: Dict[int | UUID, None]
+    __Destroys: Dict[int | UUID, None]
+
+    def __init__(self) -> None:
+        self.__Lock = Lock()
+        self.__Reset()
+
+    def __Reset(self) -> None:
+        self.__Creates = []
+        self.__ComponentChanges = []
+        # Dicts as ordered sets, an entity is only duplicated/destroyed once per playback
+        self.__Duplicates = {}
+        self.__Destroys = {}
+
+    def __len__(self) -> int:
+        return len(self.__Creates) + len(self.__ComponentChanges) + len(self.__Duplicates) + len(self.__Destroys)
+
+    def CreateEntity(self, name: str="Entity", uuid: UUID | None=None) -> UUID:
+        if uuid is None: uuid = UUID4Generator()
+        with self.__Lock: self.__Creates.append((name, uuid))
+        return uuid
+
+    def DestroyEntity(self, entity: Entity | UUID) -> None:
+        with self.__Lock: self.__Destroys[self.__Key(entity)] = None
+
+    def DuplicateEntity(self, entity: Entity | UUID) -> None:
+        with self.__Lock: self.__Duplicates[self.__Key(entity)] = None
+
+    # The component is created right away, so it can still be set up before the buffer is played back
+    def AddComponent(self, entity: Entity | UUID, componentType: Type[_C], *args, **kwargs) -> _C:
+        component = componentType(*args, **kwargs)
+        self.AddComponentInstance(entity, component)
+        return component
+
+    def AddComponentInstance(self, entity: Entity | UUID, component: Any) -> None:
+        with self.__Lock: self.__ComponentChanges.append((self.__Key(entity), component, None))
+
+    def RemoveComponent(self, entity: Entity | UUID, componentType: type) -> None:
+        with self.__Lock: self.__ComponentChanges.append((self.__Key(entity), None, componentType))
+
+    def Clear(self) -> None:
+        with self.__Lock: self.__Reset()
+
+    # Applies and clears the recorded commands, commands recorded during the playback are kept for the next one
+    def Playback(self, scene) -> None:
+        with self.__Lock:
+            creates, componentChanges = self.__Creates, self.__ComponentChanges
+            duplicates, destroys = self.__Duplicates, self.__Destroys
+            self.__Reset()
+
+        if creates:
+            names, uuids = zip(*creates)
+            scene.CreateEntities(len(creates), names, uuids)
+
+        for key, component, componentType in componentChanges:
+            entity = self.__Resolve(scene, key)
+            if entity is None: continue
+
+            if componentType is None: entity.AddComponentInstance(component)
+            else: entity.RemoveComponent(componentType)
+
+        for key in duplicates:
+            entity = self.__Resolve(scene, key)
+            if entity is not None: scene.DuplicateEntity(entity)
+
+        handles = []
+        for key in destroys:
+            entity = self.__Resolve(scene, key)
+            if entity is not None: handles.append(int(entity))
+
+        if handles: scene._DestroyEntities(handles)
+
+    # Handles are stored instead of the Entity, as it can be an EntityView that is rebound later
+    @staticmethod
+    def __Key(entity: Entity | UUID) -> int | UUID: return entity if isinstance(entity, UUID) else int(entity)
+
+    @staticmethod
+    def __Resolve(scene, key: int | UUID) -> Entity | None:
+        if isinstance(key, UUID):
+            entity = scene.GetEntityByUUID(key)
+            if entity is None: ClientLoggers.Error("SceneCommandBuffer: No entity with UUID {}", key)
+            return entity
+
+        if not scene.EntityRegistry.entity_exists(key):
+            ClientLoggers.Error("SceneCommandBuffer: Entity {} does not exist", key)
+            return None
+
+        return Entity(key, scene)
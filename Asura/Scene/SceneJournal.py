@@ -0,0 +1,204 @@
+from ..Utility import Path, List, Tuple, Dict, UUID
+from ..Logging import ClientLoggers
+from .Scene import Scene
+from .Entity import Entity
+from .Components import TagComponent, TransformComponent, IDComponent
+from .SceneSerializer import SceneSerializer, SceneColumns, AZ_YAML
+
+import numpy as np
+import os
+import pyrr
+import struct
+import zlib
+
+# Append-only log of the changes made to a scene since its file was last written, for cheap and crash-safe autosaves.
+# Every Flush appends a record per entity changed since the previous one (its whole state, so replaying a record
+# twice is harmless) and one per destroyed entity, so its cost depends on what changed and not on the scene size.
+# Once the log grows past `compactRatio` times the scene file, the scene is saved and the log emptied.
+#
+# The log lives next to the scene file (Level.AZ -> Level.AZ.journal). Open reads the scene and replays its log,
+# so the changes that were flushed before a crash are recovered.
+#
+# File: magic "AZJ\0", format version (u16), scene UUID (16 bytes), then the records, little endian:
+#     Record  : kind (u8), payload size (u32), CRC32 of the payload (u32), payload
+#     Upsert  : UUID, parent UUID (zeros for none), translation, rotation, scale (9 x f32), tag size (u16), tag,
+#               the YAML of the other components (the rest of the payload, empty if there are none)
+#     Destroy : UUID
+# A torn record at the end (crash midway through a write) fails its CRC, it and anything after it are dropped.
+class SceneJournal:
+    Magic: bytes = b"AZJ\0"
+    FormatVersion: int = 1
+
+    Upsert: int = 1
+    Destroy: int = 2
+
+    __Header: struct.Struct = struct.Struct("<4sH16s")
+    __Record: struct.Struct = struct.Struct("<BII")
+    __Entity: struct.Struct = struct.Struct("<16s16s9fH")
+
+    __Scene: Scene
+    __ScenePath: Path
+    __CompactRatio: float
+
+    # `path` is the scene file
+    def __init__(self, scene: Scene, path: Path, compactRatio: float=0.5) -> None:
+        self.__Scene = scene
+        self.__ScenePath = path
+        self.__CompactRatio = compactRatio
+
+        # Starts after the last valid record, dropping a torn one
+        valid = SceneJournal.__ValidSize(self.Location.read_bytes(), scene.SceneUUID) if self.Location.exists() else 0
+        if valid == 0: self.Clear()
+        else: os.truncate(self.Location, valid)
+
+    @staticmethod
+    def PathFor(scenePath: Path) -> Path: return scenePath.with_name(scenePath.name + ".journal")
+
+    @property
+    def Location(self) -> Path: return SceneJournal.PathFor(self.__ScenePath)
+    @property
+    def Size(self) -> int: return self.Location.stat().st_size if self.Location.exists() else 0
+
+    # Appends the changes made since the last Flush (or since the scene was saved), returns the number of records
+    def Flush(self) -> int:
+        scene = self.__Scene
+        handles, destroyed = scene._TakeChanges()
+
+        records = [ SceneJournal.__Pack(SceneJournal.Destroy, uuid.bytes) for uuid in destroyed ]
+        records += [ SceneJournal.__Pack(SceneJournal.Upsert, self.__EncodeEntity(Entity(handle, scene))) for handle in handles ]
+        if not records: return 0
+
+        with self.Location.open("ab") as file:
+            file.write(b"".join(records))
+            file.flush()
+            os.fsync(file.fileno())
+
+        if self.__ScenePath.exists() and self.Size > self.__CompactRatio * self.__ScenePath.stat().st_size: self.Compact()
+        return len(records)
+
+    # Saves the scene and empties the log. If this is interrupted the log is still valid for the new scene file,
+    # as its records only hold final states.
+    def Compact(self) -> None:
+        scene = self.__Scene
+        SceneSerializer.Serialize(scene, self.__ScenePath)
+        scene.MarkSaved()
+        self.Clear()
+
+    def Clear(self) -> None:
+        with self.Location.open("wb") as file:
+            file.write(SceneJournal.__Header.pack(SceneJournal.Magic, SceneJournal.FormatVersion, self.__Scene.SceneUUID.bytes))
+
+    # Reads a scene, and replays its log if there is one. The replayed changes leave the scene dirty, as they are
+    # not in its file yet, but they are not flushed again.
+    @staticmethod
+    def Open(path: Path) -> Scene: return SceneJournal.Recover(SceneSerializer.Deserialize(path), path)
+
+    # Same as Open, for a scene already read from `path`
+    @staticmethod
+    def Recover(scene: Scene, path: Path) -> Scene:
+        scene.MarkSaved()
+        if SceneJournal.Replay(scene, path): scene._TakeChanges()
+        return scene
+
+    # Applies the log of the scene file at `path` to `scene`, returns the number of records applied
+    @staticmethod
+    def Replay(scene: Scene, path: Path) -> int:
+        journalPath = SceneJournal.PathFor(path)
+        if not journalPath.exists(): return 0
+
+        data = journalPath.read_bytes()
+        size = SceneJournal.__ValidSize(data, scene.SceneUUID)
+        if size == 0:
+            ClientLoggers.Warn("{} is not a journal of scene {}, ignoring it", str(journalPath), scene.Name)
+            return 0
+
+        if size < len(data): ClientLoggers.Warn("Dropping the torn end of {}", str(journalPath))
+
+        destroyed: List[UUID] = []
+        upserts: Dict[UUID, Tuple] = {}
+        for kind, payload in SceneJournal.__Records(data[:size]):
+            if kind == SceneJournal.Destroy:
+                uuid = UUID(bytes=payload)
+                destroyed.append(uuid)
+                upserts.pop(uuid, None)
+            else:
+                entity = SceneJournal.__DecodeEntity(payload)
+                upserts[entity[0]] = entity
+
+        handles = [ entity.EntityHandle for entity in scene.GetEntitiesByUUIDs(destroyed) if entity is not None ]
+        scene._DestroyEntities(handles)
+
+        for uuid, _, transform, tag, components in upserts.values():
+            entity = scene.GetEntityByUUID(uuid)
+            if entity is None: entity = scene.CreateEntityWithUUID(tag, uuid)
+            elif entity.GetComponent(TagComponent).Tag != tag: entity.GetMutableComponent(TagComponent).Tag = tag
+
+            component = entity.GetComponent(TransformComponent)
+            component.SetTranslation(pyrr.Vector3(transform[0:3]))
+            component.SetRotation(pyrr.Vector3(transform[3:6]))
+            component.SetScale(pyrr.Vector3(transform[6:9]))
+            SceneColumns.SetOtherComponents(entity, components)
+
+        # Parents are linked once all the entities exist
+        for uuid, parentUUID, _, _, _ in upserts.values():
+            entity = scene.GetEntityByUUID(uuid)
+            parent = scene.GetEntityByUUID(parentUUID) if parentUUID is not None else None
+            current = scene.GetParent(entity) # type: ignore
+            if (current.EntityHandle if current else None) != (parent.EntityHandle if parent else None):
+                scene.SetParent(entity, parent) # type: ignore
+
+        return len(destroyed) + len(upserts)
+
+    def __EncodeEntity(self, entity: Entity) -> bytes:
+        scene = self.__Scene
+        transform = entity.GetComponent(TransformComponent)
+        parent = scene.GetParent(entity)
+        tag = entity.GetComponent(TagComponent).Tag.encode("utf-8")
+
+        components = SceneColumns.OtherComponents(entity)
+        return SceneJournal.__Entity.pack(
+            entity.GetComponent(IDComponent).ID.bytes,
+            parent.GetComponent(IDComponent).ID.bytes if parent is not None else bytes(16),
+            *np.concatenate((transform.Translation, transform.Rotation, transform.Scale)).tolist(), len(tag)
+        ) + tag + (AZ_YAML.Dump(components, default_flow_style=True).encode("utf-8") if components else b"")
+
+    # UUID, parent UUID (or None), transform (9 floats), tag, other components
+    @staticmethod
+    def __DecodeEntity(payload: bytes) -> Tuple:
+        uuid, parent, *values = SceneJournal.__Entity.unpack_from(payload)
+        transform, tagSize = values[:9], values[9]
+
+        start = SceneJournal.__Entity.size
+        tag = payload[start:start + tagSize].decode("utf-8")
+        rest = payload[start + tagSize:]
+        components = AZ_YAML.Load(rest.decode("utf-8")) if rest else {}
+
+        return UUID(bytes=uuid), UUID(bytes=parent) if any(parent) else None, transform, tag, components
+
+    @staticmethod
+    def __Pack(kind: int, payload: bytes) -> bytes:
+        return SceneJournal.__Record.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+    @staticmethod
+    def __Records(data: bytes):
+        offset = SceneJournal.__Header.size
+        while offset + SceneJournal.__Record.size <= len(data):
+            kind, size, crc = SceneJournal.__Record.unpack_from(data, offset)
+            start = offset + SceneJournal.__Record.size
+            payload = data[start:start + size]
+            if len(payload) != size or zlib.crc32(payload) != crc: return
+
+            yield kind, payload
+            offset = start + size
+
+    # Size of the header and the valid records, 0 if the data is not a journal of the scene
+    @staticmethod
+    def __ValidSize(data: bytes, sceneUUID: UUID) -> int:
+        if len(data) < SceneJournal.__Header.size: return 0
+
+        magic, version, uuid = SceneJournal.__Header.unpack_from(data)
+        if magic != SceneJournal.Magic or version > SceneJournal.FormatVersion or uuid != sceneUUID.bytes: return 0
+
+        size = SceneJournal.__Header.size
+        for _, payload in SceneJournal.__Records(data): size += SceneJournal.__Record.size + len(payload)
+        return size
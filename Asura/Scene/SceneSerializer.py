@@ -1,10 +1,15 @@
-from ..Utility import Path, List
+from ..Utility import Path, List, Tuple, Dict, Any, DataClass, AtomicWrite
 from ..Core import ASURA_VERSION_STR
 
 from .Scene import *
 from .Entity import *
 from .Components import *
+from .ComponentSchema import ComponentField, ComponentSchemas, ComponentColumns
 
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import field
+import mmap
+import struct
 import yaml
 
 # Helper class for handling YAML serialization
@@ -13,19 +18,20 @@ class AZ_YAML:
     def EncodeVector3(dumper: yaml.Dumper, vec: pyrr.Vector3) -> yaml.SequenceNode:
         return dumper.represent_sequence(
             "Vector3",
-            [float(vec[0]), float(vec[1]), float(vec[2])],
+            # str() gives the shortest repr for the dtype, so float32 transforms stay readable
+            [float(str(vec[0])), float(str(vec[1])), float(str(vec[2]))],
             flow_style=True
         )
-    
+
     @staticmethod
     def DecodeVector3(loader: yaml.Loader, node: yaml.SequenceNode) -> pyrr.Vector3:
         return pyrr.Vector3(loader.construct_sequence(node))
-        
+
     @staticmethod
     def EncodeVector4(dumper: yaml.Dumper, vector: pyrr.Vector4) -> yaml.SequenceNode:
         return dumper.represent_sequence(
             "Vector4",
-            [ float(vector[0]), float(vector[1]), float(vector[2]), float(vector[3]) ],
+            [ float(str(vector[0])), float(str(vector[1])), float(str(vector[2])), float(str(vector[3])) ],
             flow_style=True
         )
 
@@ -33,56 +39,434 @@ class AZ_YAML:
     def DecodeVector4(loader: yaml.Loader, node: yaml.SequenceNode) -> pyrr.Vector4:
         return pyrr.Vector4(loader.construct_sequence(node))
 
-class SceneSerializer:
+    # Loader/Dumper used for scenes, libyaml based when PyYAML was built with it (set up below)
+    Loader: type
+    Dumper: type
+
     @staticmethod
-    def Serialize(scene: Scene, path: Path) -> None:
-        data = {}
-        data["Scene"] = scene.Name
-        data["UUID"] = str(scene.SceneUUID)
-        data["Version"] = ASURA_VERSION_STR
+    def Load(stream: Any) -> Any: return yaml.load(stream, AZ_YAML.Loader)
+
+    @staticmethod
+    def Dump(data: Any, stream: Any=None, **kwargs) -> Any: return yaml.dump(data, stream, AZ_YAML.Dumper, **kwargs)
+
+# Subclasses, so that the handlers are registered once and PyYAML's global Loader/Dumper are left alone.
+# Scenes only hold plain data and vectors, so the safe loader is enough.
+class AZ_PyLoader(yaml.SafeLoader): pass
+class AZ_PyDumper(yaml.Dumper): pass
+
+AZ_YAML.Loader, AZ_YAML.Dumper = AZ_PyLoader, AZ_PyDumper
+
+if yaml.__with_libyaml__:
+    class AZ_CLoader(yaml.CSafeLoader): pass
+    class AZ_CDumper(yaml.CDumper): pass
+
+    AZ_YAML.Loader, AZ_YAML.Dumper = AZ_CLoader, AZ_CDumper
+
+for _Loader in { AZ_PyLoader, AZ_YAML.Loader }:
+    _Loader.add_constructor("Vector3", AZ_YAML.DecodeVector3)
+    _Loader.add_constructor("Vector4", AZ_YAML.DecodeVector4)
+
+for _Dumper in { AZ_PyDumper, AZ_YAML.Dumper }:
+    _Dumper.add_representer(pyrr.Vector3, AZ_YAML.EncodeVector3)
+    _Dumper.add_representer(pyrr.Vector4, AZ_YAML.EncodeVector4)
+
+# A scene laid out by column, the common form of the YAML and the binary format, entities are in file order.
+# Parents are indices into the columns, and always come before their children.
+@DataClass
+class SceneColumns:
+    Name: str = ""
+    SceneUUID: str = ""
+    Version: str = ASURA_VERSION_STR
+
+    EntityUUIDs: List[UUID] = field(default_factory=list)
+    Tags: List[str] = field(default_factory=list)
+    # (N,9) float32: translation, rotation, scale
+    Transforms: np.ndarray = field(default_factory=lambda: np.zeros((0, 9), np.float32))
+    Parents: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int32))
+
+    # Every other component, by its name in ComponentSchemas
+    Components: Dict[str, ComponentColumns] = field(default_factory=dict)
+    # Components without a schema, by what their Serialize() returned: the entity indices and the data.
+    # They are kept so that converting between the formats loses nothing, but they are not loaded into scenes.
+    Unregistered: Dict[str, Tuple[List[int], List[Any]]] = field(default_factory=dict)
+
+    @property
+    def EntityCount(self) -> int: return len(self.EntityUUIDs)
+
+    # The YAML data of the components that do not have a column of their own
+    @staticmethod
+    def OtherComponents(entity: Entity) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for component in entity.AllComponents:
+            if isinstance(component, SceneColumns.__Core): continue
+
+            schema = ComponentSchemas.Get(type(component))
+            if schema is not None: data[schema.Name] = schema.ToYAML(component)
+            elif hasattr(component, "Serialize"): data.update(component.Serialize()) # type: ignore
+
+        return data
+
+    # Makes the registered components of the entity match `data` (as returned by OtherComponents)
+    @staticmethod
+    def SetOtherComponents(entity: Entity, data: Dict[str, Any]) -> None:
+        for component in entity.AllComponents:
+            schema = ComponentSchemas.Get(type(component))
+            if schema is not None and schema.Name not in data: entity.RemoveComponent(schema.Type)
+
+        for name, value in data.items():
+            schema = ComponentSchemas.GetByName(name)
+            if schema is None: continue
+
+            if entity.HasComponent(schema.Type): entity.RemoveComponent(schema.Type)
+            entity.AddComponentInstance(schema.FromYAML(value))
+
+    __Core = (IDComponent, TagComponent, TransformComponent, RelationshipComponent)
+
+    @staticmethod
+    def FromScene(scene: Scene) -> "SceneColumns":
+        columns = SceneColumns(scene.Name, str(scene.SceneUUID))
+        handles: List[int] = []
+        parents: List[int] = []
+
+        # Children are written right after their parent, so that their order is preserved on load
+        def AddEntity(entity: Entity, parent: int) -> None:
+            index = len(handles)
+            handles.append(entity.EntityHandle)
+            parents.append(parent)
+            columns.EntityUUIDs.append(entity.GetComponent(IDComponent).ID)
+            columns.Tags.append(entity.GetComponent(TagComponent).Tag)
+
+            for component in entity.AllComponents:
+                if isinstance(component, SceneColumns.__Core) or ComponentSchemas.Get(type(component)) is not None: continue
+                if not hasattr(component, "Serialize"): continue
+
+                for name, data in component.Serialize().items(): # type: ignore
+                    indices, values = columns.Unregistered.setdefault(name, ([], []))
+                    indices.append(index)
+                    values.append(data)
+
+            for child in scene.GetChildren(entity): AddEntity(child, index)
 
-        entities: List[Dict] = []
         registry = scene.EntityRegistry
-        for entityID in range(1, registry._next_entity_id+1):
-            if not registry.entity_exists(entityID): continue
-            entity = Entity(entityID, scene)
+        for handle in list(registry.entities()):
+            if not registry.entity_exists(handle): continue
+            entity = Entity(handle, scene)
+
+            if scene.GetParent(entity) is not None: continue
+            AddEntity(entity, -1)
+
+        # Each registered type is encoded in one go, in file order
+        fileIndices = { handle: index for index, handle in enumerate(handles) }
+        for schema in ComponentSchemas.All():
+            pairs = registry.get_component(schema.Type)
+            if not pairs: continue
+
+            indices = np.array([ fileIndices[handle] for handle, _ in pairs ], dtype=np.int64)
+            order = np.argsort(indices, kind="stable")
+            components = [ pairs[i][1] for i in order.tolist() ]
+            columns.Components[schema.Name] = ComponentColumns(indices[order], schema.Encode(components))
+
+        columns.Parents = np.array(parents, dtype=np.int32)
+        columns.Transforms = np.zeros((len(handles), 9), dtype=np.float32)
+
+        store = scene.TransformStore
+        if store is not None and handles:
+            order = np.argsort(store.Entities)
+            slots = order[np.searchsorted(store.Entities, handles, sorter=order)]
+            columns.Transforms[:, 0:3] = store.Translations[slots]
+            columns.Transforms[:, 3:6] = store.Rotations[slots]
+            columns.Transforms[:, 6:9] = store.Scales[slots]
+        else:
+            for i, handle in enumerate(handles):
+                transform = Entity(handle, scene).GetComponent(TransformComponent)
+                columns.Transforms[i] = np.concatenate((transform.Translation, transform.Rotation, transform.Scale))
+
+        return columns
 
-            entityDict = {
-                "Entity": str(entity.GetComponent(IDComponent))
+    def ToScene(self) -> Scene:
+        scene = Scene(self.Name)
+        scene.SetUUID(UUID(self.SceneUUID))
+
+        transforms = self.Transforms
+        handles = scene.CreateEntities(
+            self.EntityCount, self.Tags, self.EntityUUIDs, transforms[:, 0:3], transforms[:, 3:6], transforms[:, 6:9]
+        )
+
+        # Parents are linked once all the entities exist
+        for child in np.flatnonzero(self.Parents >= 0):
+            scene.SetParent(Entity(int(handles[child]), scene), Entity(int(handles[self.Parents[child]]), scene))
+
+        for name, componentColumns in self.Components.items():
+            schema = ComponentSchemas.GetByName(name)
+            if schema is None:
+                ClientLoggers.Warn("Scene {}: No schema registered for component {}, skipping it", self.Name, name)
+                continue
+
+            components = schema.Decode(componentColumns.Fields, len(componentColumns.Indices))
+            for index, component in zip(componentColumns.Indices.tolist(), components):
+                Entity(int(handles[index]), scene).AddComponentInstance(component)
+
+        for name in self.Unregistered:
+            ClientLoggers.Warn("Scene {}: No schema registered for component {}, skipping it", self.Name, name)
+
+        return scene
+
+    # The dictionary written to / read from YAML
+    def ToData(self) -> Dict[str, Any]:
+        entities: List[Dict[str, Any]] = [
+            {
+                "Entity": str(uuid),
+                "Tag": tag,
+                "Transform": {
+                    "Translation" : pyrr.Vector3(transform[0:3]),
+                    "Rotation"    : pyrr.Vector3(transform[3:6]),
+                    "Scale"       : pyrr.Vector3(transform[6:9])
+                }
             }
+            for uuid, tag, transform in zip(self.EntityUUIDs, self.Tags, self.Transforms)
+        ]
 
-            for component in entity.AllComponents:
-                if isinstance(component, IDComponent): continue
-                entityDict.update(component.Serialize()) # type: ignore
+        for child in np.flatnonzero(self.Parents >= 0): entities[child]["Parent"] = str(self.EntityUUIDs[self.Parents[child]])
+        for name, componentColumns in self.Components.items():
+            for index, value in zip(componentColumns.Indices.tolist(), componentColumns.ToYAML()): entities[index][name] = value
+        for name, (indices, values) in self.Unregistered.items():
+            for index, value in zip(indices, values): entities[index][name] = value
+
+        return { "Scene": self.Name, "UUID": self.SceneUUID, "Version": self.Version, "Entities": entities }
+
+    @staticmethod
+    def FromData(data: Dict[str, Any]) -> "SceneColumns":
+        entities = data["Entities"]
+        columns = SceneColumns(data["Scene"], data["UUID"], data.get("Version", ASURA_VERSION_STR))
+
+        columns.EntityUUIDs = [ UUID(entityDict["Entity"]) for entityDict in entities ]
+        columns.Tags = [ entityDict["Tag"] for entityDict in entities ]
+        columns.Transforms = np.array([
+            [ *entityDict["Transform"]["Translation"], *entityDict["Transform"]["Rotation"], *entityDict["Transform"]["Scale"] ]
+            for entityDict in entities
+        ], dtype=np.float32).reshape(-1, 9)
+
+        indices = { uuid: index for index, uuid in enumerate(columns.EntityUUIDs) }
+        columns.Parents = np.array(
+            [ indices[UUID(entityDict["Parent"])] if "Parent" in entityDict else -1 for entityDict in entities ],
+            dtype=np.int32
+        )
+
+        rows: Dict[str, Tuple[List[int], List[Any]]] = {}
+        for index, entityDict in enumerate(entities):
+            for name, value in entityDict.items():
+                if name in ["Entity", "Tag", "Transform", "Parent"]: continue
+
+                target = rows if ComponentSchemas.GetByName(name) is not None else columns.Unregistered
+                componentIndices, values = target.setdefault(name, ([], []))
+                componentIndices.append(index)
+                values.append(value)
+
+        for name, (componentIndices, values) in rows.items():
+            schema = ComponentSchemas.GetByName(name)
+            columns.Components[name] = ComponentColumns(np.array(componentIndices, np.int64), schema.ColumnsFromYAML(values)) # type: ignore
+
+        return columns
+
+# Binary scene format (.AZB), little endian:
+#     Header    : magic "AZB\0", format version (u16), flags (u16), entity count (u32), block count (u32)
+#     Directory : per block, its name (16 bytes, null padded), offset and size (u64)
+#     Blocks    : 16 byte aligned
+#         Strings   : count (u32), count + 1 offsets (u32), utf-8 data
+#         Scene     : string indices of the name, UUID and version (3 x u32)
+#         Entity    : raw UUID bytes (N x 16 x u8)
+#         Tag       : string indices (N x u32)
+#         Transform : translation, rotation, scale (N x 9 x f32)
+#         Parent    : entity index of the parent, -1 for roots (N x i32)
+#         S:<name>  : a component with a schema (see ComponentSchemas): count (u32), field count (u32), per field its
+#                     name (string index, u32) and type (u32, index into ComponentField.Types), the entity indices
+#                     (count x u32), then a column per field, each padded to 4 bytes (strings as string indices)
+#         C:<name>  : a component without a schema: count (u32), entity indices (u32), string indices (u32) of its
+#                     YAML data
+# Loading memory-maps the file and copies each column out of the mapped buffer in one go, the mapping is closed once
+# the file has been read.
+class AZ_BINARY:
+    Magic: bytes = b"AZB\0"
+    FormatVersion: int = 2
+
+    __Header: struct.Struct = struct.Struct("<4sHHII")
+    __Entry: struct.Struct = struct.Struct("<16sQQ")
+
+    @staticmethod
+    def Write(columns: SceneColumns, path: Path) -> None:
+        strings: Dict[str, int] = {}
+        def String(value: str) -> int: return strings.setdefault(value, len(strings))
+
+        count = columns.EntityCount
+        blocks: List[Tuple[str, bytes]] = [
+            ("Scene", np.array([ String(columns.Name), String(columns.SceneUUID), String(columns.Version) ], "<u4").tobytes()),
+            ("Entity", b"".join(uuid.bytes for uuid in columns.EntityUUIDs)),
+            ("Tag", np.array([ String(tag) for tag in columns.Tags ], "<u4").tobytes()),
+            ("Transform", np.ascontiguousarray(columns.Transforms, "<f4").reshape(count, 9).tobytes()),
+            ("Parent", np.ascontiguousarray(columns.Parents, "<i4").tobytes()),
+        ]
+
+        types = list(ComponentField.Types)
+        for name, componentColumns in columns.Components.items():
+            fields = componentColumns.Fields
+            header = [ len(componentColumns.Indices), len(fields) ]
+            for fieldName in fields: header += [ String(fieldName), types.index(componentColumns.FieldType(fieldName)) ]
+
+            parts = [ np.array(header, "<u4").tobytes(), np.ascontiguousarray(componentColumns.Indices, "<u4").tobytes() ]
+            for fieldName, column in fields.items():
+                dtype, _, _ = ComponentField.Types[componentColumns.FieldType(fieldName)]
+                part = np.array([ String(value) for value in column ], "<u4").tobytes() if dtype is None else \
+                       np.ascontiguousarray(column, dtype).tobytes()
+                parts.append(part + b"\0" * (-len(part) % 4))
+
+            blocks.append((AZ_BINARY.__BlockName("S:", name), b"".join(parts)))
+
+        for name, (indices, values) in columns.Unregistered.items():
+            data = [ String(AZ_YAML.Dump(value, default_flow_style=True)) for value in values ]
+            blocks.append((
+                AZ_BINARY.__BlockName("C:", name), np.array([ len(indices), *indices, *data ], "<u4").tobytes()
+            ))
+
+        encoded = [ value.encode("utf-8") for value in strings ]
+        offsets = np.cumsum([ 0 ] + [ len(value) for value in encoded ])
+        blocks.insert(0, ("Strings", np.array([ len(encoded), *offsets ], "<u4").tobytes() + b"".join(encoded)))
+
+        directorySize = AZ_BINARY.__Header.size + AZ_BINARY.__Entry.size * len(blocks)
+        offset = AZ_BINARY.__Align(directorySize)
+        entries: List[bytes] = []
+        for name, block in blocks:
+            entries.append(AZ_BINARY.__Entry.pack(name.encode("utf-8"), offset, len(block)))
+            offset = AZ_BINARY.__Align(offset + len(block))
+
+        with AtomicWrite(path, "wb") as file:
+            file.write(AZ_BINARY.__Header.pack(AZ_BINARY.Magic, AZ_BINARY.FormatVersion, 0, count, len(blocks)))
+            file.write(b"".join(entries))
+            for name, block in blocks:
+                file.write(b"\0" * (AZ_BINARY.__Align(file.tell()) - file.tell()))
+                file.write(block)
+
+    @staticmethod
+    def Read(path: Path) -> SceneColumns:
+        with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return AZ_BINARY.__ReadBuffer(buffer, path)
+
+    # Everything returned is copied out of the buffer, so that the mapping can be closed
+    @staticmethod
+    def __ReadBuffer(buffer: mmap.mmap, path: Path) -> SceneColumns:
+        magic, version, _, count, blockCount = AZ_BINARY.__Header.unpack_from(buffer, 0)
+        if magic != AZ_BINARY.Magic or version > AZ_BINARY.FormatVersion:
+            raise ValueError("{} is not a supported AZB file".format(path))
+
+        blocks: Dict[str, Tuple[int, int]] = {}
+        for i in range(blockCount):
+            name, offset, size = AZ_BINARY.__Entry.unpack_from(buffer, AZ_BINARY.__Header.size + i * AZ_BINARY.__Entry.size)
+            blocks[name.rstrip(b"\0").decode("utf-8")] = (offset, size)
+
+        def Array(name: str, dtype: str, shape: Tuple[int, ...]=(-1,)) -> np.ndarray:
+            offset, size = blocks[name]
+            return np.frombuffer(buffer, dtype, size // np.dtype(dtype).itemsize, offset).reshape(shape).copy()
 
-            entities.append(entityDict)
-            
-        data["Entities"] = entities
+        stringOffset, _ = blocks["Strings"]
+        stringCount = int(np.frombuffer(buffer, "<u4", 1, stringOffset)[0])
+        offsets = np.frombuffer(buffer, "<u4", stringCount + 1, stringOffset + 4).tolist()
+        dataStart = stringOffset + 4 * (stringCount + 2)
+        strings = [ buffer[dataStart + offsets[i]:dataStart + offsets[i + 1]].decode("utf-8") for i in range(stringCount) ]
 
-        yaml.add_representer(pyrr.Vector3, AZ_YAML.EncodeVector3)
-        yaml.add_representer(pyrr.Vector4, AZ_YAML.EncodeVector4)
-        with path.open('w') as file: yaml.dump(data, file)
+        name, uuid, sceneVersion = (strings[i] for i in Array("Scene", "<u4").tolist())
+        columns = SceneColumns(name, uuid, sceneVersion)
 
+        uuidBytes = bytes(Array("Entity", "u1"))
+        columns.EntityUUIDs = [ UUID(bytes=uuidBytes[i * 16:i * 16 + 16]) for i in range(count) ]
+        columns.Tags = [ strings[i] for i in Array("Tag", "<u4").tolist() ]
+        columns.Transforms = Array("Transform", "<f4", (count, 9))
+        columns.Parents = Array("Parent", "<i4")
+
+        types = list(ComponentField.Types)
+        for blockName, (offset, _) in blocks.items():
+            if not blockName.startswith("S:"): continue
+
+            componentCount, fieldCount = np.frombuffer(buffer, "<u4", 2, offset).tolist()
+            header = np.frombuffer(buffer, "<u4", 2 * fieldCount, offset + 8).tolist()
+            offset += 8 + 8 * fieldCount
+            indices = np.frombuffer(buffer, "<u4", componentCount, offset).copy()
+            offset += 4 * componentCount
+
+            fields: Dict[str, Any] = {}
+            for i in range(fieldCount):
+                dtype, shape, _ = ComponentField.Types[types[header[2 * i + 1]]]
+                if dtype is None:
+                    fields[strings[header[2 * i]]] = [ strings[j] for j in np.frombuffer(buffer, "<u4", componentCount, offset).tolist() ]
+                    size = 4 * componentCount
+                else:
+                    column = np.frombuffer(buffer, dtype, componentCount * int(np.prod(shape)), offset).copy()
+                    fields[strings[header[2 * i]]] = column.reshape(-1, *shape) if shape else column
+                    size = column.nbytes
+                offset += size + (-size % 4)
+
+            columns.Components[blockName[2:]] = ComponentColumns(indices, fields)
+
+        for blockName in blocks:
+            if not blockName.startswith("C:"): continue
+            values = Array(blockName, "<u4").tolist()
+            componentCount = values[0]
+            indices = values[1:1 + componentCount]
+            data = [ AZ_YAML.Load(strings[i]) for i in values[1 + componentCount:] ]
+
+            # Components that got a schema since the file was written
+            schema = ComponentSchemas.GetByName(blockName[2:])
+            if schema is not None: columns.Components[schema.Name] = ComponentColumns(np.array(indices, np.int64), schema.ColumnsFromYAML(data))
+            else: columns.Unregistered[blockName[2:]] = (indices, data)
+
+        return columns
+
+    @staticmethod
+    def __Align(offset: int) -> int: return (offset + 15) & ~15
+
+    @staticmethod
+    def __BlockName(prefix: str, name: str) -> str:
+        if len((prefix + name).encode("utf-8")) > 16: raise ValueError("Component name {} is too long for AZB".format(name))
+        return prefix + name
+
+# Scenes are saved as YAML (.AZ), the diffable source format, or in the binary format (.AZB) depending on the suffix.
+# Both hold the same data, Convert goes from one to the other without losing anything.
+class SceneSerializer:
+    @staticmethod
+    def IsBinary(path: Path) -> bool: return path.suffix.upper() == ".AZB"
+
+    @staticmethod
+    def Serialize(scene: Scene, path: Path) -> None:
+        SceneSerializer.Write(SceneColumns.FromScene(scene), path)
         ClientLoggers.Info("Scene {}, saved at path: {}", scene.Name, str(path))
 
     @staticmethod
-    def Deserialize(path: Path) -> Scene:
-        yaml.add_constructor("Vector3", AZ_YAML.DecodeVector3) # type: ignore
-        yaml.add_constructor("Vector4", AZ_YAML.DecodeVector4) # type: ignore
+    def Deserialize(path: Path) -> Scene: return SceneSerializer.Read(path).ToScene()
+
+    # Same as Deserialize for every path, with the files parsed on `maxWorkers` processes (one per core by default).
+    # The workers send back SceneColumns, which is cheap to pickle, and the Scenes are built in this process.
+    @staticmethod
+    def DeserializeMany(paths: List[Path], maxWorkers: int | None=None) -> List[Scene]:
+        return [ columns.ToScene() for columns in SceneSerializer.ReadMany(paths, maxWorkers) ]
 
-        data = {}
-        with path.open('r') as file: data = yaml.load(file, yaml.Loader)
+    @staticmethod
+    def Convert(source: Path, destination: Path) -> None:
+        SceneSerializer.Write(SceneSerializer.Read(source), destination)
+
+    @staticmethod
+    def Write(columns: SceneColumns, path: Path) -> None:
+        if SceneSerializer.IsBinary(path):
+            AZ_BINARY.Write(columns, path)
+            return
 
-        scene = Scene(data["Scene"])
-        scene.SetUUID(UUID(data["UUID"]))
+        with AtomicWrite(path) as file: AZ_YAML.Dump(columns.ToData(), file)
 
-        for entityDict in data["Entities"]:
-            uuid = UUID(entityDict["Entity"])
-            name = entityDict["Tag"]
-            entity = scene.CreateEntityWithUUID(name, uuid)
-            entity.GetComponent(TransformComponent).Deserialize(entityDict["Transform"])
+    @staticmethod
+    def Read(path: Path) -> SceneColumns:
+        if SceneSerializer.IsBinary(path): return AZ_BINARY.Read(path)
 
-            for componentType, componentData in entityDict.items():
-                if componentType in ["Entity", "Tag", "Transform"]: continue
+        with path.open('r') as file: data = AZ_YAML.Load(file)
+        return SceneColumns.FromData(data)
 
-        return scene
+    @staticmethod
+    def ReadMany(paths: List[Path], maxWorkers: int | None=None) -> List[SceneColumns]:
+        if len(paths) <= 1 or maxWorkers == 1: return [ SceneSerializer.Read(path) for path in paths ]
+        with ProcessPoolExecutor(maxWorkers) as executor: return list(executor.map(SceneSerializer.Read, paths))
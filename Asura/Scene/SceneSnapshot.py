@@ -0,0 +1,39 @@
+from ..Utility import Dict, Tuple, Any, Iterable
+
+# The state that Scene.Restore goes back to, see Scene.Snapshot.
+# Taking it does not copy the components: entities are only saved the first time they are accessed (copy-on-write),
+# entities created after it are told apart by their handle, as handles only grow.
+class SceneSnapshot:
+    # Every handle up to this one existed when the snapshot was taken
+    __LastEntity: int
+    # Original components of the entities that were accessed since the snapshot, by type
+    __Entities: Dict[int, Dict[type, Any]]
+    # TransformStore.SaveState, the transforms are plain arrays so they are copied up front
+    __TransformState: Tuple | None
+    # The dirty tracking of the Scene when the snapshot was taken, put back by Restore (see Scene.Snapshot)
+    __ChangeState: Tuple
+
+    def __init__(self, lastEntity: int, transformState: Tuple | None, changeState: Tuple) -> None:
+        self.__LastEntity = lastEntity
+        self.__Entities = {}
+        self.__TransformState = transformState
+        self.__ChangeState = changeState
+
+    @property
+    def LastEntity(self) -> int: return self.__LastEntity
+    @property
+    def TransformState(self) -> Tuple | None: return self.__TransformState
+    @property
+    def ChangeState(self) -> Tuple: return self.__ChangeState
+    @property
+    def Entities(self) -> Dict[int, Dict[type, Any]]: return self.__Entities
+
+    # False for the entities created after the snapshot, they are just destroyed on restore
+    def Tracks(self, entity: int) -> bool: return entity <= self.__LastEntity
+
+    def IsSaved(self, entity: int) -> bool: return entity in self.__Entities
+
+    # Only the first save of an entity is kept
+    def Save(self, entity: int, components: Iterable[Any]) -> None:
+        if entity in self.__Entities or entity > self.__LastEntity: return
+        self.__Entities[entity] = { type(component): component for component in components }
@@ -1,10 +1,36 @@
 # This file is only for type checking purposes.
-from typing import Protocol
-import esper
+from typing import Protocol, Collection, Iterator, List, Tuple, Type, Any, Optional
+
+# The part of the esper.World interface that the Scene relies on, see Registry.py for the implementations
+class SupportsEntityRegistry(Protocol):
+    # Handles are never reused, every new entity gets a larger one
+    _next_entity_id: int
+
+    def entities(self) -> Collection[int]: ...
+
+    def create_entity(self, *components: Any) -> int: ...
+    def restore_entity(self, entity: int, *components: Any) -> None: ...
+    def delete_entity(self, entity: int, immediate: bool=False) -> None: ...
+    def entity_exists(self, entity: int) -> bool: ...
+
+    def component_for_entity(self, entity: int, component_type: Type[Any]) -> Any: ...
+    def components_for_entity(self, entity: int) -> Tuple[Any, ...]: ...
+    def has_component(self, entity: int, component_type: Type[Any]) -> bool: ...
+    def has_components(self, entity: int, *component_types: Type[Any]) -> bool: ...
+
+    def add_component(self, entity: int, component_instance: Any, type_alias: Optional[Type[Any]]=None) -> None: ...
+    def remove_component(self, entity: int, component_type: Type[Any]) -> Any: ...
+
+    def get_component(self, component_type: Type[Any]) -> List[Tuple[int, Any]]: ...
+    def get_components(self, *component_types: Type[Any]) -> List[Tuple[int, Any]]: ...
+    def get_columns(self, *component_types: Type[Any]) -> Iterator[Tuple[List[int], Tuple[List[Any], ...]]]: ...
 
 class SupportsScene(Protocol):
     @property
-    def EntityRegistry(self) -> esper.World: ...
+    def EntityRegistry(self) -> SupportsEntityRegistry: ...
+
+    def GetMutableComponent(self, entity, componentType: Type[Any]) -> Any: ...
+    def _CopyOnWrite(self, handle: int, added: Any=None, removed: Any=None) -> None: ...
 
     def OnComponentAdded(self, entity, component) -> None: ...
     def OnComponentRemoved(self, entity, component) -> None: ...
@@ -0,0 +1,439 @@
+from ..Utility import List, Tuple, Any
+
+from threading import RLock
+import numpy as np
+
+# Structure-of-arrays storage for every TransformComponent of a Scene.
+# Live transforms are always packed in [0, Count), removal swaps the last slot into the hole,
+# so systems can work on all transforms of a scene with a single vectorized NumPy call.
+# Every slot also caches its matrix, which is only recomputed when the slot is marked dirty.
+#
+# Reading a matrix can fill the caches, so concurrent readers (systems of the same stage) take __UpdateLock for that,
+# and the dirty flags are only cleared once the matrices are computed: a reader never sees a clean flag on a stale matrix.
+class TransformStore:
+    __Translations : np.ndarray
+    __Rotations    : np.ndarray
+    __Scales       : np.ndarray
+    __Entities     : np.ndarray
+
+    __Matrices : np.ndarray
+    __Dirty    : np.ndarray
+    __Versions : np.ndarray
+
+    # Hierarchy, parents are slot indices in this store (-1 for roots)
+    __Parents       : np.ndarray
+    __WorldMatrices : np.ndarray
+    __WorldDirty    : np.ndarray
+
+    __Levels: List[np.ndarray]
+    __HierarchyChanged: bool
+    __NeedsWorldUpdate: bool
+    __UpdateLock: RLock
+
+    __Components: List
+    __Count: int
+    # Bumped whenever slots are added, removed or moved, so SaveState/RestoreState know if the layout changed
+    __LayoutVersion: int
+    # Bumped when RestoreState changes the layout
+    __Restores: int
+    # Bumped whenever world matrices are recomputed
+    __WorldVersion: int
+    # Bumped on every write to the values, so the Scene can tell it changed since it was saved
+    __ChangeCount: int
+
+    def __init__(self, capacity: int=64) -> None:
+        capacity = max(1, capacity)
+
+        self.__Translations = np.zeros((capacity, 3), dtype=np.float32)
+        self.__Rotations    = np.zeros((capacity, 3), dtype=np.float32)
+        self.__Scales       = np.ones ((capacity, 3), dtype=np.float32)
+        self.__Entities     = np.zeros(capacity, dtype=np.int64)
+
+        self.__Matrices = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.__Dirty    = np.zeros(capacity, dtype=np.bool_)
+        self.__Versions = np.zeros(capacity, dtype=np.uint32)
+
+        self.__Parents       = np.full(capacity, -1, dtype=np.int64)
+        self.__WorldMatrices = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.__WorldDirty    = np.zeros(capacity, dtype=np.bool_)
+
+        self.__Levels = []
+        self.__HierarchyChanged = False
+        self.__NeedsWorldUpdate = False
+        self.__UpdateLock = RLock()
+
+        self.__Components = []
+        self.__Count = 0
+        self.__LayoutVersion = 0
+        self.__Restores = 0
+        self.__WorldVersion = 0
+        self.__ChangeCount = 0
+
+    def __len__(self) -> int: return self.__Count
+
+    @property
+    def Count(self) -> int: return self.__Count
+    @property
+    def Capacity(self) -> int: return self.__Entities.shape[0]
+
+    # All of these are views of the live part of the store, they are invalidated when the store grows
+    @property
+    def Translations(self) -> np.ndarray: return self.__Translations[:self.__Count]
+    @property
+    def Rotations(self) -> np.ndarray: return self.__Rotations[:self.__Count]
+    @property
+    def Scales(self) -> np.ndarray: return self.__Scales[:self.__Count]
+    @property
+    def Entities(self) -> np.ndarray: return self.__Entities[:self.__Count]
+    @property
+    def Parents(self) -> np.ndarray: return self.__Parents[:self.__Count]
+    @property
+    def Components(self) -> List: return self.__Components
+
+    # Cached matrices, only valid for slots which are not dirty (see UpdateMatrices / UpdateWorldMatrices)
+    @property
+    def Matrices(self) -> np.ndarray: return self.__Matrices[:self.__Count]
+    @property
+    def WorldMatrices(self) -> np.ndarray: return self.__WorldMatrices[:self.__Count]
+    @property
+    def Dirty(self) -> np.ndarray: return self.__Dirty[:self.__Count]
+    @property
+    def Versions(self) -> np.ndarray: return self.__Versions[:self.__Count]
+    @property
+    def WorldVersion(self) -> int: return self.__WorldVersion
+    # Changes whenever slots are added, removed or moved (LayoutVersion alone goes back on RestoreState)
+    @property
+    def LayoutKey(self) -> Tuple[int, int]: return self.__LayoutVersion, self.__Restores
+    @property
+    def ChangeCount(self) -> int: return self.__ChangeCount
+    @property
+    def DirtyCount(self) -> int: return int(np.count_nonzero(self.Dirty))
+
+    # Systems writing directly into Translations/Rotations/Scales must mark the slots they touched
+    def MarkDirty(self, indices: int | slice | np.ndarray) -> None:
+        self.__Dirty[:self.__Count][indices] = True
+        self.__WorldDirty[:self.__Count][indices] = True
+        self.__Versions[:self.__Count][indices] += 1
+        self.__ChangeCount += 1
+        self.__NeedsWorldUpdate = True
+
+    def MarkAllDirty(self) -> None: self.MarkDirty(slice(None))
+
+    # Used by TransformComponent, to read and write its own slot
+    def _Translation (self, index: int) -> np.ndarray: return self.__Translations [index]
+    def _Rotation    (self, index: int) -> np.ndarray: return self.__Rotations    [index]
+    def _Scale       (self, index: int) -> np.ndarray: return self.__Scales       [index]
+
+    def _Matrix(self, index: int) -> np.ndarray:
+        if self.__Dirty[index]:
+            with self.__UpdateLock:
+                if self.__Dirty[index]:
+                    TransformStore.ComposeMatrices(
+                        self.__Translations[index:index+1], self.__Rotations[index:index+1], self.__Scales[index:index+1],
+                        self.__Matrices[index:index+1]
+                    )
+                    self.__Dirty[index] = False
+
+        return self.__Matrices[index]
+
+    def _WorldMatrix(self, index: int) -> np.ndarray:
+        if self.__NeedsWorldUpdate: self.UpdateWorldMatrices()
+        return self.__WorldMatrices[index]
+
+    def _Set(
+        self, index: int,
+        translation: float | np.ndarray | None=None, rotation: float | np.ndarray | None=None,
+        scale: float | np.ndarray | None=None
+    ) -> None:
+        if translation is not None : self.__Translations [index] = translation
+        if rotation    is not None : self.__Rotations    [index] = rotation
+        if scale       is not None : self.__Scales       [index] = scale
+
+        self.__Dirty[index] = True
+        self.__WorldDirty[index] = True
+        self.__Versions[index] += 1
+        self.__ChangeCount += 1
+        self.__NeedsWorldUpdate = True
+
+    # Same convention as the per-entity TransformComponent.Transform, i.e. scale @ rotX @ rotY @ rotZ @ location,
+    # for row vectors. All arguments are (N,3) and the result is (N,4,4) float32.
+    @staticmethod
+    def ComposeMatrices(
+        translations: np.ndarray, rotations: np.ndarray, scales: np.ndarray, out: np.ndarray | None=None
+    ) -> np.ndarray:
+        count = translations.shape[0]
+        if out is None: out = np.empty((count, 4, 4), dtype=np.float32)
+
+        cos = np.cos(rotations)
+        sin = np.sin(rotations)
+        cx, cy, cz = cos[:, 0], cos[:, 1], cos[:, 2]
+        sx, sy, sz = sin[:, 0], sin[:, 1], sin[:, 2]
+        scaleX, scaleY, scaleZ = scales[:, 0], scales[:, 1], scales[:, 2]
+
+        # Rows of rotX @ rotY @ rotZ, scaled by the scale matrix on the left
+        out[:, 0, 0] = scaleX *  cy * cz
+        out[:, 0, 1] = scaleX * -cy * sz
+        out[:, 0, 2] = scaleX *  sy
+
+        out[:, 1, 0] = scaleY * ( sx * sy * cz + cx * sz)
+        out[:, 1, 1] = scaleY * (-sx * sy * sz + cx * cz)
+        out[:, 1, 2] = scaleY * -sx * cy
+
+        out[:, 2, 0] = scaleZ * (-cx * sy * cz + sx * sz)
+        out[:, 2, 1] = scaleZ * ( cx * sy * sz + sx * cz)
+        out[:, 2, 2] = scaleZ *  cx * cy
+
+        out[:, :3, 3] = 0.0
+        out[:, 3, :3] = translations
+        out[:, 3, 3] = 1.0
+        return out
+
+    def ComputeMatrices(self, out: np.ndarray | None=None) -> np.ndarray:
+        return TransformStore.ComposeMatrices(self.Translations, self.Rotations, self.Scales, out)
+
+    # Recomputes the cached matrices of the dirty slots only, and returns the indices of those slots.
+    def UpdateMatrices(self) -> np.ndarray:
+        with self.__UpdateLock:
+            dirty = np.flatnonzero(self.Dirty)
+            if dirty.size == 0: return dirty
+
+            if dirty.size == self.__Count:
+                self.ComputeMatrices(self.Matrices)
+            else:
+                self.__Matrices[dirty] = TransformStore.ComposeMatrices(
+                    self.__Translations[dirty], self.__Rotations[dirty], self.__Scales[dirty]
+                )
+
+            self.__Dirty[dirty] = False
+            return dirty
+
+    #------------------------- Start Block: Hierarchy -------------------------
+    def SetParent(self, index: int, parent: int) -> None:
+        self.__Parents[index] = parent
+        self.__WorldDirty[index] = True
+        self.__HierarchyChanged = True
+        self.__NeedsWorldUpdate = True
+
+    # Slots grouped by their depth in the hierarchy, parents always come in an earlier level
+    @property
+    def Levels(self) -> List[np.ndarray]:
+        if self.__HierarchyChanged: self.__RebuildLevels()
+        return self.__Levels
+
+    def __RebuildLevels(self) -> None:
+        parents = self.Parents
+        depths = np.zeros(self.__Count, dtype=np.int64)
+
+        ancestors = parents.copy()
+        hasAncestor = ancestors >= 0
+        while hasAncestor.any():
+            depths[hasAncestor] += 1
+            ancestors[hasAncestor] = parents[ancestors[hasAncestor]]
+            hasAncestor = ancestors >= 0
+
+        order = np.argsort(depths, kind="stable")
+        boundaries = np.flatnonzero(np.diff(depths[order])) + 1
+        self.__Levels = np.split(order, boundaries) if self.__Count else []
+        self.__HierarchyChanged = False
+
+    # Recomputes the world matrices of the dirty slots and of everything below them.
+    # Each depth level is a single batched matrix multiply: world = local @ parentWorld
+    def UpdateWorldMatrices(self) -> None:
+        if not self.__NeedsWorldUpdate: return
+
+        with self.__UpdateLock:
+            # Another reader may have done it while this one waited
+            if not self.__NeedsWorldUpdate: return
+
+            self.__UpdateWorldMatrices()
+            self.__WorldVersion += 1
+            self.__NeedsWorldUpdate = False
+
+    def __UpdateWorldMatrices(self) -> None:
+        self.UpdateMatrices()
+        worldDirty = self.__WorldDirty[:self.__Count]
+
+        levels = self.Levels
+        if len(levels) <= 1:
+            # Flat scene, the world matrices are the local ones
+            dirty = np.flatnonzero(worldDirty)
+            self.__WorldMatrices[dirty] = self.__Matrices[dirty]
+            worldDirty[dirty] = False
+            return
+
+        parents = self.Parents
+        for depth, level in enumerate(levels):
+            if depth == 0:
+                update = level[worldDirty[level]]
+                self.__WorldMatrices[update] = self.__Matrices[update]
+                continue
+
+            # A slot is updated if it, or its parent (and so any ancestor), has been updated
+            update = level[worldDirty[level] | worldDirty[parents[level]]]
+            worldDirty[update] = True
+            self.__WorldMatrices[update] = np.matmul(self.__Matrices[update], self.__WorldMatrices[parents[update]])
+
+        worldDirty[:] = False
+    #--------------------------------- End Block ------------------------------
+
+    def Reserve(self, capacity: int) -> None:
+        if capacity <= self.Capacity: return
+
+        def Grow(array: np.ndarray, fill: float) -> np.ndarray:
+            grown = np.full((capacity, *array.shape[1:]), fill, dtype=array.dtype)
+            grown[:self.__Count] = array[:self.__Count]
+            return grown
+
+        self.__Translations = Grow(self.__Translations, 0.0)
+        self.__Rotations    = Grow(self.__Rotations, 0.0)
+        self.__Scales       = Grow(self.__Scales, 1.0)
+        self.__Entities     = Grow(self.__Entities, 0)
+
+        self.__Matrices = Grow(self.__Matrices, 0.0)
+        self.__Dirty    = Grow(self.__Dirty, False)
+        self.__Versions = Grow(self.__Versions, 0)
+
+        self.__Parents       = Grow(self.__Parents, -1)
+        self.__WorldMatrices = Grow(self.__WorldMatrices, 0.0)
+        self.__WorldDirty    = Grow(self.__WorldDirty, False)
+
+    def Add(
+        self, component: Any, entity: int,
+        translation: float | np.ndarray, rotation: float | np.ndarray, scale: float | np.ndarray
+    ) -> int:
+        if self.__Count == self.Capacity: self.Reserve(self.Capacity * 2)
+
+        index = self.__Count
+        self.__Translations [index] = translation
+        self.__Rotations    [index] = rotation
+        self.__Scales       [index] = scale
+        self.__Entities     [index] = entity
+
+        self.__Dirty    [index] = True
+        self.__Versions [index] = 0
+
+        self.__Parents    [index] = -1
+        self.__WorldDirty [index] = True
+
+        self.__Components.append(component)
+        self.__Count += 1
+        self.__LayoutVersion += 1
+
+        self.__HierarchyChanged = True
+        self.__NeedsWorldUpdate = True
+        return index
+
+    # Adds len(components) slots at once, the values are broadcast (so a single vector works as well).
+    # Returns the index of the first slot, the components are already expected to be bound to the slots in order.
+    def AddMany(
+        self, components: List[Any], entities: int | np.ndarray,
+        translations: float | np.ndarray=0.0, rotations: float | np.ndarray=0.0, scales: float | np.ndarray=1.0
+    ) -> int:
+        start, count = self.__Count, len(components)
+        end = start + count
+
+        if end > self.Capacity:
+            capacity = self.Capacity
+            while capacity < end: capacity *= 2
+            self.Reserve(capacity)
+
+        self.__Translations [start:end] = translations
+        self.__Rotations    [start:end] = rotations
+        self.__Scales       [start:end] = scales
+        self.__Entities     [start:end] = entities
+
+        self.__Dirty    [start:end] = True
+        self.__Versions [start:end] = 0
+
+        self.__Parents    [start:end] = -1
+        self.__WorldDirty [start:end] = True
+
+        self.__Components.extend(components)
+        self.__Count = end
+        self.__LayoutVersion += 1
+
+        self.__HierarchyChanged = True
+        self.__NeedsWorldUpdate = True
+        return start
+
+    def Remove(self, index: int) -> None:
+        last = self.__Count - 1
+        parents = self.Parents
+
+        # Children of the removed slot become roots
+        orphans = parents == index
+        parents[orphans] = -1
+        self.__WorldDirty[:self.__Count][orphans] = True
+
+        if index != last:
+            self.__Translations [index] = self.__Translations [last]
+            self.__Rotations    [index] = self.__Rotations    [last]
+            self.__Scales       [index] = self.__Scales       [last]
+            self.__Entities     [index] = self.__Entities     [last]
+
+            self.__Matrices [index] = self.__Matrices [last]
+            self.__Dirty    [index] = self.__Dirty    [last]
+            self.__Versions [index] = self.__Versions [last]
+
+            self.__Parents       [index] = self.__Parents       [last]
+            self.__WorldMatrices [index] = self.__WorldMatrices [last]
+            self.__WorldDirty    [index] = self.__WorldDirty    [last]
+            parents[parents == last] = index
+
+            moved = self.__Components[last]
+            self.__Components[index] = moved
+            moved._Bind(self, index)
+
+        self.__Components.pop()
+        self.__Scales[last] = 1.0
+        self.__Dirty[last] = False
+        self.__Parents[last] = -1
+        self.__WorldDirty[last] = False
+        self.__Count -= 1
+        self.__LayoutVersion += 1
+
+        self.__HierarchyChanged = True
+        self.__NeedsWorldUpdate = True
+
+    # A copy of the values, hierarchy, layout and change tracking, for Scene.Snapshot.
+    # The matrices are not saved, they are recomputed.
+    def SaveState(self) -> Tuple:
+        count = self.__Count
+        return (
+            count, self.__LayoutVersion, list(self.__Components),
+            self.__Translations[:count].copy(), self.__Rotations[:count].copy(), self.__Scales[:count].copy(),
+            self.__Entities[:count].copy(), self.__Parents[:count].copy(), self.__Versions[:count].copy(),
+            self.__ChangeCount
+        )
+
+    # The versions and ChangeCount go back too, so the store is only dirty if it was when the state was saved
+    def RestoreState(self, state: Tuple) -> None:
+        count, layoutVersion, components, translations, rotations, scales, entities, parents, versions, changeCount = state
+        self.Reserve(count)
+
+        self.__Translations [:count] = translations
+        self.__Rotations    [:count] = rotations
+        self.__Scales       [:count] = scales
+        self.__Entities     [:count] = entities
+        self.__Parents      [:count] = parents
+
+        self.__Dirty      [:count] = True
+        self.__WorldDirty [:count] = True
+        self.__Versions   [:count] = versions
+        self.__ChangeCount = changeCount
+
+        # The components only have to be rebound if slots were added, removed or moved since the save
+        if layoutVersion != self.__LayoutVersion:
+            self.__Restores += 1
+            self.__Components = list(components)
+            for index, component in enumerate(self.__Components): component._Bind(self, index)
+
+            self.__Scales[count:] = 1.0
+            self.__Parents[count:] = -1
+            self.__Dirty[count:] = False
+            self.__WorldDirty[count:] = False
+
+        self.__Count = count
+        self.__LayoutVersion = layoutVersion
+        self.__HierarchyChanged = True
+        self.__NeedsWorldUpdate = True
@@ -1,4 +1,13 @@
 from .Scene import *
 from .Entity import *
 from .Components import *
+from .TransformStore import *
+from .Registry import EsperRegistry, ArchetypeRegistry
+from .QueryView import QueryView
+from .SceneCommandBuffer import SceneCommandBuffer
+from .SystemScheduler import System, SystemScheduler
+from .SceneSnapshot import SceneSnapshot
+from .BVH import BVH
+from .ComponentSchema import ComponentField, ComponentSchema, ComponentSchemas, ComponentColumns
 from .SceneSerializer import *
+from .SceneJournal import SceneJournal
@@ -0,0 +1,36 @@
+from pathlib import Path
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+import os
+import stat
+import tempfile
+
+__all__ = [ "AtomicWrite" ]
+
+# Read once, os.umask can only be read by setting it
+_Umask = os.umask(0)
+os.umask(_Umask)
+
+# Writes to a temporary file next to `path`, which then replaces `path` in one rename if the block succeeds.
+# So a crash (or an exception) midway leaves the previous version of the file untouched, never a partial one.
+# The file keeps the permissions of the one it replaces (a new one gets the usual 0666 minus the umask).
+#     with AtomicWrite(path) as file: file.write(...)
+@contextmanager
+def AtomicWrite(path: Path, mode: str="w") -> Iterator[IO]:
+    descriptor, temporary = tempfile.mkstemp(prefix=".{}.".format(path.name), suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+
+        # mkstemp makes the file readable by its owner only
+        try: permissions = stat.S_IMODE(path.stat().st_mode)
+        except FileNotFoundError: permissions = 0o666 & ~_Umask
+        os.chmod(temporary, permissions)
+
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary): os.unlink(temporary)
+        raise
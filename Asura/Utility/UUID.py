@@ -1,5 +1,12 @@
 from uuid import UUID, uuid3, uuid4, NAMESPACE_URL
-from typing import Callable
+from typing import Callable, List
+
+import os
 
 UUID3Generator: Callable[[str], UUID] = lambda asset: uuid3(NAMESPACE_URL, asset)
 UUID4Generator: Callable[[], UUID] = lambda: uuid4()
+
+# Same as calling UUID4Generator `count` times, but with a single read from the OS random source
+def UUID4BulkGenerator(count: int) -> List[UUID]:
+    randomBytes = os.urandom(16 * count)
+    return [ UUID(bytes=randomBytes[i:i + 16], version=4) for i in range(0, 16 * count, 16) ]
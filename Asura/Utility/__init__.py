@@ -7,5 +7,6 @@ from pathlib import Path
 from .Constants   import *
 from .TimeUtility import *
 from .UUID import *
+from .FileUtility import *
 from .ImageLoader import LoadImage, LoadImageAsTexture
 from .Math import Math
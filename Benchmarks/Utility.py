@@ -0,0 +1,25 @@
+# Hackey Fix for relative path problem, same as in Tests
+# TODO: Try to remove it later
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from time import perf_counter
+from typing import Callable, List, Any
+
+def Measure(function: Callable[[], Any], repeat: int=1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+
+    return best
+
+def SizesFromArguments(default: List[int]) -> List[int]:
+    if len(sys.argv) > 1: return [ int(size) for size in sys.argv[1:] ]
+    return default
+
+def PrintTable(header: List[str], rows: List[List[Any]]) -> None:
+    widths = [ max(len(str(cell)) for cell in column) for column in zip(header, *rows) ]
+    for row in [ header, *rows ]:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(row, widths)))
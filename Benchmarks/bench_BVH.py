@@ -0,0 +1,36 @@
+# Times building/refitting the scene's BVH and compares its queries with a linear scan of the entity bounds.
+# Usage: python Benchmarks/bench_BVH.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+import numpy as np
+
+def Main() -> None:
+    rows = []
+    for count in SizesFromArguments([ 10_000, 100_000 ]):
+        scene = Scene("Benchmark")
+        positions = np.random.default_rng(0).uniform(-500.0, 500.0, (count, 3)).astype(np.float32)
+        handles = scene.CreateEntities(count, translations=positions)
+        for handle in handles: Entity(int(handle), scene).AddComponent(MeshComponent)
+        scene.OnUpdate()
+
+        bvh = scene.SpatialIndex
+        build = Measure(bvh.Rebuild)
+
+        def Refit() -> None:
+            scene.TransformStore.Translations[:] += 0.01 # type: ignore
+            scene.TransformStore.MarkAllDirty() # type: ignore
+            scene.OnUpdate()
+        refit = Measure(Refit)
+
+        low, high = np.array([ -25.0 ] * 3), np.array([ 25.0 ] * 3)
+        query = Measure(lambda: bvh.QueryAABB(low, high), repeat=20)
+        linear = Measure(lambda: handles[np.all((positions + 0.5 >= low) & (positions - 0.5 <= high), axis=1)], repeat=20)
+        ray = Measure(lambda: bvh.Raycast([ -600.0, 0.0, 0.0 ], [ 1.0, 0.01, 0.0 ]), repeat=20)
+
+        rows.append([ count, "{:.1f}".format(build * 1000), "{:.1f}".format(refit * 1000),
+                      "{:.3f}".format(query * 1000), "{:.3f}".format(linear * 1000), "{:.3f}".format(ray * 1000) ])
+
+    PrintTable([ "Entities", "Build (ms)", "Refit (ms)", "AABB (ms)", "Linear AABB (ms)", "Ray (ms)" ], rows)
+
+if __name__ == "__main__": Main()
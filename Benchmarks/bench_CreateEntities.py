@@ -0,0 +1,25 @@
+# Compares spawning entities one by one with CreateEntity and in bulk with CreateEntities.
+# Usage: python Benchmarks/bench_CreateEntities.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+import numpy as np
+
+def CreateOneByOne(count: int) -> None:
+    scene = Scene("Benchmark")
+    for i in range(count): scene.CreateEntity("Entity")
+
+def CreateInBulk(count: int) -> None:
+    scene = Scene("Benchmark")
+    scene.CreateEntities(count, "Entity", translations=np.zeros((count, 3), dtype=np.float32))
+
+def Main() -> None:
+    rows = []
+    for count in SizesFromArguments([ 10_000, 100_000 ]):
+        single = Measure(lambda: CreateOneByOne(count))
+        bulk = Measure(lambda: CreateInBulk(count))
+        rows.append([ count, "{:.3f}".format(single), "{:.3f}".format(bulk), "{:.1f}x".format(single / bulk) ])
+
+    PrintTable([ "Entities", "CreateEntity (s)", "CreateEntities (s)", "Speedup" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,48 @@
+# Compares walking a scene through the List[Entity] properties and through the EntityView iterators,
+# both in time and in the garbage created per frame.
+# Usage: python Benchmarks/bench_EntityIteration.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+import gc
+import tracemalloc
+
+def WalkLists(scene: Scene) -> None:
+    for entity in scene.Entities: entity.EntityHandle
+    for entity in scene.GetEntitysWithComponent(TagComponent): entity.EntityHandle
+
+def WalkIterators(scene: Scene) -> None:
+    for entity in scene.IterEntities(): entity.EntityHandle
+    for entity, _ in scene.IterEntitiesWithComponent(TagComponent): entity.EntityHandle
+
+def PeakAllocation(function, scene: Scene) -> int:
+    tracemalloc.start()
+    function(scene)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def Collections(function, scene: Scene, frames: int) -> int:
+    gc.collect()
+    before = sum(stat["collections"] for stat in gc.get_stats())
+    for _ in range(frames): function(scene)
+    return sum(stat["collections"] for stat in gc.get_stats()) - before
+
+def Main() -> None:
+    frames = 10
+    rows = []
+    for count in SizesFromArguments([ 10_000, 100_000 ]):
+        scene = Scene("Benchmark")
+        for i in range(count): scene.CreateEntity("Entity{}".format(i))
+
+        for name, function in [ ("List[Entity]", WalkLists), ("EntityView", WalkIterators) ]:
+            rows.append([
+                count, name,
+                "{:.2f}".format(Measure(lambda: function(scene), repeat=3) * 1000),
+                "{:.1f}".format(PeakAllocation(function, scene) / 1024),
+                Collections(function, scene, frames)
+            ])
+
+    PrintTable([ "Entities", "Method", "Frame (ms)", "Peak alloc (KiB)", "GC runs / {} frames".format(frames) ], rows)
+
+if __name__ == "__main__": Main()
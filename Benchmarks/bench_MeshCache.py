@@ -0,0 +1,39 @@
+# Loading an OBJ model through pywavefront, against reading it back from the MeshCache.
+# Usage: python Benchmarks/bench_MeshCache.py [grid sizes...]
+from Utility import *
+from Asura.Assets import *
+
+from pathlib import Path
+import tempfile
+
+# A size x size grid of quads
+def WriteGrid(path: Path, size: int) -> None:
+    lines = [ "v {} {} 0".format(x, y) for y in range(size + 1) for x in range(size + 1) ]
+    lines += [ "vt {} {}".format(x / size, y / size) for y in range(size + 1) for x in range(size + 1) ]
+    lines.append("vn 0 0 1")
+    for y in range(size):
+        for x in range(size):
+            a = y * (size + 1) + x + 1
+            lines.append("f " + " ".join("{0}/{0}/1".format(i) for i in [ a, a + 1, a + size + 2, a + size + 1 ]))
+
+    path.write_text("\n".join(lines))
+
+def Main() -> None:
+    rows = []
+    directory = Path(tempfile.mkdtemp())
+    cache = MeshCache(directory / "Cache")
+    for size in SizesFromArguments([ 50, 200 ]):
+        path = directory / "Grid{}.obj".format(size)
+        WriteGrid(path, size)
+        OBJLoader.ImportCached(path, cache)
+
+        parse = Measure(lambda: OBJLoader.Import(path))
+        cached = Measure(lambda: LoadModel(path, cache), 5)
+
+        model = LoadModel(path, cache)
+        rows.append([ 2 * size * size, "{:.1f}".format(parse * 1000), "{:.2f}".format(cached * 1000),
+                      "{:.0f}".format((model.Vertices.nbytes + model.Indices.nbytes) / 1024) ])
+
+    PrintTable([ "Triangles", "Import (ms)", "Cached load (ms)", "Model (KiB)" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,27 @@
+# Parsing throughput of the OBJ loaders: OBJLoader (pywavefront) against StreamOBJLoader (NumPy).
+# Usage: python Benchmarks/bench_OBJLoader.py [grid sizes...]
+from Utility import *
+from Asura.Assets import *
+from bench_MeshCache import WriteGrid
+
+from pathlib import Path
+import tempfile
+
+def Main() -> None:
+    rows = []
+    directory = Path(tempfile.mkdtemp())
+    for size in SizesFromArguments([ 100, 300 ]):
+        path = directory / "Grid{}.obj".format(size)
+        WriteGrid(path, size)
+        megabytes = path.stat().st_size / (1 << 20)
+
+        pywavefront = Measure(lambda: OBJLoader.Import(path))
+        stream = Measure(lambda: StreamOBJLoader.Import(path), 3)
+        assert StreamOBJLoader.Import(path).IndexCount == OBJLoader.Import(path).IndexCount
+
+        rows.append([ 2 * size * size, "{:.1f}".format(megabytes), "{:.1f}".format(megabytes / pywavefront),
+                      "{:.1f}".format(megabytes / stream), "{:.1f}x".format(pywavefront / stream) ])
+
+    PrintTable([ "Triangles", "Size (MB)", "OBJLoader (MB/s)", "StreamOBJLoader (MB/s)", "Speedup" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,35 @@
+# Times opening a project with many scenes, which only reads the scene handles, against loading every scene
+# one by one (GetScene) or on every core (LoadAllScenes).
+# Usage: python Benchmarks/bench_Project.py [scene counts...]
+from Utility import *
+from Asura.Project import *
+
+from pathlib import Path
+import tempfile
+import os
+
+EntitiesPerScene = 500
+
+def Main() -> None:
+    rows = []
+    for count in SizesFromArguments([ 10, 30 ]):
+        location = Path(tempfile.mkdtemp()) / "Benchmark"
+        project = Project(location, "Benchmark")
+        for i in range(count):
+            scene = Scene("Level{}".format(i))
+            scene.CreateEntities(EntitiesPerScene)
+            project.RegisterScene(scene)
+        project.Save()
+
+        opened: List[Project] = []
+        openTime = Measure(lambda: opened.append(Project(location, "Benchmark")))
+        loadAll = Measure(lambda: [ opened[-1].GetScene(i) for i in range(opened[-1].SceneCount) ])
+        loadParallel = Measure(lambda: Project(location, "Benchmark").LoadAllScenes())
+
+        rows.append([ count, "{:.1f}".format(openTime * 1000), "{:.0f}".format(loadAll * 1000),
+                      "{:.0f}".format(loadParallel * 1000) ])
+
+    print("{} cores".format(os.cpu_count()))
+    PrintTable([ "Scenes", "Open project (ms)", "Load every scene (ms)", "LoadAllScenes (ms)" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,59 @@
+# Compares the esper backed registry with the archetype one.
+# Usage: python Benchmarks/bench_Registry.py [entity counts...]
+from Utility import *
+from Asura.Scene.Registry import EsperRegistry, ArchetypeRegistry
+
+class Position:
+    def __init__(self) -> None: self.X = 0.0
+class Velocity:
+    def __init__(self) -> None: self.X = 1.0
+class Tag:
+    pass
+
+def Populate(registry, count: int) -> None:
+    for i in range(count):
+        if   i % 3 == 0: registry.create_entity(Position(), Velocity(), Tag())
+        elif i % 3 == 1: registry.create_entity(Position(), Velocity())
+        else           : registry.create_entity(Position())
+
+def IterateSingle(registry) -> None:
+    for _, position in registry.get_component(Position): position.X
+
+def IterateMultiple(registry) -> None:
+    for _, (position, velocity) in registry.get_components(Position, Velocity): position.X += velocity.X
+
+def IterateColumns(registry) -> None:
+    for _, (positions, velocities) in registry.get_columns(Position, Velocity):
+        for position, velocity in zip(positions, velocities): position.X += velocity.X
+
+def AddRemove(registry, count: int) -> None:
+    entities = list(registry.entities())[:count // 10]
+    for entity in entities: registry.add_component(entity, Tag())
+    for entity in entities: registry.remove_component(entity, Tag)
+
+def Main() -> None:
+    rows = []
+    for count in SizesFromArguments([ 10_000, 100_000, 1_000_000 ]):
+        for registryType in [ EsperRegistry, ArchetypeRegistry ]:
+            registry = registryType()
+            create = Measure(lambda: Populate(registry, count))
+
+            # Multi-component queries are cached by esper until the next structural change
+            registry.clear_cache()
+            single   = Measure(lambda: IterateSingle(registry))
+            registry.clear_cache()
+            multiple = Measure(lambda: IterateMultiple(registry))
+            columns  = Measure(lambda: IterateColumns(registry))
+            addRemove = Measure(lambda: AddRemove(registry, count))
+
+            rows.append([
+                count, registryType.__name__,
+                *[ "{:.1f}".format(t * 1000) for t in (create, single, multiple, columns, addRemove) ]
+            ])
+
+    PrintTable(
+        [ "Entities", "Registry", "Create (ms)", "1 Comp (ms)", "2 Comps (ms)", "Columns (ms)", "Add/Remove 10% (ms)" ],
+        rows
+    )
+
+if __name__ == "__main__": Main()
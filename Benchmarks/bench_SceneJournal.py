@@ -0,0 +1,32 @@
+# Cost of an autosave through SceneJournal.Flush, against serializing the whole scene, when 10 entities changed.
+# Usage: python Benchmarks/bench_SceneJournal.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+from pathlib import Path
+import tempfile
+import pyrr
+
+def Main() -> None:
+    rows = []
+    directory = Path(tempfile.mkdtemp())
+    for count in SizesFromArguments([ 1_000, 10_000 ]):
+        scene = Scene("Benchmark")
+        handles = scene.CreateEntities(count)
+        path = directory / "Benchmark{}.AZ".format(count)
+        SceneSerializer.Serialize(scene, path)
+        scene.MarkSaved()
+
+        journal = SceneJournal(scene, path, compactRatio=float("inf"))
+        def Change() -> None:
+            for handle in handles[:10]:
+                Entity(int(handle), scene).GetComponent(TransformComponent).Translate(pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+
+        flush = Measure(lambda: (Change(), journal.Flush()), 5)
+        full = Measure(lambda: (Change(), SceneSerializer.Serialize(scene, path)))
+
+        rows.append([ count, "{:.2f}".format(flush * 1000), "{:.0f}".format(full * 1000) ])
+
+    PrintTable([ "Entities", "Journal flush (ms)", "Serialize (ms)" ], rows)
+
+if __name__ == "__main__": Main()
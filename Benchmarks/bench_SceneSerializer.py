@@ -0,0 +1,35 @@
+# Times saving and loading a scene as YAML (.AZ) and in the binary format (.AZB).
+# "Read" is only parsing the file into SceneColumns, "Load" also builds the Scene.
+# Usage: python Benchmarks/bench_SceneSerializer.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+from pathlib import Path
+import tempfile
+import numpy as np
+
+def Main() -> None:
+    rows = []
+    directory = Path(tempfile.mkdtemp())
+    for count in SizesFromArguments([ 1_000, 10_000 ]):
+        scene = Scene("Benchmark")
+        random = np.random.default_rng(69)
+        handles = scene.CreateEntities(count, translations=random.uniform(-100.0, 100.0, (count, 3)))
+        # Every 10th entity is the parent of the next 9
+        for i in range(count):
+            if i % 10: scene.SetParent(Entity(int(handles[i]), scene), Entity(int(handles[i - i % 10]), scene))
+        # and every entity has a mesh, saved through its ComponentSchema
+        for handle in handles.tolist(): Entity(handle, scene).AddComponentInstance(MeshComponent())
+
+        for suffix in [ ".AZ", ".AZB" ]:
+            path = directory / "Benchmark{}".format(suffix)
+            save = Measure(lambda: SceneSerializer.Serialize(scene, path))
+            read = Measure(lambda: SceneSerializer.Read(path), 3)
+            load = Measure(lambda: SceneSerializer.Deserialize(path))
+
+            rows.append([ count, suffix, "{:.1f}".format(save * 1000), "{:.1f}".format(read * 1000),
+                          "{:.1f}".format(load * 1000), "{:.0f}".format(path.stat().st_size / 1024) ])
+
+    PrintTable([ "Entities", "Format", "Save (ms)", "Read (ms)", "Load (ms)", "Size (KiB)" ], rows)
+
+if __name__ == "__main__": Main()
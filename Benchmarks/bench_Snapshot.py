@@ -0,0 +1,28 @@
+# Times entering and leaving play mode with Scene.Snapshot/Restore, against copying every entity with DuplicateEntity.
+# Usage: python Benchmarks/bench_Snapshot.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+import numpy as np
+
+def Main() -> None:
+    rows = []
+    for count in SizesFromArguments([ 10_000, 100_000 ]):
+        scene = Scene("Benchmark")
+        handles = scene.CreateEntities(count)
+        # 1% of the entities are changed while playing
+        changed = [ Entity(int(handle), scene) for handle in handles[::100] ]
+
+        snapshot = Measure(scene.Snapshot)
+        for entity in changed: entity.GetMutableComponent(TagComponent).Tag = "Changed"
+        scene.TransformStore.Translations[:] += 1.0 # type: ignore
+        restore = Measure(scene.Restore)
+
+        duplicate = Measure(lambda: [ scene.DuplicateEntity(entity) for entity in scene.Entities[:count // 10] ]) * 10
+
+        rows.append([ count, "{:.2f}".format(snapshot * 1000), "{:.2f}".format(restore * 1000),
+                      "{:.0f}".format(duplicate * 1000) ])
+
+    PrintTable([ "Entities", "Snapshot (ms)", "Restore (ms)", "DuplicateEntity copy (ms, est.)" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,32 @@
+# Runs independent NumPy heavy systems one after the other and through the SystemScheduler's thread pool.
+# Usage: python Benchmarks/bench_SystemScheduler.py [array sizes...]
+from Utility import *
+from Asura.Scene import SystemScheduler
+
+import numpy as np
+
+def MakeSystem(size: int):
+    data = np.random.rand(size, 3).astype(np.float32)
+    def Function(scene, dt: float) -> None: np.sin(data, out=data); np.sqrt(np.abs(data), out=data)
+    return Function
+
+def Main() -> None:
+    systemCount = 8
+    rows = []
+    for size in SizesFromArguments([ 1_000_000, 4_000_000 ]):
+        functions = [ MakeSystem(size) for _ in range(systemCount) ]
+
+        scheduler = SystemScheduler()
+        # Every system writes its own component type, so none of them conflict
+        for i, function in enumerate(functions): scheduler.AddSystem(str(i), function, writes=(type(str(i), (), {}),))
+
+        serial = Measure(lambda: [ function(None, 0.0) for function in functions ], repeat=3)
+        parallel = Measure(lambda: scheduler.Run(None, 0.0), repeat=3)
+        scheduler.Shutdown()
+
+        rows.append([ size, systemCount, "{:.2f}".format(serial * 1000), "{:.2f}".format(parallel * 1000),
+                      "{:.1f}x".format(serial / parallel) ])
+
+    PrintTable([ "Rows", "Systems", "Serial (ms)", "Scheduler (ms)", "Speedup" ], rows)
+
+if __name__ == "__main__": Main()
@@ -0,0 +1,31 @@
+# Scene save/load throughput of the YAML format, with the libyaml classes against the pure Python ones.
+# Usage: python Benchmarks/bench_YAML.py [entity counts...]
+from Utility import *
+from Asura.Scene import *
+
+from pathlib import Path
+import tempfile
+import yaml
+
+def Main() -> None:
+    paths = { "Python": (AZ_PyLoader, AZ_PyDumper) }
+    if yaml.__with_libyaml__: paths["libyaml"] = (AZ_CLoader, AZ_CDumper) # type: ignore
+    default = AZ_YAML.Loader, AZ_YAML.Dumper
+
+    rows = []
+    path = Path(tempfile.mkdtemp()) / "Benchmark.AZ"
+    for count in SizesFromArguments([ 1_000, 5_000 ]):
+        scene = Scene("Benchmark")
+        scene.CreateEntities(count)
+
+        for name, (loader, dumper) in paths.items():
+            AZ_YAML.Loader, AZ_YAML.Dumper = loader, dumper
+            save = Measure(lambda: SceneSerializer.Serialize(scene, path))
+            load = Measure(lambda: SceneSerializer.Deserialize(path))
+            rows.append([ count, name, "{:.0f}".format(count / save), "{:.0f}".format(count / load) ])
+
+        AZ_YAML.Loader, AZ_YAML.Dumper = default
+
+    PrintTable([ "Entities", "YAML", "Save (entities/s)", "Load (entities/s)" ], rows)
+
+if __name__ == "__main__": Main()
@@ -37,6 +37,9 @@ class EditorLayer(Overlay):
     __EditorCamera: EditorCamera
 
     __CurrentProject: Project
+    # Seconds since the last autosave, the scenes are autosaved every AutosaveInterval seconds while editing
+    __TimeSinceAutosave: float
+    AutosaveInterval: float = 30.0
 
     __ActiveScene: Scene
     __EditorScene: Scene
@@ -83,7 +86,10 @@ class EditorLayer(Overlay):
     def OnInitialize(self) -> None:
         self.__dt = 0.00001
         self.__CurrentProject = Project(Path("DefaultProject"), "DefaultProject")
+        self.__TimeSinceAutosave = 0.0
         self.__EditorScene = self.__CurrentProject.GetScene(0)
+        # Kept loaded while it is edited, so that Save always sees its changes
+        self.__CurrentProject.PinScene(self.__EditorScene)
 
         self.__ActiveScene = self.__EditorScene
 
@@ -177,6 +183,13 @@ class EditorLayer(Overlay):
 
         return False
 
+    def __Autosave(self, dt: float) -> None:
+        self.__TimeSinceAutosave += dt
+        if self.__TimeSinceAutosave < self.AutosaveInterval: return
+
+        self.__CurrentProject.Autosave()
+        self.__TimeSinceAutosave = 0.0
+
     def OnUpdate(self, dt: float) -> None:
         self.__dt = dt
 
@@ -185,6 +198,9 @@ class EditorLayer(Overlay):
         renderCamera = self.__EditorCamera
         if _SceneStateManager.IsEditing() or _SceneStateManager.IsPaused():
             self.__ActiveScene.OnUpdateEditor(dt)
+
+            # Not while playing (or paused), the changes made then are thrown away on stop
+            if _SceneStateManager.IsEditing(): self.__Autosave(dt)
         elif _SceneStateManager.IsPlaying():
             self.__ActiveScene.OnUpdateRuntime(dt)
 
@@ -252,10 +268,10 @@ class EditorLayer(Overlay):
 
     #--------------------- Start Block: Viewport ---------------------
     def __PlayScene(self) -> None:
-        # TODO: Create a copy of the scene
-        # Probabaly add SceneSerilizer.Copy() method
         self.__Panels.GetPanelOfType(SceneHierarchyPanel).SetSelectionContext(None) # type: ignore
 
+        # Restored in __StopScene, so that nothing done while playing changes the edited scene (see Scene.Snapshot)
+        self.__ActiveScene.Snapshot()
         self.__ActiveScene.OnStart()
         _SceneStateManager.SwitchToPlay()
 
@@ -272,6 +288,7 @@ class EditorLayer(Overlay):
     def __StopScene(self) -> None:
         self.__Panels.GetPanelOfType(SceneHierarchyPanel).SetSelectionContext(None) # type: ignore
         self.__ActiveScene.OnStop()
+        self.__ActiveScene.Restore()
         _SceneStateManager.SwitchToEdit()
 
     def __ShowViewportToolbarButtons(self) -> None:
@@ -387,6 +404,9 @@ class EditorLayer(Overlay):
             imgui.text("FPS: {}".format(int(1 / self.__dt)))
             imgui.text("Is blocking: {}".format(self.__IsBlocking))
 
+            stats = self.__Renderer.Stats
+            imgui.text("Culling: {} visible of {}".format(stats.Visible, stats.Tested))
+
             if self.__IsBlocking: return
 
             mousePosition = Input.GetMousePosition()
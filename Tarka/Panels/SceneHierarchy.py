@@ -51,7 +51,10 @@ class SceneHierarchyPanel(Panel):
             return
 
         with imgui.begin("Scene Heirarchy"):
-            for entity in self.__Context.Entities: self.__DrawEntityNode(entity)
+            # NOTE: IterEntities yields the same (rebound) EntityView, so only its handle is passed on
+            for entity in self.__Context.IterEntities():
+                if not entity.HasComponent(RelationshipComponent) or not entity.GetComponent(RelationshipComponent).Parent:
+                    self.__DrawEntityNode(int(entity))
             if imgui.is_mouse_down(0) and imgui.is_window_hovered(): self.__SelectionContext = None
 
             if imgui.begin_popup_context_window(popup_flags=imgui.POPUP_NO_OPEN_OVER_ITEMS|imgui.POPUP_MOUSE_BUTTON_RIGHT):
@@ -65,20 +68,25 @@ class SceneHierarchyPanel(Panel):
             if not self.__SelectionContext: return
             self.__DrawComponents(self.__SelectionContext)
     
-    def __DrawEntityNode(self, entity: Entity) -> None:
+    # Returns the next sibling of the entity, so that the children are walked through
+    # RelationshipComponent.FirstChild/NextSibling without building a list of them
+    def __DrawEntityNode(self, handle: int) -> int:
         if not self.__Context:
             ClientLoggers.Error("You need to set Context before calling OnGUIRender")
-            return
+            return 0
         
+        entity = Entity(handle, self.__Context)
         tag = entity.GetComponent(TagComponent)
+        relationship = entity.GetComponent(RelationshipComponent) if entity.HasComponent(RelationshipComponent) else None
+        firstChild, nextSibling = (relationship.FirstChild, relationship.NextSibling) if relationship else (0, 0)
 
         flags = 0
         if self.__SelectionContext == entity: flags |= imgui.TREE_NODE_SELECTED
+        if not firstChild: flags |= imgui.TREE_NODE_LEAF
         flags |= imgui.TREE_NODE_OPEN_ON_ARROW | imgui.TREE_NODE_SPAN_AVAILABLE_WIDTH
 
         # Adding this to make each entity unique
-        # NOTE: int(entity) retrives its __EntityHandle
-        opened = imgui.tree_node(str(tag) + f"##{int(entity)}", flags)
+        opened = imgui.tree_node(str(tag) + f"##{handle}", flags)
         if imgui.is_item_clicked(): self.__SelectionContext = entity
 
         if imgui.begin_popup_context_item():
@@ -88,12 +96,17 @@ class SceneHierarchyPanel(Panel):
                 if self.__SelectionContext == entity: self.__SelectionContext = None
             imgui.end_popup()
 
-        if opened: imgui.tree_pop()
+        if opened:
+            child = firstChild
+            while child: child = self.__DrawEntityNode(child)
+            imgui.tree_pop()
+
+        return nextSibling
 
     def __DrawComponents(self, entity: Entity) -> None:
         if entity.HasComponent(TagComponent):
-            tag = entity.GetComponent(TagComponent).Tag
-            _, entity.GetComponent(TagComponent).Tag = imgui.input_text("##Tag", tag, 256)
+            changed, tag = imgui.input_text("##Tag", entity.GetComponent(TagComponent).Tag, 256)
+            if changed: entity.GetMutableComponent(TagComponent).Tag = tag
 
             imgui.same_line()
             imgui.push_item_width(-1)
@@ -143,6 +156,8 @@ class SceneHierarchyPanel(Panel):
         flags |= imgui.TREE_NODE_ALLOW_ITEM_OVERLAP
         flags |= imgui.TREE_NODE_FRAME_PADDING
 
+        # Drawers only read from it, they go through entity.GetMutableComponent to write (which marks the scene dirty).
+        # Transforms are tracked by the TransformStore instead.
         component = entity.GetComponent(componentType)
         contentRegionAvailable = imgui.get_content_region_available()
 
@@ -0,0 +1,109 @@
+from Utility import *
+from Asura.Scene import *
+
+import numpy as np
+import pyrr
+
+def MakeScene(count: int, seed: int=0) -> Tuple[Scene, np.ndarray, np.ndarray]:
+    scene = Scene("TestScene")
+    positions = np.random.default_rng(seed).uniform(-50.0, 50.0, (count, 3)).astype(np.float32)
+    handles = scene.CreateEntities(count, translations=positions)
+    for handle in handles: Entity(int(handle), scene).AddComponent(MeshComponent)
+    scene.OnUpdate()
+    return scene, handles, positions
+
+def Overlapping(handles: np.ndarray, positions: np.ndarray, low, high) -> set:
+    mask = np.all((positions + 0.5 >= low) & (positions - 0.5 <= high), axis=1)
+    return set(handles[mask].tolist())
+
+def test_BVHQueries() -> None:
+    scene, handles, positions = MakeScene(2000)
+    bvh = scene.SpatialIndex
+    assert set(bvh.Entities.tolist()) == set(handles.tolist())
+
+    low, high = np.array([ -10.0, -20.0, -5.0 ]), np.array([ 15.0, 0.0, 25.0 ])
+    assert set(bvh.QueryAABB(low, high).tolist()) == Overlapping(handles, positions, low, high)
+
+    center, radius = np.array([ 3.0, -4.0, 10.0 ]), 12.0
+    closest = np.clip(center, positions - 0.5, positions + 0.5)
+    expected = handles[np.sum((closest - center) ** 2, axis=1) <= radius * radius]
+    assert set(bvh.QuerySphere(center, radius).tolist()) == set(expected.tolist())
+
+    # A symmetric orthographic frustum is just a box
+    planes = BVH.FrustumPlanes(pyrr.matrix44.create_orthogonal_projection(-10, 10, -10, 10, -10, 10))
+    assert set(bvh.QueryFrustum(planes).tolist()) == Overlapping(handles, positions, -10.0, 10.0)
+
+    # Rays, including one parallel to two of the axes
+    target = positions[7]
+    entities, distances = bvh.Raycast(target + [ -100.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ])
+    assert int(handles[7]) in entities.tolist()
+    assert np.all(np.diff(distances) >= 0.0)
+    assert distances[entities.tolist().index(int(handles[7]))] == pytest.approx(99.5, abs=1e-3)
+
+    entities, _ = bvh.Raycast(target + [ -100.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ], maxDistance=50.0)
+    assert int(handles[7]) not in entities.tolist()
+
+def test_BVHUpdate() -> None:
+    scene, handles, positions = MakeScene(500, seed=1)
+    bvh = scene.SpatialIndex
+    nodes = bvh.NodeCount
+
+    # Moving everything only refits
+    scene.TransformStore.Translations[:] += 100.0 # type: ignore
+    scene.TransformStore.MarkAllDirty() # type: ignore
+    scene.OnUpdate()
+    assert bvh.NodeCount == nodes
+    assert np.allclose(bvh.Bounds[0], positions.min(axis=0) + 99.5)
+    assert set(bvh.QueryAABB([ 90.0 ] * 3, [ 110.0 ] * 3).tolist()) == \
+           Overlapping(handles, positions + 100.0, 90.0, 110.0)
+
+    # Writing to a box through GetMutableComponent, or replacing a mesh, only refits
+    entities = bvh.Entities
+    first = Entity(int(handles[1]), scene)
+    first.GetMutableComponent(MeshComponent).Max[0] = 10.0
+    second = Entity(int(handles[2]), scene)
+    second.RemoveComponent(MeshComponent)
+    second.AddComponent(MeshComponent, pyrr.Vector3([ -3.0, -3.0, -3.0 ]), pyrr.Vector3([ 3.0, 3.0, 3.0 ]))
+    scene.OnUpdate()
+
+    assert bvh.Entities is entities
+    assert int(handles[1]) in bvh.QueryAABB(positions[1] + [ 109.0, 100.0, 100.0 ], positions[1] + [ 109.0, 100.0, 100.0 ]).tolist()
+    assert int(handles[2]) in bvh.QueryAABB(positions[2] + [ 102.5 ] * 3, positions[2] + [ 102.5 ] * 3).tolist()
+
+    # Adding/removing meshes rebuilds
+    scene.DestroyEntity(Entity(int(handles[0]), scene))
+    added = scene.CreateEntity("Added")
+    added.AddComponent(MeshComponent, pyrr.Vector3([ -1.0, -1.0, -1.0 ]), pyrr.Vector3([ 1.0, 1.0, 1.0 ]))
+    scene.OnUpdate()
+
+    assert int(handles[0]) not in bvh.Entities.tolist()
+    assert int(added) in bvh.QuerySphere([ 0.0, 0.0, 0.0 ], 0.1).tolist()
+
+    # Entities without a mesh are not indexed, and an empty index answers nothing
+    assert len(Scene("Empty").SpatialIndex.QueryAABB([ -1.0 ] * 3, [ 1.0 ] * 3)) == 0
+
+def test_FrustumCulling() -> None:
+    scene, handles, positions = MakeScene(1000, seed=2)
+    bvh = scene.SpatialIndex
+
+    view = pyrr.matrix44.create_look_at(pyrr.Vector3([ 0.0, 0.0, 60.0 ]), pyrr.Vector3([ 0.0, 0.0, 0.0 ]), pyrr.Vector3([ 0.0, 1.0, 0.0 ]))
+    projection = pyrr.matrix44.create_perspective_projection(45.0, 1.5, 0.1, 100.0)
+    planes = BVH.FrustumPlanes(view @ projection)
+
+    # The flat test over all the boxes agrees with the tree
+    mins, maxs = bvh.PrimitiveBounds
+    visible = bvh.Entities[BVH.TestFrustum(planes, mins, maxs)]
+    assert 0 < len(visible) < len(handles)
+    assert set(visible.tolist()) == set(bvh.QueryFrustum(planes).tolist())
+
+    # Every entity whose center projects inside the clip volume is kept
+    clip = np.hstack((positions, np.ones((len(positions), 1), np.float32))) @ np.asarray(view @ projection)
+    inside = np.all(np.abs(clip[:, :3]) <= clip[:, 3:], axis=1) & (clip[:, 3] > 0)
+    assert set(handles[inside].tolist()) <= set(visible.tolist())
+
+    matrices = scene.GetWorldMatrices(visible)
+    assert np.allclose(matrices[:, 3, :3], positions[np.searchsorted(handles, visible)])
+
+    # The boxes the renderer computes from the interpolated matrices are the index's ones without interpolation
+    worldMin, worldMax = BVH.WorldBounds(*bvh.LocalBounds, scene.GetWorldMatrices(bvh.Entities))
+    assert np.allclose(worldMin, mins) and np.allclose(worldMax, maxs)
@@ -0,0 +1,182 @@
+from Utility import *
+from Asura.Project import *
+
+import pyrr
+
+def test_DirtyTracking() -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+    assert scene.IsDirty
+
+    scene.MarkSaved()
+    assert not scene.IsDirty
+
+    # Reads do not make the scene dirty
+    entity.GetComponent(TagComponent)
+    entity.GetComponent(TransformComponent).Transform
+    assert not scene.IsDirty
+
+    for change in [
+        lambda: entity.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 0.0, 0.0 ])),
+        lambda: entity.GetMutableComponent(TagComponent),
+        lambda: entity.AddComponent(MeshComponent),
+        lambda: entity.RemoveComponent(MeshComponent),
+        lambda: scene.SetParent(scene.CreateEntity("Child"), entity),
+        lambda: scene.CreateEntities(10),
+        lambda: (scene.DestroyEntity(entity), scene.OnUpdate()),
+    ]:
+        scene.MarkSaved()
+        change()
+        assert scene.IsDirty
+
+def test_ProjectSave(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    other = Scene("OtherScene")
+    project.RegisterScene(other)
+    project.Save()
+
+    files = [ project.ProjectFile, project.ScenesLocation / "NewScene.AZ", project.ScenesLocation / "OtherScene.AZ" ]
+    def Times() -> list: return [ path.stat().st_mtime_ns for path in files ]
+
+    # Nothing changed, nothing is written
+    times = Times()
+    project.Save()
+    assert Times() == times
+
+    # Only the modified scene is
+    for path in files: os.utime(path, ns=(0, 0))
+    other.CreateEntity("Entity")
+    project.Save()
+    assert Times()[0] == 0 and Times()[1] == 0 and Times()[2] != 0
+    assert not other.IsDirty
+
+    # No temporary file is left behind
+    assert sorted(path.name for path in project.ScenesLocation.iterdir()) == [ "NewScene.AZ", "OtherScene.AZ" ]
+
+    loaded = Project(tmp_path / "TestProject", "TestProject")
+    assert [ str(entity.GetComponent(TagComponent)) for entity in loaded.GetScene(1).Entities ] == [ "Entity" ]
+    assert not loaded.GetScene(1).IsDirty
+
+def test_LazySceneLoading(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    for i in range(4):
+        scene = Scene("Level{}".format(i))
+        scene.CreateEntities(i + 1, "Entity")
+        project.RegisterScene(scene)
+    project.Save()
+
+    loaded = Project(tmp_path / "TestProject", "TestProject", maxLoadedScenes=2)
+    handles = loaded.SceneHandles
+    assert loaded.SceneCount == 5
+    assert [ handle.Name for handle in handles ] == [ "NewScene", "Level0", "Level1", "Level2", "Level3" ]
+    assert not any(handle.IsLoaded for handle in handles)
+    assert all(handle.Size > 0 for handle in handles)
+
+    assert len(loaded.GetScene(4).Entities) == 4
+    assert loaded.GetScene(4) is loaded.GetScene(4)
+    loaded.GetScene(1)
+    loaded.GetScene(2)
+    assert [ handle.IsLoaded for handle in handles ] == [ False, True, True, False, False ]
+
+    # A scene with unsaved changes stays loaded
+    loaded.GetScene(2).CreateEntity("Unsaved")
+    loaded.GetScene(3)
+    loaded.GetScene(1)
+    assert [ handle.IsLoaded for handle in handles ] == [ False, True, True, False, False ]
+    assert handles[2].Loaded.IsDirty # type: ignore
+
+    loaded.Save()
+    loaded.GetScene(0)
+    assert [ handle.IsLoaded for handle in handles ] == [ True, True, False, False, False ]
+    assert "Unsaved" in [ str(entity.GetComponent(TagComponent)) for entity in loaded.GetScene(2).Entities ]
+
+def test_PinnedScene(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    for i in range(3): project.RegisterScene(Scene("Level{}".format(i)))
+    project.Save()
+
+    loaded = Project(tmp_path / "TestProject", "TestProject", maxLoadedScenes=1)
+    edited = loaded.GetScene(1)
+    loaded.PinScene(edited)
+    loaded.GetScene(2)
+    loaded.GetScene(3)
+    loaded.Save()
+    assert loaded.SceneHandles[1].Loaded is edited
+
+    # Edited after the other scenes were used and saved, the changes are still saved
+    edited.CreateEntity("Edited")
+    loaded.GetScene(2)
+    loaded.Save()
+    assert loaded.GetScene(1) is edited and not edited.IsDirty
+
+    loaded.GetScene(2)
+    loaded.UnpinScene(edited)
+    assert not loaded.SceneHandles[1].IsLoaded
+    reloaded = Project(tmp_path / "TestProject", "TestProject").GetScene(1)
+    assert "Edited" in [ str(entity.GetComponent(TagComponent)) for entity in reloaded.Entities ]
+
+def test_LoadAllScenes(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    for i in range(3):
+        scene = Scene("Level{}".format(i))
+        scene.CreateEntities(i + 1, "Entity")
+        project.RegisterScene(scene)
+    project.Save()
+
+    expected = [ [ str(entity.GetComponent(IDComponent).ID) for entity in project.GetScene(i).Entities ] for i in range(4) ]
+    loaded = Project(tmp_path / "TestProject", "TestProject", maxLoadedScenes=1)
+    loaded.GetScene(2)
+
+    scenes = loaded.LoadAllScenes(maxWorkers=2)
+    assert [ scene.Name for scene in scenes ] == [ "NewScene", "Level0", "Level1", "Level2" ]
+    assert [ [ str(entity.GetComponent(IDComponent).ID) for entity in scene.Entities ] for scene in scenes ] == expected
+    assert not any(scene.IsDirty for scene in scenes)
+    assert [ handle.IsLoaded for handle in loaded.SceneHandles ] == [ False, False, False, True ]
+
+def test_AutosaveRecovery(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    scene = project.GetScene(0)
+    scenePath = project.GetSceneLocation(scene)
+    size = scenePath.stat().st_size
+
+    scene.CreateEntity("Autosaved")
+    project.Autosave()
+    assert scenePath.stat().st_size == size
+    assert SceneJournal.PathFor(scenePath).stat().st_size > 0
+
+    # As if the editor crashed: the project is opened again without saving
+    recovered = Project(tmp_path / "TestProject", "TestProject").GetScene(0)
+    assert "Autosaved" in [ str(entity.GetComponent(TagComponent)) for entity in recovered.Entities ]
+    assert recovered.IsDirty
+
+    project.Save()
+    assert not SceneJournal.PathFor(scenePath).exists() or \
+        SceneJournal.Replay(SceneSerializer.Deserialize(scenePath), scenePath) == 0
+
+def test_ProjectModels(tmp_path) -> None:
+    project = Project(tmp_path / "TestProject", "TestProject")
+    assert project.MeshCache is project.MeshCache
+
+    (project.AssetsLocation / "Triangle.obj").write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    model = project.LoadModel(Path("Triangle.obj"))
+    assert len(model.Indices) == 3
+    assert len(list(project.MeshCache.Location.glob("*.AzMesh"))) == 1
+
+    # Read back from the cache
+    assert not project.LoadModel(Path("Triangle.obj")).Vertices.flags.writeable
+
+def test_AtomicWrite(tmp_path) -> None:
+    path = tmp_path / "File.txt"
+    with AtomicWrite(path) as file: file.write("First")
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+    # Replacing keeps the permissions of the previous file
+    path.chmod(0o640)
+    with AtomicWrite(path) as file: file.write("Second")
+    assert path.read_text() == "Second" and path.stat().st_mode & 0o777 == 0o640
+
+    import Asura.Utility
+    assert not hasattr(Asura.Utility, "tempfile")
@@ -0,0 +1,70 @@
+from Utility import *
+from Asura.Scene import *
+
+import pytest
+
+class Position:
+    def __init__(self, x: float=0.0) -> None: self.X = x
+class Velocity:
+    def __init__(self, x: float=0.0) -> None: self.X = x
+class Health:
+    pass
+
+@pytest.mark.parametrize("registryType", [ EsperRegistry, ArchetypeRegistry ])
+def test_RegistryInterface(registryType) -> None:
+    registry = registryType()
+
+    moving = [ registry.create_entity(Position(i), Velocity(1.0)) for i in range(10) ]
+    still  = [ registry.create_entity(Position(i)) for i in range(5) ]
+    empty  = registry.create_entity()
+
+    assert list(registry.entities()) == moving + still + [ empty ]
+    assert registry.entity_exists(empty)
+    assert registry.has_component(moving[0], Velocity)
+    assert not registry.has_component(still[0], Velocity)
+    assert registry.component_for_entity(moving[3], Position).X == 3
+
+    assert sorted(e for e, _ in registry.get_component(Position)) == sorted(moving + still)
+    assert sorted(e for e, _ in registry.get_components(Position, Velocity)) == sorted(moving)
+
+    # Moving an entity between signatures keeps its other components
+    health = Health()
+    registry.add_component(still[1], Velocity(2.0))
+    registry.add_component(still[1], health)
+    assert registry.component_for_entity(still[1], Position).X == 1
+    assert set(map(type, registry.components_for_entity(still[1]))) == { Position, Velocity, Health }
+
+    removed = registry.remove_component(moving[0], Velocity)
+    assert removed.X == 1.0
+    assert not registry.has_component(moving[0], Velocity)
+    with pytest.raises(KeyError): registry.component_for_entity(moving[0], Velocity)
+
+    registry.delete_entity(moving[5], immediate=True)
+    assert not registry.entity_exists(moving[5])
+    assert moving[5] not in [ e for e, _ in registry.get_component(Position) ]
+
+    # The swap-removed entities are still found at the right place
+    for i in moving[1:5] + moving[6:]:
+        assert registry.component_for_entity(i, Position).X == moving.index(i)
+
+    total = 0
+    for entities, (positions, velocities) in registry.get_columns(Position, Velocity):
+        assert len(entities) == len(positions) == len(velocities)
+        total += len(entities)
+    assert total == len(moving) - 2 + 1
+
+def test_SceneWithArchetypeRegistry(tmp_path) -> None:
+    scene = Scene("TestScene", registryType=ArchetypeRegistry)
+    root = scene.CreateEntity("Root")
+    child = scene.CreateEntity("Child")
+    scene.SetParent(child, root)
+    child.AddComponent(MeshComponent)
+
+    assert child.HasComponent(MeshComponent)
+    assert scene.GetEntitysWithComponent(MeshComponent) == [ child ]
+
+    scene.DuplicateEntity(root)
+    scene.DestroyEntity(child)
+    scene.OnUpdate()
+    assert len(scene.Entities) == 3
+    assert len(scene.GetEntitysWithComponent(MeshComponent)) == 1
@@ -0,0 +1,838 @@
+from Utility import *
+from Asura.Scene import *
+
+import numpy as np
+import pyrr
+import yaml
+
+def test_TransformStore() -> None:
+    scene = Scene("TestScene")
+    store = scene.TransformStore
+    assert store is not None
+
+    entities = [scene.CreateEntity("Entity{}".format(i)) for i in range(100)]
+    assert store.Count == 100
+    assert store.Capacity >= 100
+
+    transform = entities[10].GetComponent(TransformComponent)
+    transform.SetTranslation(pyrr.Vector3([ 1.0, 2.0, 3.0 ]))
+    assert np.allclose(store.Translations[transform.Index], [ 1.0, 2.0, 3.0 ])
+    assert store.Entities[transform.Index] == entities[10].EntityHandle
+
+    # The whole store can be operated upon in one go
+    store.Translations[:] += 1.0
+    store.MarkAllDirty()
+    assert np.allclose(np.asarray(transform.Translation), [ 2.0, 3.0, 4.0 ])
+
+    last = entities[-1].GetComponent(TransformComponent)
+    lastTranslation = np.array(last.Translation)
+    scene.DestroyEntity(entities[0])
+    scene.OnUpdate()
+
+    # The last transform is moved into the released slot
+    assert store.Count == 99
+    assert last.Index == 0
+    assert np.allclose(np.asarray(last.Translation), lastTranslation)
+    assert np.allclose(np.asarray(transform.Translation), [ 2.0, 3.0, 4.0 ])
+
+def test_TransformComponentDetached() -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+
+    transform = entity.GetComponent(TransformComponent)
+    transform.Translate(pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+    transform.Rotate(pyrr.Vector3([ 0.5, 0.0, 0.0 ]))
+
+    copy = transform.Copy()
+    assert copy.Store is not scene.TransformStore
+    assert np.allclose(np.asarray(copy.Transform), np.asarray(transform.Transform))
+
+    duplicate = scene.DuplicateEntity(entity)
+    assert duplicate.GetComponent(TransformComponent).Store is scene.TransformStore
+    assert scene.TransformStore.Count == 2 # type: ignore
+
+    # Detached, the values are kept by the component itself
+    transform = duplicate.GetComponent(TransformComponent)
+    duplicate.Scene.DestroyEntity(duplicate)
+    scene.OnUpdate()
+    assert transform.Store is None and scene.TransformStore.Count == 1 # type: ignore
+    assert np.allclose(np.asarray(transform.Transform), np.asarray(copy.Transform))
+
+    scene = Scene("TestScene", useTransformStore=False)
+    transform = scene.CreateEntity("Entity").GetComponent(TransformComponent)
+    assert scene.TransformStore is None
+    assert np.allclose(np.asarray(transform.Scale), [ 1.0, 1.0, 1.0 ])
+    transform.Translate(pyrr.Vector3([ 0.0, 2.0, 0.0 ]))
+    assert transform.Version == 1 and transform.WorldTransform[3, 1] == 2.0
+
+def test_TransformDirtyTracking() -> None:
+    scene = Scene("TestScene")
+    store = scene.TransformStore
+    entities = [scene.CreateEntity("Entity{}".format(i)) for i in range(10)]
+    scene.OnUpdate()
+    assert store.DirtyCount == 0 # type: ignore
+
+    transform = entities[3].GetComponent(TransformComponent)
+    version = transform.Version
+    transform.Translate(pyrr.Vector3([ 0.0, 5.0, 0.0 ]))
+    assert transform.IsDirty and transform.Version == version + 1
+    assert store.DirtyCount == 1 # type: ignore
+
+    # Only the dirty slot is recomputed
+    assert list(store.UpdateMatrices()) == [ transform.Index ] # type: ignore
+    assert transform.Transform[3, 1] == 5.0
+    assert store.UpdateMatrices().size == 0 # type: ignore
+
+    # Accessing the matrix of a dirty transform refreshes its cache
+    transform.SetScale(pyrr.Vector3([ 2.0, 2.0, 2.0 ]))
+    assert transform.Transform[0, 0] == 2.0
+    assert not transform.IsDirty
+
+    # The vectors are copies that are assigned back, the matrix can not be written to so that the cache stays valid
+    old = transform.Translation
+    transform.SetTranslation(pyrr.Vector3([ 7.0, 0.0, 0.0 ]))
+    assert old[0] != 7.0
+    transform.Translation += pyrr.Vector3([ 1.0, 0.0, 0.0 ])
+    assert transform.Translation[0] == 8.0 and transform.IsDirty
+    with pytest.raises(ValueError): transform.Transform[0, 0] = 1.0 # type: ignore
+
+    for method, value in [
+        ( transform.SetTranslation , pyrr.Vector3([ 1.0, 1.0, 1.0 ]) ),
+        ( transform.Translate      , pyrr.Vector3([ 1.0, 1.0, 1.0 ]) ),
+        ( transform.SetRotation    , pyrr.Vector3([ 1.0, 1.0, 1.0 ]) ),
+        ( transform.Rotate         , pyrr.Vector3([ 1.0, 1.0, 1.0 ]) ),
+        ( transform.SetScale       , pyrr.Vector3([ 1.0, 1.0, 1.0 ]) ),
+    ]:
+        store.UpdateMatrices() # type: ignore
+        method(value)
+        assert transform.IsDirty
+
+    store.UpdateMatrices() # type: ignore
+    transform.Reset()
+    assert transform.IsDirty
+
+    store.UpdateMatrices() # type: ignore
+    transform.Deserialize(transform.Copy().Serialize()["Transform"])
+    assert transform.IsDirty
+
+def test_ComputeWorldMatrices() -> None:
+    def ReferenceTransform(translation, rotation, scale) -> np.ndarray:
+        rotX = pyrr.matrix44.create_from_x_rotation(rotation[0])
+        rotY = pyrr.matrix44.create_from_y_rotation(rotation[1])
+        rotZ = pyrr.matrix44.create_from_z_rotation(rotation[2])
+        location = pyrr.matrix44.create_from_translation(translation)
+        return pyrr.matrix44.create_from_scale(scale) @ rotX @ rotY @ rotZ @ location
+
+    random = np.random.default_rng(69)
+    for useTransformStore in [ True, False ]:
+        scene = Scene("TestScene", useTransformStore)
+        references = {}
+        for i in range(50):
+            entity = scene.CreateEntity("Entity{}".format(i))
+            translation, rotation, scale = random.uniform(-5.0, 5.0, (3, 3))
+
+            transform = entity.GetComponent(TransformComponent)
+            transform.SetTranslation(pyrr.Vector3(translation))
+            transform.SetRotation(pyrr.Vector3(rotation))
+            transform.SetScale(pyrr.Vector3(scale))
+            references[entity.EntityHandle] = ReferenceTransform(translation, rotation, scale)
+
+        entities, matrices = scene.ComputeWorldMatrices()
+        assert matrices.shape == (50, 4, 4) and matrices.dtype == np.float32
+
+        for entity, matrix in zip(entities, matrices):
+            assert np.allclose(matrix, references[int(entity)], atol=1e-4)
+            transform = Entity(int(entity), scene).GetComponent(TransformComponent)
+            assert np.allclose(np.asarray(transform.Transform), matrix)
+
+def test_Hierarchy() -> None:
+    random = np.random.default_rng(6969)
+    scenes = [ Scene("TestScene"), Scene("TestScene", useTransformStore=False) ]
+    for scene in scenes:
+        random = np.random.default_rng(6969)
+        entities = []
+        for i in range(30):
+            entity = scene.CreateEntity("Entity{}".format(i))
+            transform = entity.GetComponent(TransformComponent)
+            transform.SetTranslation(pyrr.Vector3(random.uniform(-2.0, 2.0, 3)))
+            transform.SetRotation(pyrr.Vector3(random.uniform(-2.0, 2.0, 3)))
+            if i: scene.SetParent(entity, entities[int(random.integers(0, i))])
+            entities.append(entity)
+
+    # A root and a child of the root
+    root, child = entities[0], scene.GetChildren(entities[0])[0]
+    assert scene.GetParent(root) is None
+    assert scene.IsDescendantOf(child, root)
+
+    # Cycles are refused
+    scenes[0].SetParent(Entity(root.EntityHandle, scenes[0]), Entity(child.EntityHandle, scenes[0]))
+    assert scenes[0].GetParent(Entity(root.EntityHandle, scenes[0])) is None
+
+    def Compare() -> None:
+        handles, matrices = scenes[0].ComputeWorldMatrices()
+        expected = { int(h): m for h, m in zip(*scenes[1].ComputeWorldMatrices()) }
+        for handle, matrix in zip(handles, matrices):
+            assert np.allclose(matrix, expected[int(handle)], atol=1e-3)
+
+            # Child world = child local @ parent world
+            entity = Entity(int(handle), scenes[0])
+            parent = scenes[0].GetParent(entity)
+            if parent is None: continue
+            local = np.asarray(entity.GetComponent(TransformComponent).Transform)
+            assert np.allclose(matrix, local @ np.asarray(scenes[0].GetWorldTransform(parent)), atol=1e-3)
+
+    Compare()
+
+    # Moving a parent moves its whole subtree
+    for scene in scenes:
+        Entity(root.EntityHandle, scene).GetComponent(TransformComponent).Translate(pyrr.Vector3([ 0.0, 10.0, 0.0 ]))
+        scene.SetParent(Entity(entities[5].EntityHandle, scene), None)
+    Compare()
+
+def test_HierarchyDuplicateAndDestroy() -> None:
+    scene = Scene("TestScene")
+    root = scene.CreateEntity("Root")
+    child = scene.CreateEntity("Child")
+    grandChild = scene.CreateEntity("GrandChild")
+    scene.SetParent(child, root)
+    scene.SetParent(grandChild, child)
+
+    duplicate = scene.DuplicateEntity(child)
+    assert scene.GetParent(duplicate) == root
+    assert [ str(e.GetComponent(TagComponent)) for e in scene.GetChildren(root) ] == [ "Child", "Child" ]
+    assert [ str(e.GetComponent(TagComponent)) for e in scene.GetChildren(duplicate) ] == [ "GrandChild" ]
+
+    root.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 2.0, 3.0 ]))
+    scene.OnUpdate()
+    duplicatedGrandChild = scene.GetChildren(duplicate)[0]
+    assert np.allclose(np.asarray(duplicatedGrandChild.GetComponent(TransformComponent).WorldTransform)[3, :3], [ 1.0, 2.0, 3.0 ])
+
+    scene.DestroyEntity(child)
+    scene.OnUpdate()
+    assert len(scene.Entities) == 3
+    assert scene.GetChildren(root) == [ duplicate ]
+    assert scene.TransformStore.Count == 3 # type: ignore
+
+def test_HierarchySerialization(tmp_path) -> None:
+    scene = Scene("TestScene")
+    root = scene.CreateEntity("Root")
+    children = [ scene.CreateEntity("Child{}".format(i)) for i in range(3) ]
+    for child in reversed(children): scene.SetParent(child, root)
+    scene.SetParent(scene.CreateEntity("GrandChild"), children[1])
+
+    path = tmp_path / "TestScene.AZ"
+    SceneSerializer.Serialize(scene, path)
+    loaded = SceneSerializer.Deserialize(path)
+
+    def Tree(scene: Scene, entity: Entity) -> tuple:
+        return str(entity.GetComponent(TagComponent)), [ Tree(scene, child) for child in scene.GetChildren(entity) ]
+
+    roots = [ entity for entity in loaded.Entities if loaded.GetParent(entity) is None ]
+    assert len(roots) == 1
+    assert Tree(loaded, roots[0]) == Tree(scene, root)
+
+class HealthComponent:
+    def __init__(self, health: int=100) -> None: self.Health = health
+    def Serialize(self) -> dict: return {"Health": {"Value": self.Health, "Tags": [ "Player", "Alive" ]}}
+
+def test_BinarySerialization(tmp_path) -> None:
+    scene = Scene("TestScene")
+    root = scene.CreateEntity("Root")
+    root.GetComponent(TransformComponent).Translation = pyrr.Vector3([ 1.0, 2.0, 3.0 ])
+    child = scene.CreateEntity("Child")
+    child.GetComponent(TransformComponent).Scale = pyrr.Vector3([ 0.5, 0.5, 0.5 ])
+    child.AddComponent(HealthComponent, 50)
+    scene.SetParent(child, root)
+
+    yamlPath, binaryPath, convertedPath = tmp_path / "TestScene.AZ", tmp_path / "TestScene.AZB", tmp_path / "Converted.AZ"
+    SceneSerializer.Serialize(scene, binaryPath)
+    loaded = SceneSerializer.Deserialize(binaryPath)
+
+    # The file is not mapped anymore once it is read
+    maps = Path("/proc/self/maps")
+    if maps.exists(): assert str(binaryPath) not in maps.read_text()
+
+    assert loaded.SceneUUID == scene.SceneUUID
+    for entity in scene.Entities:
+        uuid = entity.GetComponent(IDComponent).ID
+        other = loaded.GetEntityByUUID(uuid)
+        assert other is not None
+        assert str(other.GetComponent(TagComponent)) == str(entity.GetComponent(TagComponent))
+        assert np.allclose(np.asarray(other.GetComponent(TransformComponent).Transform),
+                           np.asarray(entity.GetComponent(TransformComponent).Transform))
+    assert loaded.GetParent(loaded.GetEntityByUUID(child.GetComponent(IDComponent).ID)).EntityHandle == \
+           loaded.GetEntityByUUID(root.GetComponent(IDComponent).ID).EntityHandle # type: ignore
+
+    # YAML -> AZB -> YAML loses nothing, other components included
+    SceneSerializer.Serialize(scene, yamlPath)
+    SceneSerializer.Convert(yamlPath, binaryPath)
+    SceneSerializer.Convert(binaryPath, convertedPath)
+    assert convertedPath.read_text() == yamlPath.read_text()
+    assert "Health" in convertedPath.read_text()
+
+def test_ComponentSchemas(tmp_path) -> None:
+    scene = Scene("TestScene")
+    camera = scene.CreateEntity("Camera")
+    camera.AddComponent(CameraComponent, SceneCamera(ProjectionTypes.PERSPECTIVE), isPrimary=False)
+    camera.GetComponent(CameraComponent).FixedAspectRatio = True
+    for i in range(3):
+        mesh = scene.CreateEntity("Mesh{}".format(i))
+        mesh.AddComponentInstance(MeshComponent(pyrr.Vector3([ -i, -1.0, -1.0 ]), pyrr.Vector3([ i, 1.0, 1.0 ])))
+
+    columns = SceneColumns.FromScene(scene)
+    assert set(columns.Components) == { "Camera", "Mesh" }
+    assert columns.Components["Mesh"].Fields["Min"].shape == (3, 3)
+    assert not columns.Unregistered
+
+    def Check(loaded: Scene) -> None:
+        component = loaded.GetEntityByUUID(camera.GetComponent(IDComponent).ID).GetComponent(CameraComponent) # type: ignore
+        assert component.Camera.ProjectionType == ProjectionTypes.PERSPECTIVE
+        assert not component.Primary and component.FixedAspectRatio
+
+        meshes = { e.GetComponent(TagComponent).Tag: e.GetComponent(MeshComponent) for e in loaded.GetEntitysWithComponent(MeshComponent) }
+        assert len(meshes) == 3
+        assert np.allclose(np.asarray(meshes["Mesh2"].Min), [ -2.0, -1.0, -1.0 ])
+        assert np.allclose(np.asarray(meshes["Mesh2"].Max), [ 2.0, 1.0, 1.0 ])
+
+    for name in [ "TestScene.AZ", "TestScene.AZB" ]:
+        SceneSerializer.Serialize(scene, tmp_path / name)
+        Check(SceneSerializer.Deserialize(tmp_path / name))
+
+    # Fields missing from a YAML file get the value of a new component
+    schema = ComponentSchemas.Get(CameraComponent)
+    assert schema is not None and schema.Name == "Camera"
+    assert schema.FromYAML({ "Primary": False }).Camera.ProjectionType == ProjectionTypes.ORTHOGRAPHIC
+
+class LabelComponent:
+    def __init__(self, text: str="", size: float=1.0) -> None:
+        self.Text = text
+        self.Size = size
+
+ComponentSchemas.Register(LabelComponent, "Label", [ ComponentField("Text", "str"), ComponentField("Size", "f32") ])
+
+def test_ComponentSchemaValidation() -> None:
+    class Broken:
+        pass
+
+    for name, fields in [
+        ("AVeryLongSchemaName", []),
+        ("Broken", [ ComponentField("Not valid", "f32") ]),
+        ("Broken", [ ComponentField("Value", "f32", Attribute="a.1b") ]),
+        ("Broken", [ ComponentField("Value", "f64") ]),
+        ("Broken", [ ComponentField("Value", "f32"), ComponentField("Value", "i32") ]),
+    ]:
+        with pytest.raises(ValueError): ComponentSchemas.Register(Broken, name, fields)
+    assert ComponentSchemas.Get(Broken) is None
+
+    # Errors in the generated codecs point at their source (the defaults are read from a new component here)
+    with pytest.raises(AttributeError) as error:
+        ComponentSchemas.Register(Broken, "Broken", [ ComponentField("Value", "f32", Attribute="Inner.Value") ])
+    assert any("<ComponentSchema Broken>" in str(entry.path) for entry in error.traceback)
+
+def test_ComponentSchemaStrings(tmp_path) -> None:
+    scene = Scene("TestScene")
+    labels = { "First": "Hello", "Second": "World" }
+    for name, text in labels.items(): scene.CreateEntity(name).AddComponentInstance(LabelComponent(text, 2.0))
+
+    for name in [ "TestScene.AZ", "TestScene.AZB" ]:
+        SceneSerializer.Serialize(scene, tmp_path / name)
+        loaded = SceneSerializer.Deserialize(tmp_path / name)
+
+        components = { e.GetComponent(TagComponent).Tag: e.GetComponent(LabelComponent) for e in loaded.GetEntitysWithComponent(LabelComponent) }
+        assert { tag: component.Text for tag, component in components.items() } == labels
+        assert all(component.Size == 2.0 for component in components.values())
+
+def test_SceneJournal(tmp_path) -> None:
+    path = tmp_path / "TestScene.AZ"
+    scene = Scene("TestScene")
+    root, moved, destroyed = [ scene.CreateEntity(name) for name in [ "Root", "Moved", "Destroyed" ] ]
+    SceneSerializer.Serialize(scene, path)
+    scene.MarkSaved()
+
+    journal = SceneJournal(scene, path, compactRatio=100.0)
+    assert journal.Flush() == 0
+
+    moved.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 2.0, 3.0 ]))
+    scene.SetParent(moved, root)
+    # The parent is recorded too, as it got a RelationshipComponent
+    assert journal.Flush() == 2
+
+    scene.DestroyEntity(destroyed)
+    scene.OnUpdate()
+    created = scene.CreateEntity("Created")
+    created.GetMutableComponent(TagComponent).Tag = "Renamed"
+    assert journal.Flush() == 2
+
+    # Only the records are appended, the scene file is untouched
+    def State(scene: Scene) -> dict:
+        return {
+            str(e.GetComponent(IDComponent)): (
+                str(e.GetComponent(TagComponent)), np.asarray(e.GetComponent(TransformComponent).Translation).tolist(),
+                str(scene.GetParent(e).GetComponent(IDComponent)) if scene.GetParent(e) else None # type: ignore
+            )
+            for e in scene.Entities
+        }
+
+    assert len(SceneSerializer.Deserialize(path).Entities) == 3
+    recovered = SceneJournal.Open(path)
+    assert State(recovered) == State(scene)
+    assert recovered.IsDirty
+
+    # A torn record at the end is dropped, and cut off before appending to the journal again
+    size = journal.Size
+    with journal.Location.open("ab") as file: file.write(b"\x01\xff\x00\x00\x00garbage")
+    assert State(SceneJournal.Open(path)) == State(scene)
+    assert SceneJournal(scene, path).Size == size
+
+    # Compacting writes the scene file and empties the journal
+    journal.Compact()
+    assert not scene.IsDirty
+    assert State(SceneSerializer.Deserialize(path)) == State(scene)
+    assert SceneJournal.Replay(Scene("TestScene"), path) == 0
+
+def test_YAMLLoaders(tmp_path) -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+    entity.GetComponent(TransformComponent).Translation = pyrr.Vector3([ 1.5, -2.0, 0.25 ])
+    path = tmp_path / "TestScene.AZ"
+    SceneSerializer.Serialize(scene, path)
+
+    # The handlers are only registered on the serializer's own classes
+    assert "Vector3" not in yaml.Loader.yaml_constructors
+    assert pyrr.Vector3 not in yaml.Dumper.yaml_representers
+
+    # The pure Python and the libyaml classes read and write the same thing
+    assert AZ_YAML.Load(path.read_text()) == yaml.load(path.read_text(), AZ_PyLoader)
+    assert AZ_YAML.Dump(SceneSerializer.Read(path).ToData()) == \
+           yaml.dump(SceneSerializer.Read(path).ToData(), Dumper=AZ_PyDumper)
+
+@pytest.mark.parametrize("registryType", [ EsperRegistry, ArchetypeRegistry ])
+def test_QueryView(registryType) -> None:
+    scene = Scene("TestScene", registryType=registryType)
+    entities = [ scene.CreateEntity("Entity{}".format(i)) for i in range(10) ]
+    for entity in entities[:4]: entity.AddComponent(MeshComponent)
+
+    view = scene.Query(TransformComponent, MeshComponent)
+    assert scene.Query(TransformComponent, MeshComponent) is view
+    assert sorted(handle for handle, _, _ in view) == [ e.EntityHandle for e in entities[:4] ]
+
+    for handle, transform, mesh in view:
+        assert transform is Entity(handle, scene).GetComponent(TransformComponent)
+        assert mesh is Entity(handle, scene).GetComponent(MeshComponent)
+
+    # Kept up to date by the component hooks
+    entities[7].AddComponent(MeshComponent)
+    assert entities[7].EntityHandle in view
+    entities[0].RemoveComponent(MeshComponent)
+    assert entities[0].EntityHandle not in view
+
+    created = scene.CreateEntity("Created")
+    created.AddComponent(MeshComponent)
+    assert created.EntityHandle in view
+
+    scene.DestroyEntity(entities[1])
+    scene.OnUpdate()
+    assert entities[1].EntityHandle not in view
+
+    expected = sorted(e.EntityHandle for e in scene.GetEntitysWithComponent(MeshComponent))
+    assert sorted(handle for handle, _, _ in view) == expected
+    assert len(scene.Query(TagComponent)) == len(scene.Entities)
+
+def test_IterEntities() -> None:
+    scene = Scene("TestScene")
+    entities = [ scene.CreateEntity("Entity{}".format(i)) for i in range(10) ]
+    for entity in entities[:3]: entity.AddComponent(MeshComponent)
+    scene.SetParent(entities[1], entities[0])
+    scene.SetParent(entities[2], entities[0])
+
+    assert scene.EntityCount == 10
+    assert [ int(e) for e in scene.IterEntities() ] == [ int(e) for e in scene.Entities ]
+
+    # The same view is rebound for every entity
+    views = { id(view) for view in scene.IterEntities() }
+    assert len(views) == 1
+
+    pairs = [ (int(view), component) for view, component in scene.IterEntitiesWithComponent(MeshComponent) ]
+    assert pairs == [ (int(e), e.GetComponent(MeshComponent)) for e in scene.GetEntitysWithComponent(MeshComponent) ]
+
+    assert [ int(child) for child in scene.IterChildren(entities[0]) ] == [ int(e) for e in entities[1:3] ]
+    assert scene.HasChildren(entities[0]) and not scene.HasChildren(entities[1])
+
+    # Kept copies are independent of the view, and deferred deletion works while iterating
+    kept = None
+    for view in scene.IterEntities():
+        if int(view) == int(entities[5]): kept = view.ToEntity()
+        if int(view) in (int(entities[8]), int(entities[9])): scene.DestroyEntity(view)
+
+    assert kept is not None and kept == entities[5]
+    scene.OnUpdate()
+    assert scene.EntityCount == 8
+
+def test_EntityByUUID() -> None:
+    scene = Scene("TestScene")
+    uuid = UUID4Generator()
+    entity = scene.CreateEntityWithUUID("Entity", uuid)
+    child = scene.CreateEntity("Child")
+    scene.SetParent(child, entity)
+
+    assert scene.GetEntityByUUID(uuid) == entity
+    assert scene.GetEntityByUUID(UUID4Generator()) is None
+
+    duplicate = scene.DuplicateEntity(entity)
+    duplicateChild = scene.GetChildren(duplicate)[0]
+    uuids = [ e.GetComponent(IDComponent).ID for e in (duplicate, duplicateChild) ]
+    assert scene.GetEntitiesByUUIDs(uuids + [ UUID4Generator() ]) == [ duplicate, duplicateChild, None ]
+
+    childUUID = child.GetComponent(IDComponent).ID
+    scene.DestroyEntity(entity)
+    scene.OnUpdate()
+    assert scene.GetEntitiesByUUIDs([ uuid, childUUID ]) == [ None, None ]
+    assert scene.GetEntityByUUID(uuids[0]) == duplicate
+
+@pytest.mark.parametrize("useTransformStore", [ True, False ])
+def test_CreateEntities(useTransformStore) -> None:
+    scene = Scene("TestScene", useTransformStore=useTransformStore)
+    view = scene.Query(TagComponent, TransformComponent)
+    first = scene.CreateEntity("First")
+
+    translations = np.arange(30, dtype=np.float32).reshape(10, 3)
+    handles = scene.CreateEntities(10, names=[ "Entity{}".format(i) for i in range(10) ], translations=translations)
+
+    assert len(handles) == 10 and scene.EntityCount == 11
+    assert len(view) == 11
+    for i, handle in enumerate(handles):
+        entity = Entity(int(handle), scene)
+        assert str(entity.GetComponent(TagComponent)) == "Entity{}".format(i)
+        assert scene.GetEntityByUUID(entity.GetComponent(IDComponent).ID) == entity
+
+        transform = entity.GetComponent(TransformComponent)
+        assert np.allclose(np.asarray(transform.Translation), translations[i])
+        assert np.allclose(np.asarray(transform.Scale), [ 1.0, 1.0, 1.0 ])
+
+    if useTransformStore:
+        assert scene.TransformStore.Count == 11 # type: ignore
+        assert np.array_equal(scene.TransformStore.Entities[1:], handles) # type: ignore
+
+    # Bulk created entities behave like any other one
+    scene.DestroyEntity(first)
+    scene.DestroyEntity(Entity(int(handles[3]), scene))
+    scene.OnUpdate()
+    assert scene.EntityCount == 9 and len(view) == 9
+
+    entities, matrices = scene.ComputeWorldMatrices()
+    for handle, matrix in zip(entities, matrices):
+        expected = Entity(int(handle), scene).GetComponent(TransformComponent).Transform
+        assert np.allclose(matrix, np.asarray(expected))
+
+def test_SceneCommandBuffer() -> None:
+    scene = Scene("TestScene")
+    view = scene.Query(MeshComponent)
+    root = scene.CreateEntity("Root")
+    child = scene.CreateEntity("Child")
+    scene.SetParent(child, root)
+    other = scene.CreateEntity("Other")
+    other.AddComponent(MeshComponent)
+
+    commands = scene.Commands
+    uuids = [ commands.CreateEntity("Spawned{}".format(i)) for i in range(3) ]
+    mesh = commands.AddComponent(uuids[0], MeshComponent)
+    commands.RemoveComponent(other, MeshComponent)
+    commands.DuplicateEntity(root)
+    commands.DestroyEntity(root)
+    commands.DestroyEntity(root)
+
+    # Nothing changes until the sync point
+    assert len(commands) == 7
+    assert scene.EntityCount == 3 and scene.GetEntityByUUID(uuids[0]) is None
+
+    scene.OnUpdate()
+    assert len(commands) == 0
+
+    spawned = scene.GetEntitiesByUUIDs(uuids)
+    assert [ str(e.GetComponent(TagComponent)) for e in spawned ] == [ "Spawned0", "Spawned1", "Spawned2" ] # type: ignore
+    assert spawned[0].GetComponent(MeshComponent) is mesh # type: ignore
+    assert [ handle for handle, _ in view ] == [ int(spawned[0]) ] # type: ignore
+
+    # The duplicate (with its child) survives the destruction of the original
+    tags = sorted(str(e.GetComponent(TagComponent)) for e in scene.IterEntities())
+    assert tags == [ "Child", "Other", "Root", "Spawned0", "Spawned1", "Spawned2" ]
+    assert not scene.EntityRegistry.entity_exists(int(root)) and not scene.EntityRegistry.entity_exists(int(child))
+
+def test_SceneCommandBufferOrder() -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+    old = entity.AddComponent(MeshComponent)
+
+    # Component changes are applied in the order they were recorded, so this replaces the mesh
+    commands = scene.Commands
+    commands.RemoveComponent(entity, MeshComponent)
+    new = commands.AddComponent(entity, MeshComponent, pyrr.Vector3([ -2.0, -2.0, -2.0 ]))
+    scene.OnUpdate()
+    assert entity.GetComponent(MeshComponent) is new and new is not old
+
+    commands.AddComponent(entity, HealthComponent)
+    commands.RemoveComponent(entity, HealthComponent)
+    scene.OnUpdate()
+    assert entity.HasComponent(MeshComponent) and not entity.HasComponent(HealthComponent)
+
+def test_GetWorldMatrices() -> None:
+    scene = Scene("TestScene")
+    entities = [ scene.CreateEntity(str(i)) for i in range(5) ]
+    for i, entity in enumerate(entities): entity.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ i, 0.0, 0.0 ]))
+
+    def Check() -> None:
+        alive = [ e for e in entities if scene.EntityRegistry.entity_exists(int(e)) ]
+        handles = np.array([ int(e) for e in reversed(alive) ])
+        expected = [ e.GetComponent(TransformComponent).Translation[0] for e in reversed(alive) ]
+        assert np.allclose(scene.GetWorldMatrices(handles)[:, 3, 0], expected)
+
+    Check()
+    # The cached order follows the slots when they move, and when a snapshot puts them back
+    scene.Snapshot()
+    scene.DestroyEntity(entities[1])
+    scene.OnUpdate()
+    Check()
+    scene.Restore()
+    Check()
+    entities.append(scene.CreateEntity("5"))
+    Check()
+
+def test_SystemScheduler() -> None:
+    scheduler = SystemScheduler(maxWorkers=4)
+    order = []
+
+    def Record(name: str):
+        def Function(scene, dt: float) -> None: order.append(name)
+        return Function
+
+    scheduler.AddSystem("Physics", Record("Physics"), reads=(MeshComponent,), writes=(TransformComponent,))
+    scheduler.AddSystem("Tags", Record("Tags"), writes=(TagComponent,))
+    scheduler.AddSystem("Render", Record("Render"), reads=(TransformComponent, MeshComponent))
+    scheduler.AddSystem("Audio", Record("Audio"), reads=(TagComponent,))
+    scheduler.AddSystem("Animation", Record("Animation"), writes=(TransformComponent,))
+
+    stages = [ [ system.Name for system in stage ] for stage in scheduler.Stages ]
+    assert stages == [ [ "Physics", "Tags" ], [ "Render", "Audio" ], [ "Animation" ] ]
+
+    scheduler.Run(None, 0.016)
+    assert order.index("Physics") < order.index("Render") < order.index("Animation")
+    assert order.index("Tags") < order.index("Audio")
+
+    scheduler.RemoveSystem("Render")
+    stages = [ [ system.Name for system in stage ] for stage in scheduler.Stages ]
+    assert stages == [ [ "Physics", "Tags" ], [ "Audio", "Animation" ] ]
+    scheduler.Shutdown()
+
+def test_SystemSchedulerTransforms() -> None:
+    scene = Scene("TestScene")
+    parent, child = scene.CreateEntity("Parent"), scene.CreateEntity("Child")
+    scene.SetParent(child, parent)
+    scene.UpdateTransforms()
+
+    def Move(scene, dt: float) -> None: parent.GetComponent(TransformComponent).Translate(pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+
+    # The readers of a stage find the matrices up to date, reading them writes nothing
+    seen = []
+    def Read(scene, dt: float) -> None:
+        store = scene.TransformStore
+        seen.append((store.DirtyCount, store.WorldVersion, np.asarray(child.GetComponent(TransformComponent).WorldTransform)[3, :3].tolist()))
+
+    scheduler = SystemScheduler(maxWorkers=2)
+    scheduler.AddSystem("Move", Move, writes=(TransformComponent,))
+    scheduler.AddSystem("ReadA", Read, reads=(TransformComponent,))
+    scheduler.AddSystem("ReadB", Read, reads=(TransformComponent,))
+    scheduler.Run(scene, 0.016)
+    scheduler.Shutdown()
+
+    assert len(seen) == 2 and seen[0] == seen[1]
+    assert seen[0][0] == 0 and np.allclose(seen[0][2], [ 1.0, 0.0, 0.0 ])
+
+def test_SystemSchedulerSnapshot() -> None:
+    scene = Scene("TestScene")
+    tagged = [ Entity(int(handle), scene) for handle in scene.CreateEntities(200) ]
+    meshes = [ Entity(int(handle), scene) for handle in scene.CreateEntities(200) ]
+    for entity in meshes: entity.AddComponent(MeshComponent)
+    scene.MarkSaved()
+    changeCount = scene.ChangeCount
+
+    # Two systems of the same stage, both copy-on-write their entities and track the changes concurrently
+    def Rename(scene, dt: float) -> None:
+        for entity in tagged: scene.GetMutableComponent(entity, TagComponent).Tag = "Renamed"
+
+    def Grow(scene, dt: float) -> None:
+        for entity in meshes: scene.GetMutableComponent(entity, MeshComponent).Max[0] = 2.0
+
+    scene.Snapshot()
+    scene.AddSystem("Rename", Rename, writes=(TagComponent,))
+    scene.AddSystem("Grow", Grow, writes=(MeshComponent,))
+    scene.OnUpdateRuntime(0.016)
+    scene.OnStop()
+
+    assert scene.ChangeCount == changeCount + 400
+    assert len(scene._TakeChanges()[0]) == 400
+
+    scene.Restore()
+    assert all(str(entity.GetComponent(TagComponent)) != "Renamed" for entity in tagged)
+    assert all(entity.GetComponent(MeshComponent).Max[0] == 0.5 for entity in meshes)
+
+def test_SceneSystems() -> None:
+    scene = Scene("TestScene")
+    scene.CreateEntities(100)
+    moving = scene.CreateEntities(10)
+    for handle in moving: Entity(int(handle), scene).AddComponent(MeshComponent)
+
+    def Move(scene: Scene, dt: float) -> None:
+        store = scene.TransformStore
+        store.Translations[:, 0] += dt # type: ignore
+        store.MarkAllDirty() # type: ignore
+
+    def Spawn(scene: Scene, dt: float) -> None:
+        for _ in scene.Query(MeshComponent): scene.Commands.CreateEntity("Spawned")
+
+    def Fail(scene: Scene, dt: float) -> None: raise RuntimeError("Failed")
+
+    scene.AddSystem("Move", Move, writes=(TransformComponent,))
+    scene.AddSystem("Spawn", Spawn, reads=(MeshComponent,))
+    scene.OnUpdateRuntime(0.5)
+
+    assert scene.EntityCount == 120
+    assert np.allclose(scene.TransformStore.Translations[:110, 0], 0.5) # type: ignore
+
+    scene.AddSystem("Fail", Fail)
+    with pytest.raises(RuntimeError): scene.OnUpdateRuntime(0.5)
+    scene.OnStop()
+
+def test_FixedTimestep() -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+    ticks = []
+
+    def Move(scene: Scene, dt: float) -> None:
+        ticks.append(dt)
+        transform = entity.GetComponent(TransformComponent)
+        transform.SetTranslation(transform.Translation + pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+
+    scene.AddSystem("Move", Move, writes=(TransformComponent,))
+    scene.SetFixedTimestep(50.0, maxCatchUpSteps=3)
+
+    # Not enough time for a step yet
+    scene.OnUpdateRuntime(0.01)
+    assert ticks == [] and scene.InterpolationAlpha == pytest.approx(0.5)
+
+    scene.OnUpdateRuntime(0.025)
+    assert ticks == [ pytest.approx(0.02) ]
+    assert scene.InterpolationAlpha == pytest.approx(0.75)
+
+    # The blend is between the translation before (0) and after (1) the last step
+    _, matrices = scene.ComputeInterpolatedWorldMatrices()
+    assert matrices[0, 3, 0] == pytest.approx(0.75)
+
+    # A long frame is capped to maxCatchUpSteps
+    scene.OnUpdateRuntime(1.0)
+    assert len(ticks) == 4
+    assert 0.0 <= scene.InterpolationAlpha < 1.0
+
+    # Entities created during the step are not interpolated
+    scene.Commands.CreateEntity("Spawned")
+    scene.OnUpdateRuntime(0.02)
+    entities, matrices = scene.ComputeInterpolatedWorldMatrices()
+    assert len(entities) == 2
+    assert matrices[list(entities).index(int(entity)), 3, 0] == pytest.approx(4.0 + scene.InterpolationAlpha)
+
+    # GetWorldMatrices picks the same rows, for any subset of the entities
+    handles = np.array([ int(entity) ])
+    assert np.allclose(scene.GetWorldMatrices(handles, interpolated=True)[0], matrices[list(entities).index(int(entity))])
+    assert scene.GetWorldMatrices(handles)[0, 3, 0] == pytest.approx(5.0)
+
+    scene.SetFixedTimestep(None)
+    scene.OnUpdateRuntime(0.1)
+    assert ticks[-1] == pytest.approx(0.1)
+
+def test_SnapshotWrites() -> None:
+    scene = Scene("TestScene")
+    entity = scene.CreateEntity("Entity")
+    mesh = entity.AddComponent(MeshComponent)
+    view = scene.Query(TagComponent, MeshComponent)
+    scene.MarkSaved()
+
+    # Writes through GetComponent, the rows of a query and the transform setters are all undone
+    scene.Snapshot()
+    entity.GetComponent(TagComponent).Tag = "Renamed"
+    for _, _, rowMesh in view: rowMesh.Min[0] = -10.0
+    entity.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 2.0, 3.0 ]))
+    assert entity.GetComponent(MeshComponent).Min[0] == -10.0 and mesh.Min[0] == -0.5
+    scene.Restore()
+
+    assert str(entity.GetComponent(TagComponent)) == "Entity"
+    assert entity.GetComponent(MeshComponent) is mesh and mesh.Min[0] == -0.5
+    assert np.allclose(np.asarray(entity.GetComponent(TransformComponent).Translation), 0.0)
+
+    # Once restored, the scene is as dirty as it was before
+    assert not scene.IsDirty and scene._TakeChanges() == ([], [])
+    scene.GetMutableComponent(entity, TagComponent)
+    scene.Snapshot()
+    scene.CreateEntity("Spawned")
+    scene.Restore()
+    assert scene.IsDirty and scene._TakeChanges() == ([ int(entity) ], [])
+
+    # Unless it was saved in between, what was written then has to be written again
+    scene.MarkSaved()
+    scene.Snapshot()
+    entity.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+    scene.MarkSaved()
+    scene.Restore()
+    assert scene.IsDirty and scene._TakeChanges()[0] == [ int(entity) ]
+
+@pytest.mark.parametrize("registryType", [ EsperRegistry, ArchetypeRegistry ])
+def test_SnapshotRestore(registryType) -> None:
+    scene = Scene("TestScene", registryType=registryType)
+    view = scene.Query(TagComponent, MeshComponent)
+
+    root = scene.CreateEntity("Root")
+    child = scene.CreateEntity("Child")
+    other = scene.CreateEntity("Other")
+    scene.SetParent(child, root)
+    other.AddComponent(MeshComponent)
+    root.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 1.0, 0.0, 0.0 ]))
+
+    tag = other.GetComponent(TagComponent)
+    scene.Snapshot()
+
+    # Changes of every kind while playing
+    other.GetMutableComponent(TagComponent).Tag = "Renamed"
+    assert tag.Tag == "Other" and str(other.GetComponent(TagComponent)) == "Renamed"
+
+    root.GetComponent(TransformComponent).SetTranslation(pyrr.Vector3([ 5.0, 0.0, 0.0 ]))
+    root.AddComponent(MeshComponent)
+    other.RemoveComponent(MeshComponent)
+    spawned = scene.CreateEntity("Spawned")
+    spawnedUUID = spawned.GetComponent(IDComponent).ID
+    scene.SetParent(spawned, root)
+    scene.DestroyEntity(child)
+    scene.OnUpdateRuntime(0.016)
+
+    assert scene.EntityCount == 3
+    scene.OnStop()
+    scene.Restore()
+
+    assert not scene.HasSnapshot
+    assert sorted(str(e.GetComponent(TagComponent)) for e in scene.IterEntities()) == [ "Child", "Other", "Root" ]
+    assert other.GetComponent(TagComponent) is tag
+    assert not root.HasComponent(MeshComponent) and other.HasComponent(MeshComponent)
+    assert [ handle for handle, *_ in view ] == [ int(other) ]
+
+    assert scene.GetChildren(root) == [ child ]
+    assert scene.GetEntityByUUID(child.GetComponent(IDComponent).ID) == child
+    assert scene.GetEntityByUUID(spawnedUUID) is None
+
+    # The transforms (and the hierarchy of the store) are back as well
+    assert np.allclose(np.asarray(root.GetComponent(TransformComponent).Translation), [ 1.0, 0.0, 0.0 ])
+    assert np.allclose(np.asarray(child.GetComponent(TransformComponent).WorldTransform)[3, :3], [ 1.0, 0.0, 0.0 ])
+    entities, _ = scene.ComputeWorldMatrices()
+    assert sorted(entities.tolist()) == sorted([ int(root), int(child), int(other) ])
+
+    # Without any change, nothing is saved
+    scene.Snapshot()
+    for entity, component in scene.IterEntitiesWithComponent(TagComponent): component.Tag
+    scene.Restore()
+    assert other.GetComponent(TagComponent) is tag